@@ -0,0 +1,24 @@
+import json
+import time
+
+from LispLangInterpreter.Config.Interpreter import Interpreter
+from LispLangInterpreter.Evaluator.Tracing import StepCounter
+from LispLangInterpreter.Evaluator.runFile import start
+
+benchmarkConfig = json.loads(open("Tests/testconfig.json", encoding="utf8").read())
+
+
+def runWorkload(folder, mainFile, config=None):
+    """
+    Runs a lisp file as the main file of the interpreter, once timed, and once with a step counter, so that counting
+    the steps doesn't slow down the timed run
+    :return: The returned value, the amount of evaluator steps and the time taken in seconds
+    """
+    config = dict(benchmarkConfig if config is None else config, path=folder, mainFile=mainFile)
+    startTime = time.perf_counter()
+    result = start(Interpreter(config))
+    seconds = time.perf_counter() - startTime
+    counting = Interpreter(config)
+    counting.tracer = StepCounter()
+    start(counting)
+    return result, counting.tracer.steps, seconds
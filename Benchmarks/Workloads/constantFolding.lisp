@@ -0,0 +1,15 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+__import [list ["StandardLibrary" "concat"]] [quote concat]
+
+let iterations [sum 500 500]
+let step [sum [sum 1 1] -1]
+let suffix [concat "do" "ne"]
+let loop [lambda [self n] [
+    cond [equals n iterations]
+        [concat suffix "!"]
+        [self self [sum n step]]
+    ]
+]
+
+loop loop 0
@@ -0,0 +1,29 @@
+__import [list ["StandardLibrary" "handlerInvocationDefinition"]] [quote handlerInvocationDefinition]
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+__import [list ["StandardLibrary" "head"]] [quote head]
+__import [list ["StandardLibrary" "continue"]] [quote continue]
+let tick [handlerInvocationDefinition [quote tick] 1]
+
+let loop [lambda [self n] [
+    cond [equals n 0]
+        0
+        [
+            ignore [tick n]
+            self self [sum n -1]
+        ]
+    ]
+]
+
+let unusedHandler [lambda [state value] [continue value state]]
+let tickHandler [lambda [state value] [continue unit [sum state 1]]]
+
+let nest [lambda [self depth] [
+    cond [equals depth 0]
+        [loop loop 500]
+        [head [handle [self self [sum depth -1]] [list [[list [[quote unused] unusedHandler]]]] 0]]
+    ]
+]
+
+let depth 50
+handle [nest nest depth] [list [[list [[quote tick] tickHandler]]]] 0
@@ -0,0 +1,17 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "concat"]] [quote concat]
+__import [list ["StandardLibrary" "continue"]] [quote continue]
+__import [list ["StandardLibrary" "handlerInvocationDefinition"]] [quote handlerInvocationDefinition]
+
+let print [handlerInvocationDefinition [quote print] 1]
+let printHandler [lambda [state toPrint] [continue unit [concat state toPrint]]]
+
+let add3 [lambda [a b c] [sum a [sum b c]]]
+let work [lambda [x] [
+    ignore [print "."]
+    add3 x [sum x x] [sum 1 2]
+    ]
+]
+
+handle [list [[work 1] [work 2] [work 3] [work 4] [work 5] [work 6] [work 7] [work 8]]]
+    [list [[list [[quote print] printHandler]]]] ""
@@ -0,0 +1,22 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+__import [list ["StandardLibrary" "continue"]] [quote continue]
+__import [list ["StandardLibrary" "handlerInvocationDefinition"]] [quote handlerInvocationDefinition]
+
+let get [handlerInvocationDefinition [quote get] 1]
+let set [handlerInvocationDefinition [quote set] 2]
+
+let addUpTo [lambda [self n] [
+    cond [equals n 0]
+        [get unit]
+        [
+            ignore [set unit [sum [get unit] n]]
+            self self [sum n -1]
+        ]
+    ]
+]
+
+let getHandler [lambda [state cell] [continue state state]]
+let setHandler [lambda [state cell newValue] [continue unit newValue]]
+
+handle [addUpTo addUpTo 1000] [list [[list [[quote get] getHandler]] [list [[quote set] setHandler]]]] 0
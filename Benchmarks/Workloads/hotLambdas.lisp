@@ -0,0 +1,13 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+
+let step 1
+let adder [lambda [k] [lambda [x] [sum x [sum k step]]]]
+let repeat [lambda [self f n acc] [
+    cond [equals n 0]
+        acc
+        [self self f [sum n -1] [f acc]]
+    ]
+]
+
+list [[repeat repeat [adder 1] 2000 0] [repeat repeat [adder 2] 2000 0]]
@@ -0,0 +1,52 @@
+__import [list ["StandardLibrary" "handlerInvocationDefinition"]] [quote handlerInvocationDefinition]
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+__import [list ["StandardLibrary" "concat"]] [quote concat]
+__import [list ["StandardLibrary" "head"]] [quote head]
+__import [list ["StandardLibrary" "tail"]] [quote tail]
+__import [list ["StandardLibrary" "stop"]] [quote stop]
+let choose [handlerInvocationDefinition [quote choose] 1]
+let fail [handlerInvocationDefinition [quote fail] 1]
+let empty [tail [list [0]]]
+
+let safe [lambda [self column placed distance] [
+    cond [equals placed empty]
+        true
+        [
+            let other [head placed]
+            cond [equals other column]
+                false
+                [cond [equals other [sum column distance]]
+                    false
+                    [cond [equals [sum other distance] column]
+                        false
+                        [self self column [tail placed] [sum distance 1]]
+                    ]
+                ]
+        ]
+    ]
+]
+
+let place [lambda [self size row placed] [
+    cond [equals row size]
+        [list [placed]]
+        [
+            let column [choose size]
+            cond [safe safe column placed 1]
+                [self self size [sum row 1] [concat [list [column]] placed]]
+                [fail unit]
+        ]
+    ]
+]
+
+let tryAll [lambda [self continuation column size] [
+    cond [equals column size]
+        empty
+        [concat [continuation column] [self self continuation [sum column 1] size]]
+    ]
+]
+
+let chooseHandler [lambda [state size continuation] [stop [tryAll tryAll continuation 0 size] state]]
+let failHandler [lambda [state ignored] [stop empty state]]
+
+handle [place place 6 0 empty] [list [[list [[quote choose] chooseHandler]] [list [[quote fail] failHandler]]]] unit
@@ -0,0 +1,19 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+__import [list ["StandardLibrary" "ref"]] [quote ref]
+__import [list ["StandardLibrary" "get"]] [quote get]
+__import [list ["StandardLibrary" "set"]] [quote set]
+
+let total [ref 0]
+
+let addUpTo [lambda [self n] [
+    cond [equals n 0]
+        [get total]
+        [
+            ignore [set total [sum [get total] n]]
+            self self [sum n -1]
+        ]
+    ]
+]
+
+addUpTo addUpTo 1000
@@ -0,0 +1,7 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+__import [list ["StandardLibrary" "pmap"]] [quote pmap]
+
+let triangle [lambda [self n] [cond [equals n 0] 0 [sum n [self self [sum n -1]]]]]
+
+pmap [lambda [n] [triangle triangle n]] [list [400 400 400 400 400 400 400 400 400 400 400 400 400 400 400 400]]
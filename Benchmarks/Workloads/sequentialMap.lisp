@@ -0,0 +1,16 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+__import [list ["StandardLibrary" "head"]] [quote head]
+__import [list ["StandardLibrary" "tail"]] [quote tail]
+__import [list ["StandardLibrary" "concat"]] [quote concat]
+
+let triangle [lambda [self n] [cond [equals n 0] 0 [sum n [self self [sum n -1]]]]]
+
+let map [lambda [self function items count] [
+    cond [equals count 1]
+        [list [[function [head items]]]]
+        [concat [list [[function [head items]]]] [self self function [tail items] [sum count -1]]]
+    ]
+]
+
+map map [lambda [n] [triangle triangle n]] [list [400 400 400 400 400 400 400 400 400 400 400 400 400 400 400 400]] 16
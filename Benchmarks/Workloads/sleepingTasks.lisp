@@ -0,0 +1,17 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+__import [list ["StandardLibrary" "spawn"]] [quote spawn]
+__import [list ["StandardLibrary" "join"]] [quote join]
+__import [list ["StandardLibrary" "sleep"]] [quote sleep]
+
+let spawnAll [lambda [self n] [
+    cond [equals n 0]
+        0
+        [
+            let task [spawn [lambda [start] [ignore [sleep 0.1] 1]]]
+            sum [self self [sum n -1]] [join task]
+        ]
+    ]
+]
+
+spawnAll spawnAll 50
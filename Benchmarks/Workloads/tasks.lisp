@@ -0,0 +1,18 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+__import [list ["StandardLibrary" "spawn"]] [quote spawn]
+__import [list ["StandardLibrary" "join"]] [quote join]
+
+let countDown [lambda [self n] [cond [equals n 0] 1 [self self [sum n -1]]]]
+
+let spawnAll [lambda [self n] [
+    cond [equals n 0]
+        0
+        [
+            let task [spawn [lambda [start] [countDown countDown 20]]]
+            sum [self self [sum n -1]] [join task]
+        ]
+    ]
+]
+
+spawnAll spawnAll 200
@@ -0,0 +1,22 @@
+"""
+Spawns 50 tasks that each sleep for 0.1 seconds with the async sleep effect. With the async driver the sleeps overlap,
+so the whole workload takes about as long as a single sleep instead of 5 seconds.
+Run from the root of the repository with: python -m Benchmarks.asyncDriver
+"""
+import asyncio
+import time
+
+from Benchmarks.BenchmarkRunner import benchmarkConfig
+from LispLangInterpreter.Config.Interpreter import Interpreter
+from LispLangInterpreter.Evaluator.Tracing import StepCounter
+from LispLangInterpreter.Evaluator.runFile import startAsync
+
+if __name__ == '__main__':
+    interpreter = Interpreter(dict(benchmarkConfig, path="Benchmarks/Workloads", mainFile="sleepingTasks"))
+    # The workload waits on sleeps most of the time, so counting its steps doesn't change the time it takes
+    interpreter.tracer = StepCounter()
+    startTime = time.perf_counter()
+    result = asyncio.run(startAsync(interpreter))
+    seconds = time.perf_counter() - startTime
+    print(f"Sleeping tasks: result {result.serializeLLQ()}, evaluator steps: {interpreter.tracer.steps}, "
+          f"time: {seconds:.3f}s")
@@ -0,0 +1,21 @@
+"""
+Solves 6 queens with capturing continuations while writing checkpoints at different intervals, to show what
+checkpointing costs, and the size of a checkpoint of a program with many captured continuations.
+Run from the root of the repository with: python -m Benchmarks.checkpoints
+"""
+import os
+import tempfile
+
+from Benchmarks.BenchmarkRunner import runWorkload, benchmarkConfig
+
+if __name__ == '__main__':
+    checkpointPath = os.path.join(tempfile.mkdtemp(), "benchmark.checkpoint")
+    for checkpointEvery in [None, 10000, 1000]:
+        config = dict(benchmarkConfig, tailResumptiveHandlers=False, checkpointEvery=checkpointEvery,
+                      checkpointPath=checkpointPath)
+        result, steps, seconds = runWorkload("Benchmarks/Workloads", "nQueens", config)
+        size = f", last checkpoint: {os.path.getsize(checkpointPath) / 1024:.1f}kb" \
+            if os.path.isfile(checkpointPath) else ""
+        print(f"Checkpoint every {checkpointEvery} steps: evaluator steps: {steps}, time: {seconds:.3f}s{size}")
+    os.remove(checkpointPath)
+    os.rmdir(os.path.dirname(checkpointPath))
@@ -0,0 +1,12 @@
+"""
+Compares the evaluator steps needed with and without the constant folding pass.
+Run from the root of the repository with: python -m Benchmarks.constantFolding
+"""
+from Benchmarks.BenchmarkRunner import runWorkload, benchmarkConfig
+
+if __name__ == '__main__':
+    expanded = dict(benchmarkConfig, expandMacrosAheadOfTime=True)
+    optimized = dict(expanded, optimize=True)
+    for name, config in [("Demacroed", expanded), ("Optimized", optimized)]:
+        result, steps, seconds = runWorkload("Benchmarks/Workloads", "constantFolding", config)
+        print(f"{name}: result {result.serializeLLQ()}, evaluator steps: {steps}, time: {seconds:.3f}s")
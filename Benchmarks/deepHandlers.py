@@ -0,0 +1,17 @@
+"""
+Times effects that are handled by the outermost of many nested handles, against the same effects without the nesting.
+Run from the root of the repository with: python -m Benchmarks.deepHandlers
+"""
+import os
+import tempfile
+
+from Benchmarks.BenchmarkRunner import runWorkload
+
+if __name__ == '__main__':
+    source = open("Benchmarks/Workloads/deepHandlers.lisp", encoding="utf8").read()
+    for depth in [0, 50]:
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "deepHandlers.lisp"), "w", encoding="utf8") as file:
+                file.write(source.replace("let depth 50", "let depth " + str(depth)))
+            result, steps, seconds = runWorkload(folder, "deepHandlers")
+        print(f"Depth {depth}: result {result.serializeLLQ()}, evaluator steps: {steps}, time: {seconds:.3f}s")
@@ -0,0 +1,39 @@
+"""
+Counts how many stack frames and scopes the evaluator allocates per evaluator step.
+Run from the root of the repository with: python -m Benchmarks.frameAllocations
+"""
+from LispLangInterpreter.DataStructures.Classes import StackFrame, Scope
+from LispLangInterpreter.Evaluator import EvaluatorCode
+from Benchmarks.BenchmarkRunner import runWorkload
+
+counts = {"steps": 0, StackFrame: 0, Scope: 0}
+
+
+def countAllocations(cls):
+    # Counted on __new__, as copies can be made without calling the constructor
+    def countingNew(subclass, *args, **kwargs):
+        counts[cls] += 1
+        return object.__new__(subclass)
+    cls.__new__ = countingNew
+
+
+def countSteps():
+    originalStep = EvaluatorCode.non_looping_eval
+
+    def countingStep(currentFrame, *args):
+        counts["steps"] += 1
+        return originalStep(currentFrame, *args)
+    EvaluatorCode.non_looping_eval = countingStep
+
+
+if __name__ == '__main__':
+    countAllocations(StackFrame)
+    countAllocations(Scope)
+    countSteps()
+    result, _, seconds = runWorkload("Benchmarks/Workloads", "frameTransitions")
+    steps = counts["steps"]
+    print(f"Result: {result.serializeLLQ()}")
+    print(f"Evaluator steps: {steps}, time: {seconds:.3f}s")
+    print(f"StackFrame allocations: {counts[StackFrame]} ({counts[StackFrame] / steps:.2f} per step)")
+    print(f"Scope allocations: {counts[Scope]} ({counts[Scope] / steps:.2f} per step)")
+    print(f"Total allocations per step: {(counts[StackFrame] + counts[Scope]) / steps:.2f}")
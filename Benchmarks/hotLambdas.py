@@ -0,0 +1,11 @@
+"""
+Compares the evaluator steps needed with and without specializing hot lambdas.
+Run from the root of the repository with: python -m Benchmarks.hotLambdas
+"""
+from Benchmarks.BenchmarkRunner import runWorkload, benchmarkConfig
+
+if __name__ == '__main__':
+    specializing = dict(benchmarkConfig, specializeHotLambdas=True)
+    for name, config in [("Generic", benchmarkConfig), ("Specialized", specializing)]:
+        result, steps, seconds = runWorkload("Benchmarks/Workloads", "hotLambdas", config)
+        print(f"{name}: result {result.serializeLLQ()}, evaluator steps: {steps}, time: {seconds:.3f}s")
@@ -0,0 +1,43 @@
+"""
+Times building list literals with many computed elements, to show the time per element stays the same as lists grow.
+Parsing the workload is not linear in its size, so the time spent parsing is left out.
+Run from the root of the repository with: python -m Benchmarks.listConstruction
+"""
+import os
+import tempfile
+import time
+
+from LispLangInterpreter.ImportHandlerSystem import AOTCompiler
+from Benchmarks.BenchmarkRunner import runWorkload
+
+parsing = {"seconds": 0.0}
+
+
+def timeParsing():
+    originalParse = AOTCompiler.parseSource
+
+    def timedParse(*args):
+        startTime = time.perf_counter()
+        result = originalParse(*args)
+        parsing["seconds"] += time.perf_counter() - startTime
+        return result
+    AOTCompiler.parseSource = timedParse
+
+
+def writeWorkload(folder, size):
+    elements = " ".join(["[sum " + str(x) + " 1]" for x in range(size)])
+    with open(os.path.join(folder, "listConstruction.lisp"), "w", encoding="utf8") as file:
+        file.write('__import [list ["StandardLibrary" "sum"]] [quote sum]\n')
+        file.write("list [" + elements + "]\n")
+
+
+if __name__ == '__main__':
+    timeParsing()
+    for size in [250, 500, 1000, 2000, 4000]:
+        parsing["seconds"] = 0.0
+        with tempfile.TemporaryDirectory() as folder:
+            writeWorkload(folder, size)
+            result, steps, seconds = runWorkload(folder, "listConstruction")
+        seconds -= parsing["seconds"]
+        print(f"{size} elements: evaluator steps: {steps}, time without parsing: {seconds:.3f}s, "
+              f"per element: {seconds / size * 1000:.3f}ms")
@@ -0,0 +1,11 @@
+"""
+Solves 6 queens with a choice effect, whose handler resumes the continuation once for every column.
+Run from the root of the repository with: python -m Benchmarks.nQueens
+"""
+from Benchmarks.BenchmarkRunner import runWorkload, benchmarkConfig
+
+if __name__ == '__main__':
+    capturing = dict(benchmarkConfig, tailResumptiveHandlers=False)
+    for name, config in [("Capturing continuations", capturing), ("Tail resumptive", benchmarkConfig)]:
+        result, steps, seconds = runWorkload("Benchmarks/Workloads", "nQueens", config)
+        print(f"{name}: {len(result.value[0].value)} solutions, evaluator steps: {steps}, time: {seconds:.3f}s")
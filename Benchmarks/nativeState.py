@@ -0,0 +1,10 @@
+"""
+Compares a loop that keeps its state with a user handler against the same loop using the native state effect.
+Run from the root of the repository with: python -m Benchmarks.nativeState
+"""
+from Benchmarks.BenchmarkRunner import runWorkload
+
+if __name__ == '__main__':
+    for name, workload in [("User handler", "handledState"), ("Native state", "nativeState")]:
+        result, steps, seconds = runWorkload("Benchmarks/Workloads", workload)
+        print(f"{name}: result {result.serializeLLQ()}, evaluator steps: {steps}, time: {seconds:.3f}s")
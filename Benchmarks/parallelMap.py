@@ -0,0 +1,11 @@
+"""
+Compares mapping an expensive function over a list with a recursive map in lisp against pmap, which runs the
+function on worker processes. The workers are started for every pmap, which is included in the time.
+Run from the root of the repository with: python -m Benchmarks.parallelMap
+"""
+from Benchmarks.BenchmarkRunner import runWorkload
+
+if __name__ == '__main__':
+    for name, workload in [("Sequential map", "sequentialMap"), ("pmap", "parallelMap")]:
+        result, steps, seconds = runWorkload("Benchmarks/Workloads", workload)
+        print(f"{name}: {len(result.value)} results, evaluator steps in this process: {steps}, time: {seconds:.3f}s")
@@ -0,0 +1,14 @@
+"""
+Spawns 200 small tasks and joins them all, with different scheduler quanta, to show the cost of a task switch.
+Run from the root of the repository with: python -m Benchmarks.scheduler
+"""
+from Benchmarks.BenchmarkRunner import runWorkload, benchmarkConfig
+
+taskCount = 200
+
+if __name__ == '__main__':
+    for quantum in [1, 10, 100, 1000]:
+        config = dict(benchmarkConfig, schedulerQuantum=quantum)
+        result, steps, seconds = runWorkload("Benchmarks/Workloads", "tasks", config)
+        print(f"Quantum {quantum}: result {result.serializeLLQ()}, evaluator steps: {steps}, "
+              f"time: {seconds:.3f}s, per task: {seconds / taskCount * 1000:.2f}ms")
@@ -0,0 +1,17 @@
+"""
+Starts 20 interpreters one after the other, each running a small program that imports the standard library, with and
+without sharing loaded libraries between them, to show the startup time per interpreter.
+Run from the root of the repository with: python -m Benchmarks.sharedLibraries
+"""
+from Benchmarks.BenchmarkRunner import runWorkload, benchmarkConfig
+from LispLangInterpreter.ImportHandlerSystem.ModuleRegistry import sharedLibraries
+
+interpreterCount = 20
+
+if __name__ == '__main__':
+    for share in [False, True]:
+        sharedLibraries.clear()
+        config = dict(benchmarkConfig, shareLibraries=share)
+        times = [runWorkload("Tests/runtimeTests", "sumtest2real", config)[2] for _ in range(interpreterCount)]
+        print(f"Sharing libraries: {share}, first interpreter: {times[0] * 1000:.1f}ms, "
+              f"later interpreters: {sum(times[1:]) / (interpreterCount - 1) * 1000:.1f}ms each")
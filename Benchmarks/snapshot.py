@@ -0,0 +1,31 @@
+"""
+Starts a small program that imports the standard library, once like usual and once from a snapshot, to show the
+startup time a snapshot saves. The shared library registry is cleared before every start, like in a new process.
+Run from the root of the repository with: python -m Benchmarks.snapshot
+"""
+import os
+import tempfile
+import time
+
+from Benchmarks.BenchmarkRunner import runWorkload, benchmarkConfig
+from LispLangInterpreter.Config.Interpreter import Interpreter
+from LispLangInterpreter.Evaluator.runFile import startFromSnapshot
+from LispLangInterpreter.ImportHandlerSystem.ModuleRegistry import sharedLibraries
+
+runs = 10
+
+if __name__ == '__main__':
+    config = dict(benchmarkConfig, path="Tests/runtimeTests", mainFile="sumtest2real")
+    snapshotPath = os.path.join(tempfile.mkdtemp(), "benchmark.snapshot")
+    startFromSnapshot(snapshotPath, Interpreter(dict(config)))
+    usual, fromSnapshot = 0, 0
+    for _ in range(runs):
+        sharedLibraries.clear()
+        usual += runWorkload("Tests/runtimeTests", "sumtest2real", config)[2]
+        sharedLibraries.clear()
+        startTime = time.perf_counter()
+        startFromSnapshot(snapshotPath, Interpreter(dict(config)))
+        fromSnapshot += time.perf_counter() - startTime
+    os.remove(snapshotPath)
+    os.rmdir(os.path.dirname(snapshotPath))
+    print(f"Usual start: {usual / runs * 1000:.1f}ms, from snapshot: {fromSnapshot / runs * 1000:.1f}ms")
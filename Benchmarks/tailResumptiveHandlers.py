@@ -0,0 +1,12 @@
+"""
+Compares a loop that keeps its state with a user handler, with handlers that capture a continuation and with handlers
+that run as plain calls.
+Run from the root of the repository with: python -m Benchmarks.tailResumptiveHandlers
+"""
+from Benchmarks.BenchmarkRunner import runWorkload, benchmarkConfig
+
+if __name__ == '__main__':
+    capturing = dict(benchmarkConfig, tailResumptiveHandlers=False)
+    for name, config in [("Capturing continuations", capturing), ("Tail resumptive", benchmarkConfig)]:
+        result, steps, seconds = runWorkload("Benchmarks/Workloads", "handledState", config)
+        print(f"{name}: result {result.serializeLLQ()}, evaluator steps: {steps}, time: {seconds:.3f}s")
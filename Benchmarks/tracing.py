@@ -0,0 +1,28 @@
+"""
+Solves 6 queens without a tracer, with a step counter, and with a tracer that only listens to effects, to show that
+untraced runs don't pay for tracing and what a tracer costs when it is installed.
+Run from the root of the repository with: python -m Benchmarks.tracing
+"""
+import time
+
+from Benchmarks.BenchmarkRunner import benchmarkConfig
+from LispLangInterpreter.Config.Interpreter import Interpreter
+from LispLangInterpreter.Evaluator.Tracing import Tracer, StepCounter
+from LispLangInterpreter.Evaluator.runFile import start
+
+
+class EffectCounter(Tracer):
+    def __init__(self):
+        self.effects = 0
+
+    def onEffect(self, frame, name, arguments):
+        self.effects += 1
+
+
+if __name__ == '__main__':
+    for name, tracer in [("No tracer", None), ("Step counter", StepCounter()), ("Effect counter", EffectCounter())]:
+        interpreter = Interpreter(dict(benchmarkConfig, path="Benchmarks/Workloads", mainFile="nQueens"))
+        interpreter.tracer = tracer
+        startTime = time.perf_counter()
+        start(interpreter)
+        print(f"{name}: time: {time.perf_counter() - startTime:.3f}s")
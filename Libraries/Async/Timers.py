@@ -0,0 +1,14 @@
+import asyncio
+
+from LispLangInterpreter.DataStructures.Classes import *
+from LispLangInterpreter.Evaluator.SupportFunctions import MustBeKind
+
+# Async effects, the task performing them waits without blocking the other tasks of the async driver.
+
+
+async def sleepInternal(seconds, callingFrame: StackFrame):
+    MustBeKind(callingFrame, seconds, "Can only sleep for a number of seconds", Kind.Number)
+    await asyncio.sleep(seconds.value)
+    return Unit()
+
+sleepEndpoint = AsyncSystemFunction(sleepInternal, 1)
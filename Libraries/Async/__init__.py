@@ -0,0 +1 @@
+from .Timers import sleepEndpoint
@@ -1,2 +1,3 @@
 from lib1 import head, tail, concat, equals, sum, continue_, stop_,\
     isString, printFunction, handlerInvocationDefinition, genSym
+from parallelMap import pmap
@@ -2,6 +2,7 @@ import string
 import uuid
 
 import LispLangInterpreter.DataStructures.Kind
+from LispLangInterpreter.Evaluator.EvaluatorCode import ForceFully
 from LispLangInterpreter.Evaluator.SupportFunctions import MustBeKind
 from LispLangInterpreter.DataStructures.Classes import List, SystemFunction, Boolean, StackFrame, Number, ContinueStop, \
     UnfinishedHandlerInvocation, Unit, QuotedName
@@ -11,7 +12,7 @@ from LispLangInterpreter.DataStructures.Kind import Kind
 def headf(somelist: List, callingFrame: StackFrame):
     MustBeKind(callingFrame, somelist, "Head can only operate on lists", Kind.List)
     return somelist.value[0]
-head = SystemFunction(headf, 1)
+head = SystemFunction(headf, 1, pure=True)
 
 
 def tailf(somelist: List, callingFrame: StackFrame):
@@ -19,33 +20,39 @@ def tailf(somelist: List, callingFrame: StackFrame):
     if len(somelist.value) == 0:
         raise "Cannot get tail of a zero with list"
     return List(somelist.value[1:])
-tail = SystemFunction(tailf, 1)
+tail = SystemFunction(tailf, 1, pure=True)
 
 def concatf(listA, listB, callingFrame: StackFrame):
     MustBeKind(callingFrame, listA, "concat can only operate on lists", Kind.List)
     MustBeKind(callingFrame, listB, "concat can only operate on lists", Kind.List)
     return listA.concat(listB)
-concat = SystemFunction(concatf, 2)
+concat = SystemFunction(concatf, 2, pure=True)
 
 
 def equalsf(A, B, callingFrame: StackFrame):
+    if callingFrame.interpreter.lazyEvaluation:
+        # Lists may hold arguments that are not evaluated yet
+        A = ForceFully(A)
+        B = ForceFully(B)
     return Boolean(A.equals(B))
-equals = SystemFunction(equalsf, 2)
+equals = SystemFunction(equalsf, 2, pure=True)
 
 
 def sumf(A, B, callingFrame: StackFrame):
     MustBeKind(callingFrame, A, "sum can only add numbers", Kind.Number)
     MustBeKind(callingFrame, B, "sum can only add numbers", Kind.Number)
     return Number(A.value + B.value)
-sum = SystemFunction(sumf, 2)
+sum = SystemFunction(sumf, 2, pure=True)
 
 
-def continueStop(isContinue):
-    def internal(returnValue, newState, callingFrame: StackFrame):
-        return ContinueStop(isContinue, returnValue, newState)
-    return internal
-continue_ = SystemFunction(continueStop(True), 2)
-stop_ = SystemFunction(continueStop(False), 2)
+def continuef(returnValue, newState, callingFrame: StackFrame):
+    return ContinueStop(True, returnValue, newState)
+continue_ = SystemFunction(continuef, 2)
+
+
+def stopf(returnValue, newState, callingFrame: StackFrame):
+    return ContinueStop(False, returnValue, newState)
+stop_ = SystemFunction(stopf, 2)
 
 
 def handlerInvocationDefinitionf(name, length, callingFrame: StackFrame):
@@ -0,0 +1,14 @@
+from LispLangInterpreter.DataStructures.Classes import List, SystemFunction, StackFrame
+from LispLangInterpreter.DataStructures.Kind import Kind
+from LispLangInterpreter.Evaluator.EvaluatorCode import ForceFully
+from LispLangInterpreter.Evaluator.Parallel import parallelMap
+from LispLangInterpreter.Evaluator.SupportFunctions import MustBeKind
+
+
+def pmapf(function, somelist: List, callingFrame: StackFrame):
+    MustBeKind(callingFrame, function, "pmap can only map a function", Kind.Lambda)
+    if callingFrame.interpreter.lazyEvaluation:
+        somelist = ForceFully(somelist)
+    MustBeKind(callingFrame, somelist, "pmap can only map over lists", Kind.List)
+    return parallelMap(callingFrame, function, somelist)
+pmap = SystemFunction(pmapf, 2)
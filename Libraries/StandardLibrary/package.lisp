@@ -1,19 +1,37 @@
 __import [list ["PythonFuncs" "head"]] [quote head]
 __import [list ["PythonFuncs" "tail"]] [quote tail]
 __import [list ["PythonFuncs" "concat"]] [quote concat]
-//__import PythonFuncs.equals
+__import [list ["PythonFuncs" "equals"]] [quote equals]
 __import [list ["PythonFuncs" "sum"]] [quote sum]
 __import [list ["PythonFuncs" "continue_"]] [quote continue]
-//__import PythonFuncs.stop_
+__import [list ["PythonFuncs" "stop_"]] [quote stop]
+__import [list ["PythonFuncs" "pmap"]] [quote pmap]
 //__import PythonFuncs.isString
 //__import PythonFuncs.printFunction
 __import [list ["PythonFuncs" "handlerInvocationDefinition"]] [quote handlerInvocationDefinition]
 //__import PythonFuncs.genSym
+let ref [handlerInvocationDefinition [quote ref] 1]
+let get [handlerInvocationDefinition [quote get] 1]
+let set [handlerInvocationDefinition [quote set] 2]
+let spawn [handlerInvocationDefinition [quote spawn] 1]
+let join [handlerInvocationDefinition [quote join] 1]
+let yield [handlerInvocationDefinition [quote yield] 1]
+let sleep [handlerInvocationDefinition [quote sleep] 1]
 list [ 
     [list ["head" head]] 
     [list ["tail" tail]] 
     [list ["concat" concat]]  
     [list ["sum" sum]]  
+    [list ["equals" equals]]
     [list ["handlerInvocationDefinition" handlerInvocationDefinition]] 
     [list ["continue" continue]] 
+    [list ["stop" stop]]
+    [list ["pmap" pmap]]
+    [list ["ref" ref]]
+    [list ["get" get]]
+    [list ["set" set]]
+    [list ["spawn" spawn]]
+    [list ["join" join]]
+    [list ["yield" yield]]
+    [list ["sleep" sleep]]
 ]
\ No newline at end of file
@@ -0,0 +1,27 @@
+from LispLangInterpreter.DataStructures.Classes import *
+from LispLangInterpreter.DataStructures.StateCell import StateCell
+from LispLangInterpreter.Evaluator.SupportFunctions import MustBeKind
+
+# Natively handled state effect. The handlers run as system functions, so an invocation returns its value straight to
+# the caller, without capturing a continuation like a user handler does.
+
+
+def refInternal(initialValue, callingFrame: StackFrame):
+    return Cell(StateCell(initialValue))
+
+refEndpoint = SystemFunction(refInternal, 1)
+
+
+def getInternal(cell, callingFrame: StackFrame):
+    MustBeKind(callingFrame, cell, "Can only get the value of a cell made with ref", Kind.Cell)
+    return cell.value.value
+
+getEndpoint = SystemFunction(getInternal, 1)
+
+
+def setInternal(cell, newValue, callingFrame: StackFrame):
+    MustBeKind(callingFrame, cell, "Can only set the value of a cell made with ref", Kind.Cell)
+    cell.value.value = newValue
+    return Unit()
+
+setEndpoint = SystemFunction(setInternal, 2)
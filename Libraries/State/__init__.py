@@ -0,0 +1 @@
+from .NativeState import refEndpoint, getEndpoint, setEndpoint
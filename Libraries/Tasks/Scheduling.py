@@ -0,0 +1,44 @@
+from LispLangInterpreter.DataStructures.Classes import *
+from LispLangInterpreter.Evaluator.SupportFunctions import MustBeKind
+
+# Effects to spawn, wait on and switch between tasks, handled by the scheduler that runs the current module.
+
+
+def runningScheduler(callingFrame: StackFrame):
+    scheduler = callingFrame.interpreter.scheduler
+    if scheduler is None:
+        callingFrame.throwError("Tasks can only be used when a scheduler runs, set schedulerQuantum in the config or run with startAsync.")
+    return scheduler
+
+
+def spawnInternal(function, callingFrame: StackFrame):
+    MustBeKind(callingFrame, function, "Can only spawn a function, which is called with unit", Kind.Lambda)
+    scheduler = runningScheduler(callingFrame)
+    # Tasks start with the handlers from outside the program, the handles of the spawning task belong to its frames
+    interpreter = callingFrame.interpreter
+    root = StackFrame(None, callingFrame.currentScope.currentFile, interpreter)\
+        .withHandlerFrame(interpreter.RuntimeHandlerFrame)
+    applied = function.bind(Unit(), callingFrame)
+    return TaskHandle(scheduler.spawn(applied.createEvaluationFrame(root, tailCall=True)))
+
+spawnEndpoint = SystemFunction(spawnInternal, 1)
+
+
+def joinInternal(handle, callingFrame: StackFrame):
+    MustBeKind(callingFrame, handle, "Can only join a task made with spawn", Kind.Task)
+    task = handle.value
+    if task.finished:
+        return task.result
+    runningScheduler(callingFrame).join(callingFrame, task)
+    return TaskReturnValue(task)
+
+joinEndpoint = SystemFunction(joinInternal, 1)
+
+
+def yieldInternal(_, callingFrame: StackFrame):
+    scheduler = callingFrame.interpreter.scheduler
+    if scheduler is not None:
+        scheduler.current.yielded = True
+    return Unit()
+
+yieldEndpoint = SystemFunction(yieldInternal, 1)
@@ -0,0 +1 @@
+from .Scheduling import spawnEndpoint, joinEndpoint, yieldEndpoint
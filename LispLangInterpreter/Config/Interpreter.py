@@ -0,0 +1,43 @@
+import importlib
+
+
+class Interpreter:
+    """
+    Everything one interpreter owns: its config, the libraries and python modules it loaded, and the flags derived
+    from the config. Frames refer to the interpreter they run in, so several interpreters can run in one process,
+    each in its own thread.
+    """
+
+    def __init__(self, runtimeConfig=None):
+        self.runtimeConfig = runtimeConfig
+        """The config, loaded from config.json when it is None"""
+        self.currentFileSystem = None
+
+        self.MacroHandlerFrame = None
+        self.RuntimeHandlerFrame = None
+        self.modules = {}
+        """Python modules imported for the system handlers, by module path"""
+        self.loadingLibraries = []
+        """For each library being loaded, innermost last, the source hashes of the files it imported so far"""
+
+        self.lazyEvaluation = False
+        """Whether arguments of user lambdas are evaluated lazily, set from the evaluationStrategy in the config"""
+        self.tailResumptiveHandlers = True
+        """Whether user handlers run as plain calls below the code that invoked them, instead of capturing it as a
+        continuation, set from the config"""
+
+        self.evaluationDepth = 0
+        """How many evaluations are running, evaluations of libraries and macros run nested in the main one"""
+        self.scheduler = None
+        """The scheduler running the current module, if tasks are scheduled"""
+
+        self.tracer = None
+        """Tracer told about every step of the evaluations of this interpreter, see Evaluator.Tracing"""
+
+    def __getstate__(self):
+        # Python modules can't be pickled, they are imported again by their module path
+        return dict(self.__dict__, modules=list(self.modules.keys()), scheduler=None, loadingLibraries=[],
+                    evaluationDepth=0, tracer=None)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, modules={path: importlib.import_module(path) for path in state["modules"]})
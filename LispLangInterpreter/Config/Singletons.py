@@ -1,11 +1,7 @@
-runtimeConfig = None
-currentFileSystem = None
+from .Interpreter import Interpreter
 
-MacroHandlerFrame = None
-RuntimeHandlerFrame = None
-
-debug = False
-debugCounter = 0
+interpreter = Interpreter()
+"""Default interpreter, used when running a file without giving an interpreter"""
 
 consolePrint = False
 textPrint = False
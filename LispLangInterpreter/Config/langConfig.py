@@ -13,6 +13,13 @@ def c(keyword, length):
 
 extension = "lisp"
 lispPackageFile = "package"
+compiledCacheFolder = "__lispcache__"
+macroExpansionCacheLimit = 4096
+"""Maximum amount of cached expansions per pure macro"""
+hotLambdaThreshold = 50
+"""Amount of invocations after which a lambda is specialized, when hot lambdas are specialized"""
+maxDeoptimizations = 3
+"""Amount of times a specialized lambda may fall back to its generic body before it is no longer specialized"""
 
 currentScopeKeyword = "currentScope"
 continueKeyword = "continue"
@@ -30,6 +37,7 @@ class SpecialForms(Enum):
                             # so that you can call macro expand on specific code with outside scope, and macro expand
                             # on specific code with the internal macro scope, to aid in writing more hygenic macros
     macro = c("macro", 5)   #macro macroname callingScope input body
+    pureMacro = c("puremacro", 5)   #puremacro macroname callingScope input body, expansions only depend on the input
     let = c("let", 3) #let varname value
     quote = c("quote", 2) #quote value
     list = c("list", 2) #list (a b c)
@@ -39,3 +47,7 @@ class SpecialForms(Enum):
     handle = c("handle", 4) #handle effectfullCode '[[handlername @handler1] [handlername2 @handler2] etc]] stateSeed
     import__ = c("__import", 3) #__import [path elements in order] asName
 
+
+specialFormKeywords = frozenset([e.value.keyword for e in SpecialForms])
+"""Keywords of all special forms, including the ones registered by embedders of the interpreter"""
+
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import importlib.util
+import inspect
+import os
+import sys
 from copy import copy as makeCopy
-import functools
 from enum import Enum
 from typing import TYPE_CHECKING
 
@@ -12,18 +15,18 @@ from LispLangInterpreter.DataStructures.ClassesSupportFunctions import checkRese
 from .IErrorThrowable import IErrorThrowable
 from .Kind import Kind
 from ..Config import langConfig
-from .HandlerStateRegistry import HandlerStateSingleton
+from .StateCell import StateCell
 from .SupportFunctions import isIndirectionValue, isSpecialFormKeyword
 if TYPE_CHECKING:
+    from ..Config.Interpreter import Interpreter
     from ..ImportHandlerSystem.LibraryClasses import Searchable
 
 
 #Put this here because of circular imports, python is shit
-def dereference(currentFrame: StackFrame) -> Value:
-    """Retrieves the real value, resolving any indirection"""
-    if not isIndirectionValue(currentFrame.executionState):
+def dereference(currentFrame: StackFrame, item: Value) -> Value:
+    """Retrieves the real value of an item in the given frame, resolving any indirection"""
+    if not isIndirectionValue(item):
         currentFrame.throwError("Cannot dereference this value, its not an indirected value.")
-    item = currentFrame.executionState
     if item.kind == Kind.Reference:
         if currentFrame.hasScopedRegularValue(item.value):
             return [currentFrame.retrieveScopedRegularValue(item.value)]
@@ -40,14 +43,25 @@ def dereference(currentFrame: StackFrame) -> Value:
         childreturn = currentFrame.getChildReturnValue()
         if childreturn.kind != Kind.List:
             raise Exception("Macros must always return a list! Returned a " + childreturn.kind + " instead.")
+        if item.expansionCache is not None and len(item.expansionCache) < langConfig.macroExpansionCacheLimit:
+            item.expansionCache[expansionCacheKey(item.inputItems)] = (item.inputItems, childreturn.value)
         return childreturn.value
+    if item.kind == Kind.Thunk:
+        #an unforced thunk stays lazy, it is only forced when subevaluated
+        return [item if item.forced is None else item.forced]
+    if item.kind == Kind.TaskReturnValue:
+        if not item.value.finished:
+            currentFrame.throwError("Tried to use the result of a task that isn't finished. Engine error.")
+        return [item.value.result]
+    if item.kind == Kind.ThunkReturnValue:
+        childReturnValue = currentFrame.getChildReturnValue()
+        item.thunk.forced = childReturnValue
+        return [childReturnValue]
     if item.kind == Kind.HandleReturnValue:
-        stateValue = HandlerStateSingleton.retrieveState(item.handlerID)
         childReturnValue = currentFrame.getChildReturnValue()
         if childReturnValue is None:
             raise NotImplementedError("Return unit or none")
-        returnValue = List([childReturnValue, stateValue])
-        HandlerStateSingleton.unregisterHandlerFrame(item.handlerID)
+        returnValue = List([childReturnValue, item.stateCell.value])
         return [returnValue]
     #All other cases, return value as is (with extra list wrap to fascilitate macro unboxing).
     return [item]
@@ -64,6 +78,10 @@ class Value:
     def serializeLLQ(self):
         raise Exception("Cannot serialise a " + self.kind.name)
 
+    def serializePython(self):
+        """Serializes the value as a python expression that rebuilds it, used to cache compiled code"""
+        raise NotSerializableError("Cannot compile a " + self.kind.name + " to python")
+
     def errorDumpSerialize(self):
         if self.dereferencedName == "":
             return self.serializeLLQ()
@@ -108,6 +126,9 @@ class List(Value):
     def errorDumpSerialize(self):
         return self.__abstractSerialize__(lambda x: x.errorDumpSerialize())
 
+    def serializePython(self):
+        return "List([" + ", ".join([x.serializePython() for x in self.value]) + "])"
+
     def isSerializable(self):
         for i in self.value:
             if not i.isSerializable():
@@ -139,6 +160,9 @@ class QuotedName(Value):
     def serializeLLQ(self):
         return self.value
 
+    def serializePython(self):
+        return "QuotedName(" + repr(self.value) + ")"
+
     def isSerializable(self):
         return True
 
@@ -155,6 +179,9 @@ class Char(Value):
     def serializeLLQ(self):
         return 'c"' + escape_string(self.value) + '"'
 
+    def serializePython(self):
+        return "Char(" + repr(self.value) + ")"
+
     def isSerializable(self):
         return True
 
@@ -164,6 +191,21 @@ class Char(Value):
         return self.value == other.value
 
 
+class Cell(Value):
+    """State cell of the native state effect, cells are equal only to themselves"""
+    def __init__(self, stateCell: StateCell):
+        super().__init__(stateCell, Kind.Cell)
+
+    def errorDumpSerialize(self):
+        i = f"Cell<{self.value.value.errorDumpSerialize()}>"
+        if self.dereferencedName == "":
+            return i
+        return i + "<" + self.dereferencedName + ">"
+
+    def equals(self, other):
+        return other.kind == Kind.Cell and self.value is other.value
+
+
 class ContinueStop(Value):
     def __init__(self, isContinue: bool, returnValue: Value, newState: Value):
         super().__init__(None, Kind.ContinueStop)
@@ -206,6 +248,9 @@ class Boolean(Value):
             return "true"
         return "false"
 
+    def serializePython(self):
+        return "Boolean(" + repr(self.value) + ")"
+
     def isSerializable(self):
         return True
 
@@ -226,6 +271,9 @@ class Number(Value):
     def serializeLLQ(self):
         return str(self.value)
 
+    def serializePython(self):
+        return "Number(" + repr(self.value) + ")"
+
     def isSerializable(self):
         return True
 
@@ -242,6 +290,9 @@ class Unit(Value):
     def serializeLLQ(self):
         return langConfig.unitKeyword
 
+    def serializePython(self):
+        return "Unit()"
+
     def isSerializable(self):
         return True
 
@@ -253,10 +304,81 @@ class Unit(Value):
 #Interpreter code classes
 
 class sExpression(Value):
-    """A piece of lisp code being evaluated"""
+    """
+    A piece of lisp code being evaluated.
+    Stored as a list of code that is never changed, the index of the first item of it that is still in the expression,
+    and a short prefix list of items that come before it, such as evaluated arguments. Stepping past items or
+    replacing the first few items only creates a new view on the same code, so it doesn't copy the list.
+    """
+
+    prefixLimit = 16
+    """Maximum length of the prefix, longer prefixes are merged with the code into a new list."""
 
-    def __init__(self, value: list):
+    lambdaProfile = None
+    """LambdaProfile of the lambdas whose body this is, set on the body the first time its lambda special form is
+    evaluated if hot lambdas are specialized"""
+
+    def __init__(self, value: list, start=0, prefix=None):
         super().__init__(value, Kind.sExpression)
+        self.start = start
+        self.prefix = [] if prefix is None else prefix
+
+    @property
+    def value(self) -> list:
+        """All items in the expression. Creates a new list if the expression is a view on other code."""
+        if self.start == 0 and len(self.prefix) == 0:
+            return self.code
+        return self.prefix + self.code[self.start:]
+
+    @value.setter
+    def value(self, value: list):
+        self.code = value
+        self.start = 0
+        self.prefix = []
+
+    def length(self) -> int:
+        return len(self.prefix) + len(self.code) - self.start
+
+    def item(self, index) -> Value:
+        prefixLength = len(self.prefix)
+        if index < prefixLength:
+            return self.prefix[index]
+        return self.code[self.start + index - prefixLength]
+
+    def take(self, count) -> list:
+        """Returns a list of the first count items"""
+        prefixLength = len(self.prefix)
+        if count <= prefixLength:
+            return self.prefix[:count]
+        return self.prefix + self.code[self.start:self.start + count - prefixLength]
+
+    def drop(self, count) -> sExpression:
+        """Returns the expression without its first count items"""
+        prefixLength = len(self.prefix)
+        if count <= prefixLength:
+            return sExpression(self.code, self.start, self.prefix[count:])
+        return sExpression(self.code, self.start + count - prefixLength)
+
+    def prepend(self, items: list) -> sExpression:
+        return self.__withPrefix__(self.start, items + self.prefix)
+
+    def replace(self, index, items: list) -> sExpression:
+        """Returns the expression with the item at the index replaced by the given items"""
+        prefixLength = len(self.prefix)
+        if index < prefixLength:
+            return self.__withPrefix__(self.start, self.prefix[:index] + items + self.prefix[index + 1:])
+        skipped = index - prefixLength
+        return self.__withPrefix__(self.start + skipped + 1,
+                                   self.prefix + self.code[self.start:self.start + skipped] + items)
+
+    def replaceFront(self, count, items: list) -> sExpression:
+        """Returns the expression with the first count items replaced by the given items"""
+        return self.drop(count).prepend(items)
+
+    def __withPrefix__(self, start, prefix: list) -> sExpression:
+        if len(prefix) > sExpression.prefixLimit:
+            return sExpression(prefix + self.code[start:])
+        return sExpression(self.code, start, prefix)
 
     def equals(self, other):
         # S expressions (which are different from lists) cannot be treated as data
@@ -265,6 +387,9 @@ class sExpression(Value):
     def errorDumpSerialize(self):
         return "( " + " ".join([x.errorDumpSerialize() for x in self.value]) + " )"
 
+    def serializePython(self):
+        return "sExpression([" + ", ".join([x.serializePython() for x in self.value]) + "])"
+
 
 class Reference(Value):
     """Represents a named reference that needs to be evaluated"""
@@ -279,6 +404,9 @@ class Reference(Value):
     def errorDumpSerialize(self):
         return "*" + self.value
 
+    def serializePython(self):
+        return "Reference(" + repr(self.value) + ")"
+
 class MacroReference(Value):
     """Represents a named reference that needs to be evaluated"""
 
@@ -307,6 +435,14 @@ class Lambda(Value):
         super().__init__(None, Kind.Lambda)
 
     def bind(self, argument, callingFrame: StackFrame) -> Lambda:
+        return self.bindMany([argument], callingFrame)
+
+    def bindMany(self, arguments: list, callingFrame: StackFrame) -> Lambda:
+        """Binds the next arguments all at once"""
+        raise NotImplementedError("Abstract class")
+
+    def argumentsNeeded(self) -> int:
+        """Amount of arguments that still need to be bound before the lambda can run"""
         raise NotImplementedError("Abstract class")
 
     def equals(self, other):
@@ -316,14 +452,20 @@ class Lambda(Value):
     def canRun(self) -> bool:
         raise NotImplementedError("Abstract class")
 
-    def createEvaluationFrame(self, callingFrame) -> StackFrame:
+    def createEvaluationFrame(self, callingFrame, tailCall=False) -> StackFrame:
+        """
+        Returns the frame in which the lambda runs
+        :param callingFrame: Frame the lambda is called from
+        :param tailCall: Whether the call is the last item in the calling frame, in which case the lambda may run in
+        the calling frame itself instead of in a child of it
+        """
         raise NotImplementedError("Abstract class")
 
 
 class UserLambda(Lambda):
     """In memory representation of a function"""
 
-    def __init__(self, bindings, body, boundScope: Scope, bindIndex=0, dereferencedName = ""):
+    def __init__(self, bindings, body, boundScope: Scope, bindIndex=0, dereferencedName = "", profile=None):
         super().__init__()
         self.bindingNames = bindings  # function arguments
         self.body = body  # the code to execute
@@ -331,29 +473,60 @@ class UserLambda(Lambda):
         self.boundScope = boundScope
         self.bindIndex = bindIndex  # index of the arg that will bind next
         self.dereferencedName = dereferencedName
+        self.expansionCache = None
+        """For pure macros, maps the input ast of an expansion to the ast it expanded to. None for other lambdas."""
+        self.mayPerformEffects = None
+        """Whether calling it may perform effects, worked out the first time lazy evaluation needs to know"""
+        self.profile = profile
+        """LambdaProfile shared with the other lambdas created by the same lambda special form, if hot lambdas are
+        specialized and the body is an s expression"""
 
     def __bindIsFinished__(self):
         return self.bindIndex >= len(self.bindingNames)
 
-    def bind(self, valueToBind, callingFrame: StackFrame) -> UserLambda:
+    def argumentsNeeded(self) -> int:
+        return len(self.bindingNames) - self.bindIndex
+
+    def bindMany(self, arguments: list, callingFrame: StackFrame) -> UserLambda:
         if self.__bindIsFinished__():
             callingFrame.throwError("Tried to bind fully bound lambda. Engine error.")
-        bound = self.boundScope.addScopedRegularValue(callingFrame, self.bindingNames[self.bindIndex], valueToBind)
-        return UserLambda(self.bindingNames, self.body, bound, bindIndex=self.bindIndex + 1, dereferencedName=self.dereferencedName)
+        newIndex = self.bindIndex + len(arguments)
+        if newIndex > len(self.bindingNames):
+            callingFrame.throwError("Tried to bind more arguments than the lambda has. Engine error.")
+        bound = self.boundScope.addScopedRegularValues(
+            callingFrame, zip(self.bindingNames[self.bindIndex:newIndex], arguments))
+        return UserLambda(self.bindingNames, self.body, bound, bindIndex=newIndex, dereferencedName=self.dereferencedName,
+                          profile=self.profile)
 
     def canRun(self) -> bool:
         return self.__bindIsFinished__()
 
-    def createEvaluationFrame(self, callingFrame) -> StackFrame:
+    def createEvaluationFrame(self, callingFrame, tailCall=False) -> StackFrame:
         if not self.canRun():
             callingFrame.throwError("Tried to run a lambda that still needs arguments bound. Engine error.")
-        newFrame = callingFrame.createChild(self.body)
+        body = self.body if self.profile is None else self.profile.bodyFor(self)
+        if tailCall:
+            newFrame = callingFrame.withExecutionState(body)
+        else:
+            newFrame = callingFrame.createChild(body)
         newFrame.currentScope = self.boundScope
         return newFrame
 
     def equals(self, other):
         return super(UserLambda, self).equals(other)
 
+    def __copy__(self):
+        # Copied field by field, so that copies made when it is retrieved from a scope share the expansion cache
+        copy = type(self).__new__(type(self))
+        copy.__dict__.update(self.__dict__)
+        return copy
+
+    def __getstate__(self):
+        # Expansions are cached by the ids of the input items, which don't survive pickling
+        if self.expansionCache is None:
+            return self.__dict__
+        return dict(self.__dict__, expansionCache={})
+
     def errorDumpSerialize(self):
         i = "UserLambda"
         if self.dereferencedName == "":
@@ -364,11 +537,16 @@ class UserLambda(Lambda):
 class SystemFunction(Lambda):
     """In memory representation of a system function"""
 
-    def __init__(self, function, bindingsLeft, dereferencedName = ""):
+    def __init__(self, function, bindingsLeft, dereferencedName = "", boundArguments=(), pure=False):
         super().__init__()
         self.function = function
+        """Python function, called with the bound arguments followed by the calling frame"""
         self.bindingsLeft = bindingsLeft
         self.dereferencedName = dereferencedName
+        self.boundArguments = boundArguments
+        self.pure = pure
+        """Whether the function has no effects and its result only depends on its arguments, so that it can be 
+        evaluated ahead of time"""
 
     def equals(self, other):
         super(SystemFunction, self).equals(other)
@@ -376,15 +554,37 @@ class SystemFunction(Lambda):
     def canRun(self) -> bool:
         return self.bindingsLeft == 0
 
-    def createEvaluationFrame(self, callingFrame: StackFrame) -> StackFrame:
+    def createEvaluationFrame(self, callingFrame: StackFrame, tailCall=False) -> StackFrame:
         if not self.canRun():
             callingFrame.throwError("Tried to run a lambda that still needs arguments bound. Engine error.")
-        return callingFrame.createChild(self.function(callingFrame))
+        result = self.function(*self.boundArguments, callingFrame)
+        if tailCall:
+            return callingFrame.withExecutionState(result)
+        return callingFrame.createChild(result)
+
+    def argumentsNeeded(self) -> int:
+        return self.bindingsLeft
 
-    def bind(self, argument, callingFrame):
+    def bindMany(self, arguments: list, callingFrame):
         if self.bindingsLeft <= 0:
             callingFrame.throwError("Tried to bind to a fully bound system function")
-        return SystemFunction(functools.partial(self.function, argument), self.bindingsLeft - 1, self.dereferencedName)
+        if len(arguments) > self.bindingsLeft:
+            callingFrame.throwError("Tried to bind more arguments than the system function has left")
+        return type(self)(self.function, self.bindingsLeft - len(arguments), self.dereferencedName,
+                          self.boundArguments + tuple(arguments), self.pure)
+
+    def __copy__(self):
+        # Copied field by field, pickling uses __reduce__ instead
+        copy = type(self).__new__(type(self))
+        copy.__dict__.update(self.__dict__)
+        return copy
+
+    def __reduce__(self):
+        # Library files are loaded from their path, not as importable modules, so the function is pickled by the path
+        # of the file that defines it
+        return systemFunctionFromPath, (type(self), os.path.abspath(inspect.getfile(self.function)),
+                                        self.function.__qualname__, self.bindingsLeft, self.dereferencedName,
+                                        self.boundArguments, self.pure)
 
     def errorDumpSerialize(self):
         i = "SystemFunction"
@@ -393,6 +593,48 @@ class SystemFunction(Lambda):
         return i + "<" + self.dereferencedName + ">"
 
 
+def systemFunctionFromPath(functionClass, path, qualifiedName, *arguments) -> SystemFunction:
+    """Unpickles a system function, loading the python file that defines it if it isn't loaded yet"""
+    module = next((x for x in list(sys.modules.values())
+                   if os.path.abspath(getattr(x, "__file__", None) or "") == path), None)
+    if module is None:
+        sys.path.append(os.path.dirname(path))
+        spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        sys.path.remove(os.path.dirname(path))
+    function = module
+    for name in qualifiedName.split("."):
+        function = getattr(function, name)
+    return functionClass(function, *arguments)
+
+
+class AsyncSystemFunction(SystemFunction):
+    """
+    System function whose python function is an async def, called with the bound arguments followed by the calling
+    frame. The task calling it waits until the returned awaitable completes, while the async driver runs other tasks.
+    """
+
+    def createEvaluationFrame(self, callingFrame: StackFrame, tailCall=False) -> StackFrame:
+        if not self.canRun():
+            callingFrame.throwError("Tried to run a lambda that still needs arguments bound. Engine error.")
+        scheduler = callingFrame.interpreter.scheduler
+        if scheduler is None:
+            callingFrame.throwError("Async effects can only be performed by the async driver, run with startAsync.")
+        task = scheduler.awaitExternal(callingFrame, self.function(*self.boundArguments, callingFrame))
+        result = TaskReturnValue(task)
+        if tailCall:
+            return callingFrame.withExecutionState(result)
+        return callingFrame.createChild(result)
+
+    def errorDumpSerialize(self):
+        i = "AsyncSystemFunction"
+        if self.dereferencedName == "":
+            return i
+        return i + "<" + self.dereferencedName + ">"
+
+
 class UnfinishedHandlerInvocation(Lambda):
     """In memory representation of an unfinished handler invocation,
     acts akin to a type definition for an effectfull function."""
@@ -403,26 +645,29 @@ class UnfinishedHandlerInvocation(Lambda):
         self.argAmount = argAmount
         """Total amount of args needed for invocation"""
         self.args = []
-        self.dereferencedName
+        self.dereferencedName = dereferencedName
+
+    def argumentsNeeded(self) -> int:
+        return int(self.argAmount) - len(self.args)
 
-    def bind(self, argument, callingFrame: StackFrame) -> UnfinishedHandlerInvocation:
-        if self.canRun():
+    def bindMany(self, arguments: list, callingFrame: StackFrame) -> UnfinishedHandlerInvocation:
+        if len(arguments) > self.argumentsNeeded():
             callingFrame.throwError(f"Too many arguments added to the unfinished handler invocation '{self.name}'")
         copy = UnfinishedHandlerInvocation(self.name, self.argAmount, self.dereferencedName)
-        copy.args.append(argument)
+        copy.args = self.args + arguments
         return copy
 
     def canRun(self) -> bool:
         realLength = len(self.args)
         return realLength >= self.argAmount
 
-    def createEvaluationFrame(self, callingFrame: StackFrame) -> StackFrame:
+    def createEvaluationFrame(self, callingFrame: StackFrame, tailCall=False) -> StackFrame:
         """Returns a new stack in which to run the function code, with the calling frame as parent"""
         if not self.canRun():
             callingFrame.throwError(f"Not enough arguments added for invocation of '{self.name}'.")
-        if not callingFrame.hasHandler(self.name):
-            callingFrame.throwError(f"Tried to handle effectfull function '{self.name}'"
-                                    f", but no handler for it was found.")
+        if tailCall:
+            # The calling frame is the continuation of the handler, so it must wait for the handled value
+            callingFrame = callingFrame.withExecutionState(StackReturnValue())
         return callingFrame.invokeHandler(self.name, self.args)
 
     def errorDumpSerialize(self):
@@ -435,16 +680,130 @@ class UnfinishedHandlerInvocation(Lambda):
         raise NotImplementedError("")
 
 
+class Continuation(Lambda):
+    """
+    The rest of the handled code from the point where a handler was invoked up to its handle, as a function of the
+    value the handler invocation returns. Calling it runs that code as a handle in the calling frame, with the handlers
+    of the calling frame around it, and returns the result of the handled code, or the value a handler stopped with.
+    It can be resumed any number of times, also after its handle returned. Its frames are frozen, and copied for every
+    resumption.
+    """
+    def __init__(self, frame: StackFrame, branchPointFrame: StackFrame, resumeValue: Value = None,
+                 dereferencedName=""):
+        super().__init__()
+        self.frame = frame
+        """Frame waiting for the value of the handler invocation"""
+        self.branchPointFrame = branchPointFrame
+        """Frame of the handle the continuation ends at"""
+        self.resumeValue = resumeValue
+        self.dereferencedName = dereferencedName
+
+    def argumentsNeeded(self) -> int:
+        return 0 if self.resumeValue is not None else 1
+
+    def bindMany(self, arguments: list, callingFrame: StackFrame) -> Continuation:
+        if len(arguments) > self.argumentsNeeded():
+            callingFrame.throwError("A continuation is resumed with a single value")
+        return Continuation(self.frame, self.branchPointFrame, arguments[0], self.dereferencedName)
+
+    def canRun(self) -> bool:
+        return self.resumeValue is not None
+
+    def createEvaluationFrame(self, callingFrame: StackFrame, tailCall=False) -> StackFrame:
+        if not self.canRun():
+            callingFrame.throwError("Tried to resume a continuation without a value. Engine error.")
+        if tailCall:
+            callingFrame = callingFrame.withExecutionState(StackReturnValue())
+        frame = ResumedHandle(self.branchPointFrame, callingFrame).frameFor(self.frame)
+        if isIndirectionValue(self.resumeValue):
+            return frame.createChild(self.resumeValue)
+        return frame.withChildReturnValue(self.resumeValue)
+
+    def errorDumpSerialize(self):
+        i = "Continuation"
+        if self.dereferencedName == "":
+            return i
+        return i + "<" + self.dereferencedName + ">"
+
+    def equals(self, other):
+        raise NotImplementedError("")
+
+
 #Stack and control flow classes
 
 
+class ResumedHandle:
+    """
+    Copies the frames of a continuation to run them in the frame that resumes it. The frames of the handle are put
+    below a new branch point frame in the resuming frame, and the handler frames of the handle and of the handles
+    inside it are copied along, with the handlers of the resuming frame in place of those from around the handle.
+    Frames outside the handle are kept as they are.
+    """
+    def __init__(self, branchPointFrame: StackFrame, callingFrame: StackFrame):
+        self.outerHandlerFrame = branchPointFrame.closestHandlerFrame
+        """Handlers from around the handle where the continuation was captured"""
+        self.callingHandlerFrame = callingFrame.closestHandlerFrame
+        newBranchPointFrame = callingFrame.createChild(HandleBranchPoint(branchPointFrame.executionState.stateCell))
+        newBranchPointFrame.freeze()
+        self.frames = {id(branchPointFrame): newBranchPointFrame}
+        """Ids of the frames of the continuation to their copies, or to themselves if they are outside the handle"""
+        self.handlerFrames = {}
+
+    def frameFor(self, frame: StackFrame | None) -> StackFrame | None:
+        path = []
+        while frame is not None and id(frame) not in self.frames:
+            path.append(frame)
+            frame = frame.parent
+        if frame is None:
+            # The frames are outside of the handle
+            for i in path:
+                self.frames[id(i)] = i
+            return path[0] if len(path) > 0 else None
+        # Copied from the handle down, so the parent and the handles around a frame are copied before it
+        for i in reversed(path):
+            copy = i.__copy__()
+            copy.parent = self.frames[id(i.parent)]
+            copy.closestHandlerFrame = self.handlerFrameFor(i.closestHandlerFrame)
+            copy.executionState = self.executionStateFor(i.executionState)
+            copy.frozen = True
+            self.frames[id(i)] = copy
+        return self.frames[id(path[0] if len(path) > 0 else frame)]
+
+    def handlerFrameFor(self, handlerFrame: HandlerFrame | None) -> HandlerFrame | None:
+        if handlerFrame is self.outerHandlerFrame:
+            return self.callingHandlerFrame
+        if not isinstance(handlerFrame, UserHandlerFrame):
+            return handlerFrame
+        if id(handlerFrame) in self.handlerFrames:
+            return self.handlerFrames[id(handlerFrame)]
+        branchPointFrame = self.frameFor(handlerFrame.branchPointFrame)
+        if branchPointFrame is handlerFrame.branchPointFrame:
+            # A handle outside of the handle of the continuation
+            return handlerFrame
+        copy = UserHandlerFrame(handlerFrame.stateCell, branchPointFrame, self.handlerFrameFor(handlerFrame.parent))
+        for name, (owner, handler) in handlerFrame.lookupTable.items():
+            if getattr(owner, "branchPointFrame", None) is handlerFrame.branchPointFrame:
+                copy = copy.__withHandler__(name, handler)
+        self.handlerFrames[id(handlerFrame)] = copy
+        return copy
+
+    def executionStateFor(self, executionState: Value) -> Value:
+        if executionState.kind == Kind.HandleBranchPoint and executionState.continueBranch is not None:
+            return HandleBranchPoint(executionState.stateCell, self.frameFor(executionState.continueBranch))
+        if executionState.kind == Kind.HandleResumePoint:
+            return HandleResumePoint(executionState.stateCell, self.frameFor(executionState.branchPointFrame))
+        return executionState
+
+
+
+
 class HandleReturnValue(Value):
-    def __init__(self, handlerID):
+    def __init__(self, stateCell: StateCell):
         super().__init__(None, Kind.HandleReturnValue)
-        self.handlerID = handlerID
+        self.stateCell = stateCell
 
     def errorDumpSerialize(self):
-        i = f"HandleReturnValue<{self.handlerID}>"
+        i = "HandleReturnValue"
         if self.dereferencedName == "":
             return i
         return i + "<" + self.dereferencedName + ">"
@@ -454,10 +813,20 @@ class HandleReturnValue(Value):
 
 
 class HandleBranchPoint(Value):
-    def __init__(self, handlerID: int, continueBranch=None):
+    def __init__(self, stateCell: StateCell, continueBranch: StackFrame = None):
         super().__init__(None, Kind.HandleBranchPoint)
+        if continueBranch is not None:
+            # The continuation can be resumed after the handler ran, so it may not be mutated in place
+            continueBranch.freeze()
         self.continueBranch = continueBranch
-        self.handlerID = handlerID
+        self.stateCell = stateCell
+
+    def returnFromHandle(self, branchPointFrame: StackFrame, value: Value) -> StackFrame:
+        """
+        Returns the result of the handled code, or the value a handler stopped with. For a resumed continuation, the
+        branch point frame is in the frame that resumed it, which gets the result.
+        """
+        return branchPointFrame.parent.withChildReturnValue(value)
 
     def errorDumpSerialize(self):
         addon = ""
@@ -478,6 +847,26 @@ class HandleBranchPoint(Value):
         raise NotImplementedError("")
 
 
+class HandleResumePoint(Value):
+    """
+    Receives the continue or stop returned by a handler that runs as a plain call. Continuing returns the value to the
+    frame that invoked the handler, stopping returns it from the handle, via the branch point frame.
+    """
+    def __init__(self, stateCell: StateCell, branchPointFrame: StackFrame):
+        super().__init__(None, Kind.HandleResumePoint)
+        self.stateCell = stateCell
+        self.branchPointFrame = branchPointFrame
+
+    def errorDumpSerialize(self):
+        i = "HandleResumePoint"
+        if self.dereferencedName == "":
+            return i
+        return i + "<" + self.dereferencedName + ">"
+
+    def equals(self, other):
+        raise NotImplementedError("")
+
+
 class VarType(Enum):
     Regular = 1
     Macro = 2
@@ -541,10 +930,20 @@ class Scope(Value):
         copy.scopedValues[name] = value
         return copy
 
+    def addScopedRegularValues(self, callingFrame: StackFrame, namedValues) -> Scope:
+        """Adds multiple name and value pairs at once"""
+        copy = self.__copy__()
+        for name, value in namedValues:
+            checkReservedKeyword(callingFrame, name)
+            copy.scopedNames[name] = VarType.Regular
+            copy.scopedValues[name] = value
+        return copy
+
     def __copy__(self) -> Scope:
+        # The copy gets its own names and values, so binding a name doesn't change the scopes captured before it
         copy = Scope(self.currentFile)
-        copy.scopedNames = self.scopedNames
-        copy.scopedValues = self.scopedValues
+        copy.scopedNames = dict(self.scopedNames)
+        copy.scopedValues = dict(self.scopedValues)
         return copy
 
     def errorDumpSerialize(self):
@@ -558,13 +957,30 @@ class Scope(Value):
 
 
 class HandlerFrame(Value):
-    def __init__(self):
+    def __init__(self, lookupTable: dict = None):
         super().__init__(None, Kind.HandlerFrame)
+        self.lookupTable = {} if lookupTable is None else lookupTable
+        """Every handled name to the handler frame and the handler that handle it, including those of the outer 
+        handler frames. Never changed in place once the frame is in use, so inner frames can start from it."""
+
+    def __withHandler__(self, name, value) -> HandlerFrame:
+        copy = self.__copy__()
+        copy.lookupTable = dict(self.lookupTable)
+        copy.lookupTable[name] = (copy, value)
+        return copy
 
     def hasHandler(self, name):
-        raise NotImplementedError("Abstract class")
+        return name in self.lookupTable
 
     def invokeHandler(self, callingFrame: StackFrame, name: str, values: list) -> StackFrame:
+        entry = self.lookupTable.get(name)
+        if entry is None:
+            callingFrame.throwError(f"Tried to handle effectfull function '{name}', but no handler for it was found.")
+        handlerFrame, handler = entry
+        return handlerFrame.runHandler(callingFrame, name, handler, values)
+
+    def runHandler(self, callingFrame: StackFrame, name: str, handler: Lambda, values: list) -> StackFrame:
+        """Runs a handler of this frame"""
         raise NotImplementedError("Abstract class")
 
     def errorDumpSerialize(self):
@@ -578,28 +994,15 @@ class HandlerFrame(Value):
 
 
 class SystemHandlerFrame(HandlerFrame):
-    def __init__(self):
-        super().__init__()
-        self.handlerFunctions = {}
-
     def addHandler(self, name, function: SystemFunction):
-        copy = self.__copy__()
-        copy.handlerFunctions[name] = function
-        return copy
-
-    def hasHandler(self, name):
-        return name in self.handlerFunctions.keys()
+        return self.__withHandler__(name, function)
 
-    def invokeHandler(self, callingFrame: StackFrame, name: str, values: list) -> StackFrame:
-        if not self.hasHandler(name):
-            callingFrame.throwError(f"Handler for function '{name}' not found.")
-        boundFunc: Lambda = self.handlerFunctions[name]
-        for i in values:
-            boundFunc = boundFunc.bind(i, callingFrame)
+    def runHandler(self, callingFrame: StackFrame, name: str, handler: Lambda, values: list) -> StackFrame:
+        boundFunc: Lambda = handler.bindMany(values, callingFrame)
         return boundFunc.createEvaluationFrame(callingFrame)
 
     def errorDumpSerialize(self):
-        i = f"SystemHandlerFrame[<]{', '.join(self.handlerFunctions.keys())}]"
+        i = f"SystemHandlerFrame[<]{', '.join(self.lookupTable.keys())}]"
         if self.dereferencedName == "":
             return i
         return i + "<" + self.dereferencedName + ">"
@@ -608,56 +1011,52 @@ class SystemHandlerFrame(HandlerFrame):
         raise NotImplementedError()
 
     def __copy__(self):
-        theCopy = SystemHandlerFrame()
-        theCopy.handlerFunctions = self.handlerFunctions.copy()
-        return theCopy
+        return SystemHandlerFrame(self.lookupTable)
 
 
 class UserHandlerFrame(HandlerFrame):
-    def __init__(self, handlerID, branchPointFrame: StackFrame):
-        super().__init__()
-        self.__handlerSet__ = {}
-        self.parent = None
-        self.handlerID = handlerID
+    def __init__(self, stateCell: StateCell, branchPointFrame: StackFrame, parent: HandlerFrame = None):
+        # Starts out with the handlers of the parent, which its own handlers are added to
+        super().__init__(None if parent is None else parent.lookupTable)
+        self.parent = parent
+        self.stateCell = stateCell
+        """State of the handle, shared by all its frames"""
+        # Every handler invocation branches off from this frame, so it may not be mutated in place
+        branchPointFrame.freeze()
         self.branchPointFrame = branchPointFrame
 
     def addHandler(self, callingFrame: StackFrame, name, value) -> HandlerFrame:
         checkReservedKeyword(callingFrame, name)
-        copy = self.__copy__()
-        copy.__handlerSet__[name] = value
-        return copy
-
-    def hasHandler(self, name):
-        if name in self.__handlerSet__.keys():
-            return True
-        if self.parent is not None:
-            return self.parent.hasHandler(name)
-        return False
-
-    def invokeHandler(self, callingFrame: StackFrame, name: str, values: list) -> StackFrame:
-        if name not in self.__handlerSet__.keys():
-            if self.parent is None:
-                callingFrame.throwError(f"Handler for '{name}' doesnt exist.")
-            return self.parent.invokeHandler(callingFrame, name, values)
-
-        handlerFunc: Lambda = self.__handlerSet__[name]
-        handlerFunc = handlerFunc.bind(
-            HandlerStateSingleton.retrieveState(self.handlerID),
-            callingFrame
-        )
-        for arg in values:
-            if handlerFunc.canRun():
-                callingFrame.throwError(f"Too many arguments exist in the handler '{name}' invocation.")
-            handlerFunc = handlerFunc.bind(arg, callingFrame)
+        return self.__withHandler__(name, value)
+
+    def runHandler(self, callingFrame: StackFrame, name: str, handlerFunc: Lambda, values: list) -> StackFrame:
+        arguments = [self.stateCell.value] + values
+        if handlerFunc.argumentsNeeded() == len(arguments) + 1:
+            # The handler takes the continuation as its last argument. It may be resumed any number of times, so the
+            # calling frames are shared from now on.
+            callingFrame.freeze()
+            arguments.append(Continuation(callingFrame, self.branchPointFrame))
+        if len(arguments) > handlerFunc.argumentsNeeded():
+            callingFrame.throwError(f"Too many arguments exist in the handler '{name}' invocation.")
+        handlerFunc = handlerFunc.bindMany(arguments, callingFrame)
 
         if not handlerFunc.canRun():
             callingFrame.throwError(f"Too few arguments for handler '{name}' invocation")
 
         branchPointFrame = self.branchPointFrame
 
+        if callingFrame.interpreter.tailResumptiveHandlers:
+            # A handler can only resume by returning continue as its result, which makes every handler tail
+            # resumptive. So it runs as a plain call below the calling frame, with the handlers from outside the handle,
+            # and the calling frame doesn't need to be captured.
+            resumeFrame = callingFrame\
+                .createChild(HandleResumePoint(self.stateCell, branchPointFrame))\
+                .withHandlerFrame(branchPointFrame.closestHandlerFrame)
+            return handlerFunc.createEvaluationFrame(resumeFrame)
+
         # The created continue value should be added like a lambda return below the calling frame, if its continued.
-        newBranchpointFrame = branchPointFrame.withExecutionState(
-            HandleBranchPoint(self.handlerID, continueBranch=callingFrame))
+        newBranchpointFrame = branchPointFrame.withExecutionState(HandleBranchPoint(
+            self.stateCell, continueBranch=callingFrame))
 
         # The handle branch point frame is used as the parent of the new branch, to make sure the returned value
         # returns to the branch value. Branch value frame doesn't have the handler set being used here.
@@ -675,8 +1074,8 @@ class UserHandlerFrame(HandlerFrame):
         raise NotImplementedError()
 
     def __copy__(self):
-        theCopy = UserHandlerFrame(self.handlerID, self.branchPointFrame)
-        theCopy.__handlerSet__ = self.__handlerSet__.copy()
+        theCopy = UserHandlerFrame(self.stateCell, self.branchPointFrame, self.parent)
+        theCopy.lookupTable = self.lookupTable
         return theCopy
 
 
@@ -693,9 +1092,135 @@ class StackReturnValue(Value):
             return i
         return i + "<" + self.dereferencedName + ">"
 
+class ListInProgress(Value):
+    """
+    Takes the place of the elements of a list special form while they are evaluated, waiting for the value of the
+    element that is evaluated in a child frame. The elements evaluated so far are kept as a chain of pairs, newest
+    first, so adding one does not copy the others, and frames that share the list (continuations) never see each others
+    elements.
+    """
+    def __init__(self, elements: list, nextIndex, evaluated: tuple | None):
+        super().__init__(elements, Kind.ListInProgress)
+        self.nextIndex = nextIndex
+        """Index of the first element that is not evaluated yet"""
+        self.evaluated = evaluated
+
+    def equals(self, other):
+        raise "Cannot call equals on a list in progress (running code), engine error"
+
+    def errorDumpSerialize(self):
+        done = []
+        evaluated = self.evaluated
+        while evaluated is not None:
+            done.append(evaluated[0].errorDumpSerialize())
+            evaluated = evaluated[1]
+        done.reverse()
+        rest = [x.errorDumpSerialize() for x in self.value[self.nextIndex:]]
+        return "[ " + " ".join(done + ["StackReturnValue"] + rest) + " ]"
+
+
+class Thunk(Value):
+    """
+    Code of an argument that is not evaluated yet, used in lazy evaluation. It is evaluated in the scope and with the
+    handlers from where it was created, the first time its value is needed, and remembers its value after that.
+    """
+    def __init__(self, code: Value, scope: Scope, handlerFrame: HandlerFrame, interpreter: Interpreter):
+        super().__init__(code, Kind.Thunk)
+        self.scope = scope
+        self.handlerFrame = handlerFrame
+        self.interpreter = interpreter
+        self.memo = StateCell(None)
+        """Holds the value of the code once it is evaluated, shared with the copies made when the thunk is retrieved
+        from a scope, so the code is evaluated only once however often its name is used"""
+
+    @property
+    def forced(self) -> Value | None:
+        """The value of the code, once it is evaluated"""
+        return self.memo.value
+
+    @forced.setter
+    def forced(self, value: Value):
+        self.memo.value = value
+
+    def createEvaluationFrame(self, callingFrame: StackFrame | None) -> StackFrame:
+        """Frame that evaluates the code, as a child of the calling frame, or on its own if it is None"""
+        if callingFrame is None:
+            frame = StackFrame(self.value, self.scope.currentFile, self.interpreter)
+        else:
+            frame = callingFrame.createChild(self.value)
+        frame.currentScope = self.scope
+        frame.closestHandlerFrame = self.handlerFrame
+        return frame
+
+    def equals(self, other):
+        if self.forced is None:
+            raise Exception("Cannot compare a value that is not evaluated yet")
+        return self.forced.equals(other)
+
+    def serializeLLQ(self):
+        if self.forced is None:
+            raise Exception("Cannot serialise a value that is not evaluated yet")
+        return self.forced.serializeLLQ()
+
+    def errorDumpSerialize(self):
+        i = "Thunk" if self.forced is None else self.forced.errorDumpSerialize()
+        if self.dereferencedName == "":
+            return i
+        return i + "<" + self.dereferencedName + ">"
+
+
+class ThunkReturnValue(Value):
+    """Placeholder for the value of a thunk that is being forced in a child frame"""
+    def __init__(self, thunk: Thunk):
+        super().__init__(None, Kind.ThunkReturnValue)
+        self.thunk = thunk
+
+    def equals(self, other):
+        raise "Cannot call equals on a stack return value (running code), engine error"
+
+    def errorDumpSerialize(self):
+        i = "ThunkReturnValue"
+        if self.dereferencedName == "":
+            return i
+        return i + "<" + self.dereferencedName + ">"
+
+
+class TaskHandle(Value):
+    """Lisp value referring to a task of the scheduler, handles are equal only to handles of the same task"""
+    def __init__(self, task):
+        super().__init__(task, Kind.Task)
+
+    def errorDumpSerialize(self):
+        i = f"Task<{self.value.taskID}>"
+        if self.dereferencedName == "":
+            return i
+        return i + "<" + self.dereferencedName + ">"
+
+    def equals(self, other):
+        return other.kind == Kind.Task and self.value is other.value
+
+
+class TaskReturnValue(Value):
+    """Placeholder for the result of a task that the frame is waiting on"""
+    def __init__(self, task):
+        super().__init__(task, Kind.TaskReturnValue)
+
+    def equals(self, other):
+        raise "Cannot call equals on a task return value (running code), engine error"
+
+    def errorDumpSerialize(self):
+        i = f"TaskReturnValue<{self.value.taskID}>"
+        if self.dereferencedName == "":
+            return i
+        return i + "<" + self.dereferencedName + ">"
+
+
 class MacroReturnValue(Value):
-    def __init__(self):
+    def __init__(self, expansionCache=None, inputItems=()):
         super().__init__(None, Kind.MacroReturnValue)
+        self.expansionCache = expansionCache
+        """Expansion cache of the macro being expanded, if it is pure, to store the expansion in once it returns"""
+        self.inputItems = inputItems
 
     def equals(self, other):
         raise "Cannot call equals on a stack return value (running code), engine error"
@@ -707,25 +1232,49 @@ class MacroReturnValue(Value):
         return i + "<" + self.dereferencedName + ">"
 
 
+def expansionCacheKey(inputItems: tuple):
+    """
+    Pure macro expansions are cached by the identity of the input items. Code is never changed in place, so running
+    the same piece of code again passes the very same items to the macro. The cache entry holds on to the items, so
+    their ids cannot be reused while the entry exists.
+    """
+    return tuple([id(x) for x in inputItems])
+
+
 def subevaluateMacro(currentFrame: StackFrame, itemIndex):
-    item = currentFrame.executionState.value[itemIndex]
+    expression = currentFrame.executionState
+    item = expression.item(itemIndex)
     #subevaluate macro with all the code from itemindex forward
     #retrieving lambda
     macroLambda = currentFrame.retrieveScopedMacroValue(item.value)
+    if macroLambda.expansionCache is not None:
+        inputItems = tuple(expression.drop(itemIndex + 1).value)
+        cached = macroLambda.expansionCache.get(expansionCacheKey(inputItems))
+        if cached is not None:
+            #splice in the earlier expansion of this code without running the macro again
+            return currentFrame.withExecutionState(sExpression(expression.take(itemIndex) + cached[1]))
+        oldFrame = currentFrame.withExecutionState(sExpression(
+            expression.take(itemIndex) + [MacroReturnValue(macroLambda.expansionCache, inputItems)]
+        ))
+        return macroLambda.bindMany([currentFrame.currentScope, List(list(inputItems))], currentFrame)\
+            .createEvaluationFrame(oldFrame)
     #binding current scope and ast available to macro to the body of the macro
-    macroLambda = macroLambda\
-        .bind(currentFrame.currentScope, currentFrame)\
-        .bind(List(currentFrame.executionState.value[itemIndex + 1:]), currentFrame)
+    macroLambda = macroLambda.bindMany([currentFrame.currentScope, List(expression.drop(itemIndex + 1).value)],
+                                       currentFrame)
     #add macro return value, then append macro lambda as child
     oldFrame = currentFrame.withExecutionState(sExpression(
-        currentFrame.executionState.value[:itemIndex] + [MacroReturnValue()]
+        expression.take(itemIndex) + [MacroReturnValue()]
     ))
     return macroLambda.createEvaluationFrame(oldFrame)
 
 class StackFrame(IErrorThrowable):
-    """A frame in the stack that contains the scoped names, values and handlers, as well as a link to its parent"""
+    """
+    A frame in the stack that contains the scoped names, values and handlers, as well as a link to its parent.
+    Frames are owned by the evaluator, which drops a frame as soon as it has the next one, so the "with" methods
+    update a frame in place. Frames captured by a handler or continuation are frozen, and copied on write instead.
+    """
 
-    def __init__(self, executionState, currentFile: Searchable):
+    def __init__(self, executionState, currentFile: Searchable, interpreter: Interpreter):
         self.executionState = executionState
         """Read only. Current code being operated on in this frame."""
         self.parent = None
@@ -735,25 +1284,45 @@ class StackFrame(IErrorThrowable):
         Other interactions are done through the evaluator code."""
         self.childReturnValue = None
         self.currentScope = Scope(currentFile)
+        self.frozen = False
+        """Whether this frame is shared, and must be copied before it is changed."""
+        self.interpreter = interpreter
+        """Read only. The interpreter this frame runs in, shared by all frames of a program."""
 
     def __copy__(self) -> StackFrame:
-        newcopy = StackFrame(self.executionState, self.currentScope.currentFile)
-        newcopy.currentScope = self.currentScope.__copy__()
+        # Scopes are never changed in place, so the copy can share it
+        newcopy = StackFrame.__new__(StackFrame)
+        newcopy.executionState = self.executionState
+        newcopy.parent = self.parent
         newcopy.closestHandlerFrame = self.closestHandlerFrame
         newcopy.childReturnValue = self.childReturnValue
-        newcopy.parent = self.parent
+        newcopy.currentScope = self.currentScope
+        newcopy.frozen = False
+        newcopy.interpreter = self.interpreter
         return newcopy
 
+    def freeze(self):
+        """Marks this frame and its parents as shared, so that changing them creates a copy instead"""
+        frame = self
+        while frame is not None and not frame.frozen:
+            frame.frozen = True
+            frame = frame.parent
+
+    def __writable__(self) -> StackFrame:
+        if self.frozen:
+            return self.__copy__()
+        return self
+
     def createChild(self, executionState: Value) -> StackFrame:
         # explicitly take over the full scoped names, values, macros from the parents. Stacks exist only for return
         # values and for handlers. So we don't have to check higher up and/or flatten for capture.
-        old = self
-        newchild = self.withExecutionState(executionState)
-        newchild.parent = old
+        newchild = self.__copy__()
+        newchild.executionState = executionState
+        newchild.parent = self
         return newchild
 
     def withExecutionState(self, executionState: Value) -> StackFrame:
-        copy = self.__copy__()
+        copy = self.__writable__()
         copy.executionState = executionState
         return copy
 
@@ -767,9 +1336,9 @@ class StackFrame(IErrorThrowable):
         """
         if self.executionState.kind != Kind.sExpression:
             self.throwError("Tried to evaluate a subitem of a value that isnt an s expression. Engine error.")
-        if itemIndex >= len(self.executionState.value):
+        if itemIndex >= self.executionState.length():
             self.throwError("Tried to evaluate a subitem that is out of range. Engine error.")
-        item = self.executionState.value[itemIndex]
+        item = self.executionState.item(itemIndex)
         return item.kind is not Kind.sExpression and not isIndirectionValue(item)
 
     def SubEvaluate(self, itemIndex) -> StackFrame:
@@ -781,22 +1350,22 @@ class StackFrame(IErrorThrowable):
         """
         if self.isFullyEvaluated(itemIndex):
             self.throwError("Item is already fully evaluated. Engine error.")
-        item = self.executionState.value[itemIndex]
+        item = self.executionState.item(itemIndex)
         if item.kind == Kind.sExpression:
-            oldFrame = self.withExecutionState(sExpression(
-                self.executionState.value[:itemIndex] + [StackReturnValue()] + self.executionState.value[itemIndex + 1:]
-            ))
+            oldFrame = self.withExecutionState(self.executionState.replace(itemIndex, [StackReturnValue()]))
             newStack = oldFrame.createChild(item)
             return newStack
 
         if item.kind == Kind.MacroReference:
             return subevaluateMacro(self, itemIndex)
+
+        if item.kind == Kind.Thunk and item.forced is None:
+            oldFrame = self.withExecutionState(self.executionState.replace(itemIndex, [ThunkReturnValue(item)]))
+            return item.createEvaluationFrame(oldFrame)
             
         # its indirection
-        trueValue = dereference(self.withExecutionState(item))
-        return self.withExecutionState(sExpression(
-            self.executionState.value[:itemIndex] + trueValue + self.executionState.value[itemIndex + 1:]
-        ))
+        trueValue = dereference(self, item)
+        return self.withExecutionState(self.executionState.replace(itemIndex, trueValue))
 
     #Scope logic
 
@@ -806,7 +1375,7 @@ class StackFrame(IErrorThrowable):
         return self.childReturnValue
 
     def withChildReturnValue(self, value):
-        copy = self.__copy__()
+        copy = self.__writable__()
         copy.childReturnValue = value
         return copy
 
@@ -827,19 +1396,19 @@ class StackFrame(IErrorThrowable):
         return self.currentScope.retrieveScopedMacroValue(self, name)
 
     def addScopedMacroValue(self, name, value) -> StackFrame:
-        copy = self.__copy__()
+        copy = self.__writable__()
         copy.currentScope = self.currentScope.addScopedMacroValue(self, name, value)
         return copy
 
     def addScopedRegularValue(self, name, value) -> StackFrame:
-        copy = self.__copy__()
+        copy = self.__writable__()
         copy.currentScope = self.currentScope.addScopedRegularValue(self, name, value)
         return copy
 
     #Handler logic
 
     def withHandlerFrame(self, handlerFrame: HandlerFrame) -> StackFrame:
-        copy = self.__copy__()
+        copy = self.__writable__()
         copy.closestHandlerFrame = handlerFrame
         return copy
 
@@ -849,6 +1418,8 @@ class StackFrame(IErrorThrowable):
         return False
 
     def invokeHandler(self, name, args) -> StackFrame:
+        if self.closestHandlerFrame is None:
+            self.throwError(f"Tried to handle effectfull function '{name}', but no handler for it was found.")
         return self.closestHandlerFrame.invokeHandler(self, name, args)
 
     #Utility logic
@@ -875,6 +1446,31 @@ class StackFrame(IErrorThrowable):
     def equals(self, other):
         self.throwError("Cannot equality compare stackframes (yet)")
 
+    def __reduceWithParents__(self, linkedFrames: set):
+        """
+        Reduces the frame for pickling with its parents as a flat list, which are linked again when it is loaded.
+        Pickling the parent as a field would recurse once per frame of the stack.
+        :param linkedFrames: Ids of the frames whose parent is already written, the frames in the list are added to it
+        :return: The reduce value of the frame
+        """
+        parents = []
+        frame = self
+        # Ends with the root, or with a frame whose own parents are written by another frame
+        while frame is not None and id(frame) not in linkedFrames:
+            linkedFrames.add(id(frame))
+            frame = frame.parent
+            parents.append(frame)
+        return StackFrame.__new__, (StackFrame,), (dict(self.__dict__, parent=None), parents), None, None, linkFrames
+
+
+def linkFrames(frame: StackFrame, state: (dict, [StackFrame])):
+    """Restores a frame pickled with __reduceWithParents__, and the parents of the frames in its list"""
+    fields, parents = state
+    frame.__dict__.update(fields)
+    for parent in parents:
+        frame.parent = parent
+        frame = parent
+
 
 #Exception class
 
@@ -882,6 +1478,11 @@ class StackFrame(IErrorThrowable):
 class RuntimeEvaluationError(Exception):
     pass
 
+
+class NotSerializableError(Exception):
+    """Raised when a value, such as a lambda, can't be written to the compiled cache"""
+    pass
+
 #Import classes
 
 
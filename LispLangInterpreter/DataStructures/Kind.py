@@ -21,3 +21,10 @@ class Kind(Enum):
     Unit = 15
     MacroReference = 16
     MacroReturnValue = 17
+    Thunk = 18
+    ThunkReturnValue = 19
+    ListInProgress = 20
+    Cell = 21
+    HandleResumePoint = 22
+    Task = 23
+    TaskReturnValue = 24
@@ -0,0 +1,7 @@
+class StateCell:
+    """
+    Mutable holder of a state, such as the state of a handle or of a native state cell. It is owned by the values and
+    frames that use it, so it is freed together with them, in any order.
+    """
+    def __init__(self, value):
+        self.value = value
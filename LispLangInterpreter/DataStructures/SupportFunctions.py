@@ -2,14 +2,13 @@ from __future__ import annotations
 
 from .Classes import *
 from .Kind import Kind
-from ..Config.langConfig import SpecialForms
-
-
+from ..Config import langConfig
 
 
 def isSpecialFormKeyword(name) -> bool:
-    return name in [e.value.keyword for e in SpecialForms]
+    return name in langConfig.specialFormKeywords
 
 
 def isIndirectionValue(someValue: Value):
-    return someValue.kind in [Kind.Reference, Kind.StackReturnValue, Kind.HandleReturnValue, Kind.MacroReference, Kind.MacroReturnValue]
\ No newline at end of file
+    return someValue.kind in [Kind.Reference, Kind.StackReturnValue, Kind.HandleReturnValue, Kind.MacroReference, Kind.MacroReturnValue,
+                              Kind.Thunk, Kind.ThunkReturnValue, Kind.TaskReturnValue]
\ No newline at end of file
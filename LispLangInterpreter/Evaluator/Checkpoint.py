@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import importlib
+import io
+import os
+import pickle
+import zlib
+
+from ..Config.Interpreter import Interpreter
+from ..DataStructures.Classes import StackFrame
+
+"""
+Checkpoints of a running program, so that a long computation can continue after the process stopped.
+The state of the evaluator is the frame it continues from, which refers to everything else: its parents, scopes,
+handler frames and the interpreter with its libraries. A checkpoint is that frame pickled and compressed. User lambdas
+are saved with their code and captured scope, system functions by the python file and name that define them, and
+python modules are imported again when the checkpoint is loaded.
+Checkpoints are taken by the outermost evaluation of the interpreter, every checkpointEvery steps from the config, not
+by evaluations nested in it such as loading a library, and not when tasks are scheduled. Effects performed after the
+last checkpoint, such as printing, happen again when the program is resumed.
+"""
+
+checkpointVersion = 1
+
+class CheckpointPickler(pickle.Pickler):
+    """Pickles frames with their parents as a flat list, so deep stacks don't exceed the recursion limit"""
+
+    def __init__(self, file):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.linkedFrames = set()
+        """Ids of the frames whose parent is already written"""
+
+    def reducer_override(self, obj):
+        if isinstance(obj, StackFrame):
+            return obj.__reduceWithParents__(self.linkedFrames)
+        return NotImplemented
+
+
+def checkpointInterval(interpreter: Interpreter) -> int | None:
+    return interpreter.runtimeConfig.get("checkpointEvery")
+
+
+def checkpointPath(interpreter: Interpreter) -> str:
+    return interpreter.runtimeConfig.get("checkpointPath", "checkpoint.bin")
+
+
+def saveCheckpoint(frame: StackFrame, demacroed: bool, path: str):
+    """
+    Writes the frame the evaluator continues from to a checkpoint file.
+    The file is replaced at once, so a process stopping while writing keeps the previous checkpoint.
+    """
+    header = {"version": checkpointVersion, "modules": list(frame.interpreter.modules.keys())}
+    state = io.BytesIO()
+    pickle.dump(header, state, pickle.HIGHEST_PROTOCOL)
+    CheckpointPickler(state).dump((frame, demacroed))
+    temporaryPath = path + ".tmp"
+    with open(temporaryPath, "wb") as f:
+        f.write(zlib.compress(state.getvalue()))
+    os.replace(temporaryPath, path)
+
+
+def loadCheckpoint(path: str) -> (StackFrame, bool):
+    """
+    Reads a checkpoint file
+    :return: The frame to continue from and whether its code is demacroed
+    """
+    with open(path, "rb") as f:
+        state = io.BytesIO(zlib.decompress(f.read()))
+    header = pickle.load(state)
+    if header["version"] != checkpointVersion:
+        raise Exception(f"Checkpoint '{path}' was made by an incompatible version of the interpreter")
+    # The system handlers are pickled by the file that defines them, which is found through the imported module
+    for module in header["modules"]:
+        importlib.import_module(module)
+    return pickle.load(state)
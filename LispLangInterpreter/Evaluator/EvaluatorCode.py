@@ -1,43 +1,77 @@
-from LispLangInterpreter.Config import Singletons
 from ..DataStructures.Classes import dereference, sExpression, StackFrame, Value, \
-    StackReturnValue, Lambda, HandleBranchPoint, ContinueStop, subevaluateMacro
+    StackReturnValue, Lambda, HandleBranchPoint, ContinueStop, subevaluateMacro, UserLambda, Thunk, ThunkReturnValue, \
+    List, HandleResumePoint
+from ..Config.Interpreter import Interpreter
 from ..DataStructures.Kind import Kind
-from ..DataStructures.HandlerStateRegistry import HandlerStateSingleton
 from .SpecialFormHandlers import ExecuteSpecialForm
 from ..DataStructures.SupportFunctions import isIndirectionValue, isSpecialFormKeyword
+from .SupportFunctions import mayPerformEffects
+from .Checkpoint import checkpointInterval, checkpointPath, saveCheckpoint
+from .Tracing import traceStep
 
 """Only operates on demacroed code"""
 
 
+def DeferArguments(currentFrame: StackFrame, argumentCount) -> StackFrame | None:
+    """
+    Lazy evaluation of the arguments of a user lambda. Arguments that are code become thunks, except code that may
+    perform effects, which is evaluated like in eager evaluation.
+    :return: The next frame if an argument still needs a step, None if all arguments can be bound
+    """
+    expression = currentFrame.executionState
+    items = expression.take(argumentCount + 1)
+    deferred = False
+    for i in range(1, argumentCount + 1):
+        if items[i].kind == Kind.sExpression and not mayPerformEffects(currentFrame, items[i]):
+            items[i] = Thunk(items[i], currentFrame.currentScope, currentFrame.closestHandlerFrame,
+                             currentFrame.interpreter)
+            deferred = True
+    if deferred:
+        return currentFrame.withExecutionState(expression.replaceFront(argumentCount + 1, items))
+    for i in range(1, argumentCount + 1):
+        if items[i].kind != Kind.Thunk and not currentFrame.isFullyEvaluated(i):
+            return currentFrame.SubEvaluate(i)
+    return None
+
+
 def EvalLambda(currentFrame: StackFrame) -> StackFrame:
-    if not currentFrame.isFullyEvaluated(1):
-        return currentFrame.SubEvaluate(1)
-    head: Lambda = currentFrame.executionState.value[0]
-    tail = currentFrame.executionState.value[1:]
-    tailHead = tail[0]
-    trueTail = tail[1:]
+    expression = currentFrame.executionState
+    head: Lambda = expression.item(0)
+    # Evaluates all the arguments the lambda still needs from left to right, then binds them in one go.
+    # If there are less arguments than needed, it binds those that are there, as a partial application.
+    argumentCount = max(1, min(head.argumentsNeeded(), expression.length() - 1))
+    if currentFrame.interpreter.lazyEvaluation and isinstance(head, UserLambda):
+        nextFrame = DeferArguments(currentFrame, argumentCount)
+        if nextFrame is not None:
+            return nextFrame
+    else:
+        for i in range(1, argumentCount + 1):
+            if not currentFrame.isFullyEvaluated(i):
+                return currentFrame.SubEvaluate(i)
 
-    applied = head.bind(tailHead, currentFrame)
+    applied = head.bindMany(expression.take(argumentCount + 1)[1:], currentFrame)
 
     if applied.canRun():
+        if expression.length() == argumentCount + 1:
+            # Call in tail position, its result is the result of this frame, so it replaces this frame
+            return applied.createEvaluationFrame(currentFrame, tailCall=True)
         old = currentFrame.withExecutionState(
-            sExpression([StackReturnValue()] + trueTail)
+            expression.replaceFront(argumentCount + 1, [StackReturnValue()])
         )
         new = applied.createEvaluationFrame(old)
         return new
     else:
         return currentFrame.withExecutionState(
-            sExpression([applied] + trueTail)
+            expression.replaceFront(argumentCount + 1, [applied])
         )
 
 
 def handleReferenceAtHead(currentFrame: StackFrame) -> StackFrame:
-    head = currentFrame.executionState.value[0]
-    tail = currentFrame.executionState.value[1:]
+    head = currentFrame.executionState.item(0)
 
     if currentFrame.hasScopedRegularValue(head.value):
         head = currentFrame.retrieveScopedRegularValue(head.value)
-        expression = sExpression([head] + tail)
+        expression = currentFrame.executionState.replaceFront(1, [head])
         return currentFrame.withExecutionState(expression)
     if currentFrame.hasScopedMacroValue(head.value):
         return subevaluateMacro(currentFrame, 0)
@@ -47,6 +81,20 @@ def handleReferenceAtHead(currentFrame: StackFrame) -> StackFrame:
     currentFrame.throwError("Could not find reference " + head.value + ".")
 
 
+def handleDemacroedReferenceAtHead(currentFrame: StackFrame) -> StackFrame:
+    """Variant of handleReferenceAtHead for code whose macros are expanded ahead of time, which has no macros"""
+    head = currentFrame.executionState.item(0)
+
+    if currentFrame.hasScopedRegularValue(head.value):
+        head = currentFrame.retrieveScopedRegularValue(head.value)
+        expression = currentFrame.executionState.replaceFront(1, [head])
+        return currentFrame.withExecutionState(expression)
+    if isSpecialFormKeyword(head.value):
+        return ExecuteSpecialForm(currentFrame)
+
+    currentFrame.throwError("Could not find reference " + head.value + ".")
+
+
 def EvalHandleTopLevelValueHandleBranchPoint(currentFrame: StackFrame) -> (bool, any):
     """
     Evaluates a top level HandleBranchPoint.
@@ -59,7 +107,7 @@ def EvalHandleTopLevelValueHandleBranchPoint(currentFrame: StackFrame) -> (bool,
         if returnedValue.kind != Kind.ContinueStop:
             currentFrame.throwError("Returned a value that isn't a continue or stop!")
         #set the state to the new value
-        HandlerStateSingleton.setState(point.handlerID, returnedValue.newState)
+        point.stateCell.value = returnedValue.newState
         if returnedValue.isContinue:
             #continue with the continuation value
             return False, point.continueBranch.createChild(returnedValue.returnValue)
@@ -72,6 +120,28 @@ def EvalHandleTopLevelValueHandleBranchPoint(currentFrame: StackFrame) -> (bool,
 
     if currentFrame.parent is None:
         return True, resultValue
+    return False, point.returnFromHandle(currentFrame, resultValue)
+
+
+def EvalHandleTopLevelValueHandleResumePoint(currentFrame: StackFrame) -> (bool, any):
+    """
+    Evaluates a top level HandleResumePoint, after the handler below it returned.
+    :param currentFrame:
+    :return: Bool indicating whether the returned value is a new raw value, raw value if true/new frame if false
+    """
+    point: HandleResumePoint = currentFrame.executionState
+    returnedValue: ContinueStop = currentFrame.getChildReturnValue()
+    if returnedValue.kind != Kind.ContinueStop:
+        currentFrame.throwError("Returned a value that isn't a continue or stop!")
+    point.stateCell.value = returnedValue.newState
+    resultValue = returnedValue.returnValue
+    if not returnedValue.isContinue:
+        #stopped, return the given return value from the handle
+        branchPointFrame = point.branchPointFrame
+        return False, branchPointFrame.executionState.returnFromHandle(branchPointFrame, resultValue)
+    if isIndirectionValue(resultValue):
+        #resolve it in this frame first, like a continue branch does
+        return False, currentFrame.withExecutionState(resultValue)
     return False, currentFrame.parent.withChildReturnValue(resultValue)
 
 
@@ -83,9 +153,15 @@ def EvalHandleTopLevelValue(currentFrame: StackFrame) -> (bool, any):
     """
     if currentFrame.executionState.kind == Kind.HandleBranchPoint:
         return EvalHandleTopLevelValueHandleBranchPoint(currentFrame)
+    if currentFrame.executionState.kind == Kind.HandleResumePoint:
+        return EvalHandleTopLevelValueHandleResumePoint(currentFrame)
+    if currentFrame.executionState.kind == Kind.Thunk and currentFrame.executionState.forced is None:
+        #values are forced when they are the result of a frame
+        thunk = currentFrame.executionState
+        return False, thunk.createEvaluationFrame(currentFrame.withExecutionState(ThunkReturnValue(thunk)))
     if isIndirectionValue(currentFrame.executionState):
         #retrieve value and substitute it
-        resultValue = dereference(currentFrame)
+        resultValue = dereference(currentFrame, currentFrame.executionState)
         return False, currentFrame.withExecutionState(sExpression(resultValue))
     
     if currentFrame.parent is None:
@@ -93,51 +169,106 @@ def EvalHandleTopLevelValue(currentFrame: StackFrame) -> (bool, any):
     return False, currentFrame.parent.withChildReturnValue(currentFrame.executionState)
 
 
-def non_looping_eval(currentFrame: StackFrame) -> Value:
+def non_looping_eval(currentFrame: StackFrame, referenceAtHead=handleReferenceAtHead) -> Value:
     """
     Evaluates one step of a piece of interpreter representational code
+    :param referenceAtHead: Handles s expressions with a reference at their head, handleDemacroedReferenceAtHead
+    skips the macro checks for demacroed code
     """
-    Singletons.debugCounter += 1
-    if Singletons.debug:
-        print(str(Singletons.debugCounter) + "----\n")
-        currentFrame.__stackTrace__()
     if currentFrame.executionState.kind != Kind.sExpression:
         program_finished, returnValue = EvalHandleTopLevelValue(currentFrame)
         return program_finished, returnValue
 
-    if len(currentFrame.executionState.value) == 0:
+    expression = currentFrame.executionState
+    length = expression.length()
+    if length == 0:
         return False, currentFrame.throwError("Cant evaluate an s expression with 0 items in it")
-    if len(currentFrame.executionState.value) == 1:
+    if length == 1:
         # nested single item, pop s expression
-        return False, currentFrame.withExecutionState(currentFrame.executionState.value[0])
+        return False, currentFrame.withExecutionState(expression.item(0))
 
-    head = currentFrame.executionState.value[0]
-    tail = currentFrame.executionState.value[1:]
+    head = expression.item(0)
 
     if head.kind == Kind.Reference:
-        return False, handleReferenceAtHead(currentFrame)
+        return False, referenceAtHead(currentFrame)
 
     if head.kind == Kind.sExpression:
         old = currentFrame.withExecutionState(
-            sExpression([StackReturnValue()] + tail)
+            expression.replaceFront(1, [StackReturnValue()])
         )
         return False, old.createChild(head)
 
     if head.kind == Kind.Lambda:
         return False, EvalLambda(currentFrame)
 
+    if isIndirectionValue(head):
+        return False, currentFrame.SubEvaluate(0)
+
     # All other options are wrong
     currentFrame.throwError("Cant apply arguments to type at head/unhandled head kind")
 
 
-# TODO Add tailcall optimization
-def Eval(currentFrame: StackFrame) -> Value:
+def stepFunction(interpreter: Interpreter):
+    """
+    The function that takes one step of the evaluator for an interpreter, non_looping_eval if it has no tracer, so
+    that the evaluation loops only pay for tracing when it is used
+    """
+    tracer = interpreter.tracer
+    if tracer is None:
+        return non_looping_eval
+
+    def tracedStep(currentFrame: StackFrame, referenceAtHead) -> (bool, any):
+        traceStep(tracer, currentFrame)
+        return non_looping_eval(currentFrame, referenceAtHead)
+    return tracedStep
+
+
+def Eval(currentFrame: StackFrame, demacroed=False) -> Value:
     """
     Evaluates a piece of interpreter representational code
+    :param demacroed: Whether all code that is run has its macros expanded ahead of time
     """
     # continue statements used to achieve tail call optimisation, and to keep stack usage to a minimum
-    Singletons.debugCounter = 0
+    interpreter = currentFrame.interpreter
+    referenceAtHead = handleDemacroedReferenceAtHead if demacroed else handleReferenceAtHead
+    step = stepFunction(interpreter)
+    # Only the outermost evaluation can be resumed from its frame, nested ones are continued by python code
+    checkpointEvery = checkpointInterval(interpreter) if interpreter.evaluationDepth == 0 else None
+    interpreter.evaluationDepth += 1
+    try:
+        if checkpointEvery:
+            currentFrame = EvalCheckpointed(currentFrame, demacroed, step, checkpointEvery)
+        else:
+            program_finished = False
+            while not program_finished:
+                program_finished, currentFrame = step(currentFrame, referenceAtHead)
+        if interpreter.lazyEvaluation:
+            return ForceFully(currentFrame)
+        return currentFrame
+    finally:
+        interpreter.evaluationDepth -= 1
+
+
+def EvalCheckpointed(currentFrame: StackFrame, demacroed: bool, step, checkpointEvery: int) -> Value:
+    """Evaluation loop of Eval that writes a checkpoint every checkpointEvery steps"""
+    path = checkpointPath(currentFrame.interpreter)
+    referenceAtHead = handleDemacroedReferenceAtHead if demacroed else handleReferenceAtHead
+    steps = 0
     program_finished = False
     while not program_finished:
-        program_finished, currentFrame = non_looping_eval(currentFrame)
+        program_finished, currentFrame = step(currentFrame, referenceAtHead)
+        steps += 1
+        if steps % checkpointEvery == 0 and not program_finished:
+            saveCheckpoint(currentFrame, demacroed, path)
     return currentFrame
+
+
+def ForceFully(value: Value) -> Value:
+    """Forces all thunks in a value, including those in lists, used for the final value of lazy evaluation"""
+    if value.kind == Kind.Thunk:
+        if value.forced is None:
+            value.forced = Eval(value.createEvaluationFrame(None))
+        value = value.forced
+    if value.kind == Kind.List:
+        return List([ForceFully(x) for x in value.value])
+    return value
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+from ..Config.Interpreter import Interpreter
+from ..Config.langConfig import SpecialForms, currentScopeKeyword
+from ..DataStructures.Classes import StackFrame, Scope, Value, sExpression, List, Reference
+from ..DataStructures.Kind import Kind
+from ..DataStructures.SupportFunctions import isSpecialFormKeyword
+from .EvaluatorCode import Eval
+
+"""
+Ahead of time macro expansion.
+Expands all macros of a module once before it runs, instead of interleaved with evaluation. Imports and macro
+definitions at the top level of the module are evaluated during expansion with the macro handlers, so macros can use
+imported functions and earlier macros. The resulting code contains no macros or macro definitions, so it can be
+cached and evaluated by the demacroed evaluation loop.
+Macros receive the scope of the module at expansion time as their calling scope, which only contains the imports
+and macros. Macro definitions are only supported at the top level of a module.
+"""
+
+
+class ExpansionContext:
+    """The lexical information needed to expand the macros at a point in the code"""
+
+    def __init__(self, errorFrame: StackFrame, scope: Scope, shadowed: frozenset = frozenset(), topLevel=True):
+        self.errorFrame = errorFrame
+        self.scope = scope
+        """Scope with the imports and macros defined so far, which is the scope macros run in"""
+        self.shadowed = shadowed
+        """Names bound to regular values at this point, such as lambda arguments, which hide macros by the same name"""
+        self.topLevel = topLevel
+
+    def isMacro(self, item: Value):
+        return item.kind == Kind.Reference and item.value not in self.shadowed \
+            and self.scope.hasScopedMacroValue(item.value)
+
+    def shadow(self, names) -> ExpansionContext:
+        return ExpansionContext(self.errorFrame, self.scope, self.shadowed | frozenset(names), self.topLevel)
+
+    def nested(self, names=()) -> ExpansionContext:
+        """Context for code that runs in its own frame, such as a sub expression or the body of a lambda"""
+        return ExpansionContext(self.errorFrame, self.scope, self.shadowed | frozenset(names), False)
+
+    def withScope(self, scope: Scope, unshadowed=()) -> ExpansionContext:
+        return ExpansionContext(self.errorFrame, scope, self.shadowed - frozenset(unshadowed), self.topLevel)
+
+    def unsupported(self, message):
+        self.errorFrame.throwError("Cannot expand macros ahead of time. " + message)
+
+
+def runStatic(interpreter: Interpreter, scope: Scope, code: Value) -> Value:
+    """Evaluates code ahead of time, in the given scope and with the macro handlers"""
+    frame = StackFrame(code, scope.currentFile, interpreter).withHandlerFrame(interpreter.MacroHandlerFrame)
+    frame.currentScope = scope
+    return Eval(frame)
+
+
+def runStaticForm(interpreter: Interpreter, scope: Scope, items: list, index, form: SpecialForms) -> Scope:
+    """Evaluates a special form that changes the scope ahead of time, and returns the resulting scope"""
+    formItems = items[index:index + form.value.length]
+    return runStatic(interpreter, scope, sExpression(formItems + [Reference(currentScopeKeyword)]))
+
+
+def expandMacro(context: ExpansionContext, item: Value, rest: list) -> list:
+    """Runs a macro on the code after it, and returns the items it expanded to"""
+    macroLambda = context.scope.retrieveScopedMacroValue(context.errorFrame, item.value)
+    macroLambda = macroLambda.bindMany([context.scope, List(rest)], context.errorFrame)
+    interpreter = context.errorFrame.interpreter
+    frame = StackFrame(None, context.scope.currentFile, interpreter).withHandlerFrame(interpreter.MacroHandlerFrame)
+    result = Eval(macroLambda.createEvaluationFrame(frame, tailCall=True))
+    if result.kind != Kind.List:
+        context.errorFrame.throwError("Macros must always return a list! Returned a " + result.kind.name + " instead.")
+    return result.value
+
+
+def expandItem(context: ExpansionContext, item: Value) -> Value:
+    if item.kind == Kind.sExpression:
+        return sExpression(expandExpression(context.nested(), item.value))
+    return item
+
+
+def expandNonEvaluated(context: ExpansionContext, item: Value) -> Value:
+    """Expands code that a special form doesn't evaluate in place, such as a lambda body or a conditional path"""
+    if context.isMacro(item):
+        context.unsupported(f"Macro '{item.value}' is used as a single item that isn't evaluated in place.")
+    return expandItem(context, item)
+
+
+def checkFormLength(context: ExpansionContext, items: list, index, form: SpecialForms):
+    if len(items) - index < form.value.length:
+        context.errorFrame.throwError(f"Special form '{form.value.keyword}' is missing arguments.")
+
+
+def macroInOperands(context: ExpansionContext, items: list, index, *offsets) -> list | None:
+    """
+    Expands the first macro that is used as one of the evaluated operands of a special form, with all the code after
+    it, like the evaluator does.
+    :return: The new items, or None if none of the operands is a macro
+    """
+    for offset in offsets:
+        item = items[index + offset]
+        if context.isMacro(item):
+            return items[:index + offset] + expandMacro(context, item, items[index + offset + 1:])
+    return None
+
+
+#Each special form expander returns the new items, the index to continue at, the index at which the next expression
+#head is, or -1 if the items after it are arguments, and the context for the items after it.
+
+def expandImport(context: ExpansionContext, items: list, index):
+    checkFormLength(context, items, index, SpecialForms.import__)
+    expanded = macroInOperands(context, items, index, 1, 2)
+    if expanded is not None:
+        return expanded, index, index, context
+    if not context.topLevel:
+        context.unsupported("Imports are only supported at the top level of a module.")
+    items[index + 1] = expandItem(context, items[index + 1])
+    items[index + 2] = expandItem(context, items[index + 2])
+    scope = runStaticForm(context.errorFrame.interpreter, context.scope, items, index, SpecialForms.import__)
+    end = index + SpecialForms.import__.value.length
+    return items, end, end, context.withScope(scope)
+
+
+def expandMacroDefinition(form: SpecialForms):
+    def expander(context: ExpansionContext, items: list, index):
+        checkFormLength(context, items, index, form)
+        if not context.topLevel:
+            context.unsupported("Macros can only be defined at the top level of a module.")
+        scope = runStaticForm(context.errorFrame.interpreter, context.scope, items, index, form)
+        name = items[index + 1].value
+        return items[:index] + items[index + form.value.length:], index, index, context.withScope(scope, [name])
+    return expander
+
+
+def expandLet(context: ExpansionContext, items: list, index):
+    checkFormLength(context, items, index, SpecialForms.let)
+    expanded = macroInOperands(context, items, index, 2)
+    if expanded is not None:
+        return expanded, index, index, context
+    items[index + 2] = expandItem(context, items[index + 2])
+    end = index + SpecialForms.let.value.length
+    return items, end, end, context.shadow([items[index + 1].value])
+
+
+def expandLambda(context: ExpansionContext, items: list, index):
+    checkFormLength(context, items, index, SpecialForms.Lambda)
+    args = items[index + 1]
+    body = items[index + 2]
+    if args.kind == Kind.sExpression:
+        bodyContext = context.nested([x.value for x in args.value if x.kind == Kind.Reference])
+        items[index + 2] = expandNonEvaluated(bodyContext, body)
+    return items, index + SpecialForms.Lambda.value.length, -1, context
+
+
+def expandQuote(context: ExpansionContext, items: list, index):
+    checkFormLength(context, items, index, SpecialForms.quote)
+    return items, index + SpecialForms.quote.value.length, -1, context
+
+
+def expandCond(context: ExpansionContext, items: list, index):
+    checkFormLength(context, items, index, SpecialForms.cond)
+    expanded = macroInOperands(context, items, index, 1)
+    if expanded is not None:
+        return expanded, index, index, context
+    items[index + 1] = expandItem(context, items[index + 1])
+    items[index + 2] = expandNonEvaluated(context, items[index + 2])
+    items[index + 3] = expandNonEvaluated(context, items[index + 3])
+    return items, index + SpecialForms.cond.value.length, -1, context
+
+
+def expandList(context: ExpansionContext, items: list, index):
+    checkFormLength(context, items, index, SpecialForms.list)
+    elements = items[index + 1]
+    if elements.kind == Kind.sExpression:
+        items[index + 1] = sExpression([expandItem(context, x) for x in elements.value])
+    return items, index + SpecialForms.list.value.length, -1, context
+
+
+def expandHandle(context: ExpansionContext, items: list, index):
+    checkFormLength(context, items, index, SpecialForms.handle)
+    expanded = macroInOperands(context, items, index, 2, 3)
+    if expanded is not None:
+        return expanded, index, index, context
+    items[index + 1] = expandNonEvaluated(context, items[index + 1])
+    items[index + 2] = expandItem(context, items[index + 2])
+    items[index + 3] = expandItem(context, items[index + 3])
+    return items, index + SpecialForms.handle.value.length, -1, context
+
+
+def expandIgnore(context: ExpansionContext, items: list, index):
+    checkFormLength(context, items, index, SpecialForms.ignore)
+    expanded = macroInOperands(context, items, index, 1)
+    if expanded is not None:
+        return expanded, index, index, context
+    items[index + 1] = expandItem(context, items[index + 1])
+    end = index + SpecialForms.ignore.value.length
+    return items, end, end, context
+
+
+specialFormExpanders = {
+    SpecialForms.import__.value.keyword: expandImport,
+    SpecialForms.macro.value.keyword: expandMacroDefinition(SpecialForms.macro),
+    SpecialForms.pureMacro.value.keyword: expandMacroDefinition(SpecialForms.pureMacro),
+    SpecialForms.let.value.keyword: expandLet,
+    SpecialForms.Lambda.value.keyword: expandLambda,
+    SpecialForms.quote.value.keyword: expandQuote,
+    SpecialForms.cond.value.keyword: expandCond,
+    SpecialForms.list.value.keyword: expandList,
+    SpecialForms.handle.value.keyword: expandHandle,
+    SpecialForms.ignore.value.keyword: expandIgnore,
+}
+"""Special form keyword to the function that expands the macros in it"""
+
+
+def expandExpression(context: ExpansionContext, items: list) -> list:
+    """Expands all macros in the items of an s expression"""
+    items = list(items)
+    index = 0
+    head = 0
+    while index < len(items):
+        item = items[index]
+        if context.isMacro(item):
+            items = items[:index] + expandMacro(context, item, items[index + 1:])
+            continue
+        if index == head and item.kind == Kind.Reference and isSpecialFormKeyword(item.value):
+            expander = specialFormExpanders.get(item.value)
+            if expander is None:
+                context.unsupported(f"Special form '{item.value}' has no macro expander.")
+            items, index, head, context = expander(context, items, index)
+            continue
+        items[index] = expandItem(context, item)
+        index += 1
+    return items
+
+
+def DemacroTop(frame: StackFrame) -> Value:
+    """
+    Expands all macros in the code of a module
+    :param frame: Frame with the code of the module and the macro handlers
+    :return: The code without macros
+    """
+    code = frame.executionState
+    if code.kind != Kind.sExpression:
+        return code
+    return sExpression(expandExpression(ExpansionContext(frame, frame.currentScope), code.value))
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+from ..Config.Interpreter import Interpreter
+from ..Config.langConfig import SpecialForms
+from ..DataStructures.Classes import StackFrame, Scope, Value, sExpression, SystemFunction, List
+from ..DataStructures.IErrorThrowable import ErrorCatcher
+from ..DataStructures.Kind import Kind
+from ..DataStructures.SupportFunctions import isSpecialFormKeyword
+from .MacroExpansion import runStaticForm, runStatic
+
+"""
+Constant folding and partial evaluation of demacroed code.
+Calls to pure system functions with literal arguments are replaced by their result, conditionals on a literal boolean
+are replaced by the chosen path, and names bound to a literal with let are replaced by that literal in the code that
+can see the binding. The pass only runs on code without macros, as a macro could rewrite any code after it.
+"""
+
+literalKinds = [Kind.Number, Kind.Boolean, Kind.Char, Kind.Unit, Kind.QuotedName]
+
+
+def isLiteral(item: Value) -> bool:
+    if item.kind == Kind.List:
+        for i in item.value:
+            if not isLiteral(i):
+                return False
+        return True
+    return item.kind in literalKinds
+
+
+class OptimizationContext:
+    """The values known at a point in the code"""
+
+    def __init__(self, errorFrame: StackFrame, scope: Scope, known: dict = None, topLevel=True,
+                 inlinesValues=False, used: set = None):
+        self.errorFrame = errorFrame
+        self.scope = scope
+        """Scope with the imports done so far, which top level imports are evaluated in"""
+        self.known = {} if known is None else known
+        """Names to the value they are known to have, imported values and literals bound with let"""
+        self.topLevel = topLevel
+        self.inlinesValues = inlinesValues
+        """Whether references to any known value are replaced by the value, instead of only references to literals"""
+        self.used = set() if used is None else used
+        """Names of the known values the optimized code depends on, shared by all derived contexts"""
+
+    def __derive__(self, known: dict, scope: Scope = None, topLevel=None) -> OptimizationContext:
+        return OptimizationContext(self.errorFrame, self.scope if scope is None else scope, known,
+                                   self.topLevel if topLevel is None else topLevel, self.inlinesValues, self.used)
+
+    def knownValue(self, item: Value) -> Value | None:
+        if item.kind != Kind.Reference:
+            return None
+        value = self.known.get(item.value)
+        if value is not None:
+            self.used.add(item.value)
+        return value
+
+    def inlinedValue(self, item: Value) -> Value | None:
+        """The value a reference is replaced by, if any"""
+        value = self.knownValue(item)
+        if value is None or not (self.inlinesValues or isLiteral(value)):
+            return None
+        return value.setDereferencedName(item.value)
+
+    def pureFunction(self, item: Value) -> SystemFunction | None:
+        value = self.knownValue(item)
+        if value is not None and isinstance(value, SystemFunction) and value.pure:
+            return value
+        return None
+
+    def withKnown(self, name, value: Value | None, scope: Scope = None) -> OptimizationContext:
+        """Context after binding a name, to an unknown value if value is None"""
+        known = dict(self.known)
+        if value is None:
+            known.pop(name, None)
+        else:
+            known[name] = value
+        return self.__derive__(known, scope)
+
+    def nested(self, unknownNames=()) -> OptimizationContext:
+        """Context for code that runs in its own frame, such as a sub expression or the body of a lambda"""
+        known = {x: y for x, y in self.known.items() if x not in unknownNames}
+        return self.__derive__(known, topLevel=False)
+
+
+def foldCall(function: SystemFunction, args: list) -> Value | None:
+    """Runs a pure system function ahead of time, returns None if it fails so the error happens at runtime instead"""
+    try:
+        result = function.function(*function.boundArguments, *args, ErrorCatcher())
+    except Exception:
+        return None
+    if not isLiteral(result):
+        return None
+    return result
+
+
+def optimizeItem(context: OptimizationContext, item: Value) -> Value:
+    inlined = context.inlinedValue(item)
+    if inlined is not None:
+        return inlined
+    if item.kind == Kind.sExpression:
+        items = optimizeExpression(context.nested(), item.value)
+        if len(items) == 1 and isLiteral(items[0]):
+            return items[0]
+        return sExpression(items)
+    return item
+
+
+#Each special form optimizer returns the new items, the index to continue at, the index at which the next expression
+#head is, or -1 if the items after it are arguments, and the context for the items after it.
+
+def optimizeImport(context: OptimizationContext, items: list, index):
+    end = index + SpecialForms.import__.value.length
+    if not context.topLevel:
+        # Not evaluated ahead of time, so any name could be bound to an unknown value after it
+        return items, end, end, context.__derive__({}, topLevel=False)
+    interpreter = context.errorFrame.interpreter
+    scope = runStaticForm(interpreter, context.scope, items, index, SpecialForms.import__)
+    name = runStatic(interpreter, context.scope, items[index + 2]).value
+    value = scope.retrieveScopedRegularValue(context.errorFrame, name)
+    return items, end, end, context.withKnown(name, value, scope)
+
+
+def optimizeLet(context: OptimizationContext, items: list, index):
+    items[index + 2] = optimizeItem(context, items[index + 2])
+    value = items[index + 2]
+    end = index + SpecialForms.let.value.length
+    return items, end, end, context.withKnown(items[index + 1].value, value if isLiteral(value) else None)
+
+
+def optimizeLambda(context: OptimizationContext, items: list, index):
+    args = items[index + 1]
+    if args.kind == Kind.sExpression:
+        bodyContext = context.nested([x.value for x in args.value if x.kind == Kind.Reference])
+        items[index + 2] = optimizeItem(bodyContext, items[index + 2])
+    return items, index + SpecialForms.Lambda.value.length, -1, context
+
+
+def optimizeQuote(context: OptimizationContext, items: list, index):
+    return items, index + SpecialForms.quote.value.length, -1, context
+
+
+def optimizeCond(context: OptimizationContext, items: list, index):
+    condition = optimizeItem(context, items[index + 1])
+    if condition.kind == Kind.Boolean:
+        path = items[index + 2] if condition.value else items[index + 3]
+        return items[:index] + [path] + items[index + SpecialForms.cond.value.length:], index, index, context
+    items[index + 1] = condition
+    items[index + 2] = optimizeItem(context, items[index + 2])
+    items[index + 3] = optimizeItem(context, items[index + 3])
+    return items, index + SpecialForms.cond.value.length, -1, context
+
+
+def optimizeList(context: OptimizationContext, items: list, index):
+    elements = items[index + 1]
+    if elements.kind == Kind.sExpression:
+        elements = [optimizeItem(context, x) for x in elements.value]
+        end = index + SpecialForms.list.value.length
+        if end == len(items) and all([isLiteral(x) for x in elements]):
+            # A list of literals, such as a string
+            return items[:index] + [List(elements)], end, -1, context
+        items[index + 1] = sExpression(elements)
+    return items, index + SpecialForms.list.value.length, -1, context
+
+
+def optimizeHandle(context: OptimizationContext, items: list, index):
+    for offset in [1, 2, 3]:
+        items[index + offset] = optimizeItem(context, items[index + offset])
+    return items, index + SpecialForms.handle.value.length, -1, context
+
+
+def optimizeIgnore(context: OptimizationContext, items: list, index):
+    items[index + 1] = optimizeItem(context, items[index + 1])
+    end = index + SpecialForms.ignore.value.length
+    return items, end, end, context
+
+
+specialFormOptimizers = {form.value.keyword: (form, optimizer) for form, optimizer in [
+    (SpecialForms.import__, optimizeImport),
+    (SpecialForms.let, optimizeLet),
+    (SpecialForms.Lambda, optimizeLambda),
+    (SpecialForms.quote, optimizeQuote),
+    (SpecialForms.cond, optimizeCond),
+    (SpecialForms.list, optimizeList),
+    (SpecialForms.handle, optimizeHandle),
+    (SpecialForms.ignore, optimizeIgnore),
+]}
+"""Special form keyword to the special form and the function that optimizes it"""
+
+
+def optimizeExpression(context: OptimizationContext, items: list) -> list:
+    """Optimizes the items of an s expression"""
+    items = list(items)
+    index = 0
+    head = 0
+    call = None
+    """Head index and function of a pure function call whose arguments are being optimized"""
+    while index < len(items):
+        item = items[index]
+        if index == head:
+            if item.kind == Kind.Reference and isSpecialFormKeyword(item.value):
+                form, optimizer = specialFormOptimizers.get(item.value, (None, None))
+                if optimizer is None or len(items) - index < form.value.length:
+                    # Unknown or malformed special form, leave the rest of the code as is
+                    return items
+                items, index, head, context = optimizer(context, items, index)
+                continue
+            function = context.pureFunction(item)
+            if function is not None and function.argumentsNeeded() > 0:
+                call = (head, function)
+        items[index] = optimizeItem(context, item)
+        if call is not None and index == call[0] + call[1].argumentsNeeded():
+            start, function = call
+            call = None
+            args = items[start + 1:index + 1]
+            result = foldCall(function, args) if all([isLiteral(x) for x in args]) else None
+            if result is not None:
+                items = items[:start] + [result] + items[index + 1:]
+                index = start
+                head = start
+                continue
+        index += 1
+    return items
+
+
+def OptimizeTop(frame: StackFrame) -> Value:
+    """
+    Optimizes the demacroed code of a module
+    :param frame: Frame with the code of the module and the macro handlers
+    :return: The optimized code
+    """
+    code = frame.executionState
+    if code.kind != Kind.sExpression:
+        return code
+    return sExpression(optimizeExpression(OptimizationContext(frame, frame.currentScope), code.value))
+
+
+def optimizes(interpreter: Interpreter) -> bool:
+    """Whether demacroed code is optimized, has no effect unless macros are expanded ahead of time"""
+    return interpreter.runtimeConfig.get("optimize", False)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from ..Config import langConfig
+from ..Config.Interpreter import Interpreter
+from ..DataStructures.Classes import UserLambda, SystemFunction, AsyncSystemFunction, Value, Scope, List, StackFrame, \
+    RuntimeEvaluationError, sExpression
+from ..DataStructures.Kind import Kind
+from .EvaluatorCode import Eval, ForceFully
+
+"""
+Maps pure lambdas over lists on a pool of worker processes.
+Values are sent to the workers as portable copies: lambdas only capture the names their body uses, so a lambda
+defined in a module doesn't drag along the whole module scope, and system functions are sent by the path of the python
+file that defines them. Anything that may perform effects can't be made portable, as its effects would happen in
+another process.
+"""
+
+dataKinds = [Kind.Number, Kind.Char, Kind.Boolean, Kind.Unit, Kind.QuotedName]
+"""Kinds of values that are plain data, which are sent as they are"""
+
+
+def portableCode(code: Value, names: set, copies: dict) -> Value:
+    """
+    Copy of code with the values in it made portable, such as those inlined by the optimizer.
+    Adds the names it references to names, throws a ValueError if the code imports.
+    """
+    if code.kind == Kind.sExpression:
+        return sExpression([portableCode(x, names, copies) for x in code.take(code.length())])
+    if code.kind == Kind.Reference:
+        if code.value == langConfig.SpecialForms.import__.value.keyword:
+            raise ValueError("it imports, which can only be done in the process that has the files")
+        names.add(code.value)
+        return code
+    return portableValue(code, copies)
+
+
+def portableScope(scope: Scope, names: set, copies: dict) -> Scope:
+    """Copy of a scope with only the given names, without the file it belongs to"""
+    portable = Scope(None)
+    for name in names:
+        if name in scope.scopedNames:
+            portable.scopedNames[name] = scope.scopedNames[name]
+            portable.scopedValues[name] = portableValue(scope.scopedValues[name], copies)
+    return portable
+
+
+def portableValue(value: Value, copies: dict) -> Value:
+    """
+    Copy of a value that can be pickled and sent to another process.
+    :param copies: Portable copies made so far by id of the original, so that shared values stay shared
+    :return: The copy, throws a ValueError with the reason if the value can't be sent
+    """
+    if value.kind in dataKinds:
+        return value
+    if value.kind == Kind.Thunk:
+        # Arguments of lazy evaluation, such as those a lambda captured, are sent as their values
+        return portableValue(ForceFully(value), copies)
+    if id(value) in copies:
+        return copies[id(value)]
+    if value.kind == Kind.List:
+        portable = List([portableValue(x, copies) for x in value.value])
+    elif isinstance(value, UserLambda):
+        names = set()
+        body = portableCode(value.body, names, copies)
+        portable = UserLambda(value.bindingNames, body, portableScope(value.boundScope, names, copies),
+                              bindIndex=value.bindIndex, dereferencedName=value.dereferencedName)
+    elif isinstance(value, SystemFunction) and not isinstance(value, AsyncSystemFunction) and value.pure:
+        portable = SystemFunction(value.function, value.bindingsLeft, value.dereferencedName,
+                                  tuple(portableValue(x, copies) for x in value.boundArguments), value.pure)
+    elif value.kind == Kind.Lambda:
+        raise ValueError(f"{value.errorDumpSerialize()} may perform effects")
+    else:
+        raise ValueError(f"a {value.kind.name} can't be sent to another process")
+    copies[id(value)] = portable
+    return portable
+
+
+workerInterpreter = None
+"""Interpreter of a worker process, with the config of the interpreter that started the worker"""
+
+
+def initializeWorker(runtimeConfig):
+    # Imported here because of circular imports, runFile imports the library classes which import the evaluator
+    from .runFile import reloadConfig
+    global workerInterpreter
+    # Only the interpreter that started the workers checkpoints
+    workerInterpreter = Interpreter(dict(runtimeConfig, checkpointEvery=None))
+    reloadConfig(workerInterpreter)
+
+
+def evaluateChunk(function: UserLambda, items: list) -> list:
+    """Runs in a worker, applies the function to every item of a chunk"""
+    root = StackFrame(None, None, workerInterpreter)
+    results = []
+    for item in items:
+        result = Eval(function.bind(item, root).createEvaluationFrame(root, tailCall=True))
+        results.append(portableValue(result, {}))
+    return results
+
+
+def parallelMap(callingFrame: StackFrame, function: Value, items: List) -> List:
+    """
+    Applies a pure function to every item of a list on worker processes, and returns the results in order.
+    The list is split into chunks of pmapChunkSize items from the runtime config, run on pmapWorkers processes.
+    """
+    try:
+        function = portableValue(function, {})
+        values = [portableValue(x, {}) for x in items.value]
+    except ValueError as error:
+        callingFrame.throwError(f"pmap can only map pure functions over plain values, but {error}.")
+    if len(values) == 0:
+        return List([])
+    runtimeConfig = callingFrame.interpreter.runtimeConfig
+    workers = runtimeConfig.get("pmapWorkers") or os.cpu_count()
+    chunkSize = runtimeConfig.get("pmapChunkSize") or math.ceil(len(values) / (workers * 4))
+    chunks = [values[i:i + chunkSize] for i in range(0, len(values), chunkSize)]
+    results = []
+    try:
+        with ProcessPoolExecutor(min(workers, len(chunks)), initializer=initializeWorker,
+                                 initargs=(runtimeConfig,)) as pool:
+            for chunk in pool.map(evaluateChunk, [function] * len(chunks), chunks):
+                results.extend(chunk)
+    except (RuntimeEvaluationError, ValueError) as error:
+        callingFrame.throwError(f"pmap failed in a worker process: {error}")
+    return List(results)
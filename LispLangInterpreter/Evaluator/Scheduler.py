@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+
+from ..Config.Interpreter import Interpreter
+from ..DataStructures.Classes import StackFrame, Value
+from .EvaluatorCode import stepFunction, handleReferenceAtHead, handleDemacroedReferenceAtHead, ForceFully
+
+"""
+Cooperative scheduling of lisp tasks on a single python thread.
+A module runs as the main task of a scheduler, which can spawn more tasks. Tasks take turns in a round robin, each
+running for at most a quantum of evaluator steps, or until it yields or waits on another task. The scheduler stops as
+soon as the main task is finished, tasks that are still running at that point are dropped.
+The async driver also lets tasks wait on python awaitables, from effects handled by AsyncSystemFunctions.
+"""
+
+defaultQuantum = 1000
+"""Quantum of the async driver when schedulerQuantum isn't configured"""
+
+
+def schedulesTasks(interpreter: Interpreter) -> bool:
+    return interpreter.runtimeConfig.get("schedulerQuantum") is not None
+
+
+class Task:
+    """A lisp computation that is scheduled, with the frame it continues from"""
+
+    def __init__(self, taskID, frame: StackFrame):
+        self.taskID = taskID
+        self.frame = frame
+        self.steps = 0
+        """Evaluator steps the task has run"""
+        self.finished = False
+        self.result = None
+        self.yielded = False
+        """Whether the task gave up the rest of its quantum"""
+        self.waitingOn = None
+        """Task this task waits on to finish, if any"""
+        self.joiners = []
+        """Tasks waiting on this task to finish"""
+
+
+class Scheduler:
+    def __init__(self, interpreter: Interpreter, quantum, demacroed=False):
+        self.interpreter = interpreter
+        self.quantum = quantum
+        self.referenceAtHead = handleDemacroedReferenceAtHead if demacroed else handleReferenceAtHead
+        self.step = stepFunction(interpreter)
+        self.runQueue = deque()
+        self.spawned = 0
+        """Number of tasks spawned so far, the ID of the next task"""
+        self.current = None
+
+    def spawn(self, frame: StackFrame) -> Task:
+        """Adds a task that runs the given frame, which has no parent"""
+        task = self.__newTask__(frame)
+        self.runQueue.append(task)
+        return task
+
+    def __newTask__(self, frame: StackFrame | None) -> Task:
+        task = Task(self.spawned, frame)
+        self.spawned += 1
+        return task
+
+    def join(self, callingFrame: StackFrame, task: Task):
+        """Makes the current task wait on another task, if it isn't finished yet"""
+        if task is self.current:
+            callingFrame.throwError("A task can't wait on itself.")
+        self.current.waitingOn = task
+
+    def awaitExternal(self, callingFrame: StackFrame, awaitable) -> Task:
+        """Makes the current task wait on a python awaitable, only the async driver can run those"""
+        awaitable.close()
+        callingFrame.throwError("Async effects can only be performed by the async driver, run with startAsync.")
+
+    def __finish__(self, task: Task, result: Value):
+        task.finished = True
+        task.result = result
+        task.frame = None
+        for i in task.joiners:
+            i.waitingOn = None
+            self.runQueue.append(i)
+        task.joiners = []
+
+    def __runQuantum__(self, task: Task):
+        frame = task.frame
+        step = self.step
+        for _ in range(self.quantum):
+            finished, frame = step(frame, self.referenceAtHead)
+            task.steps += 1
+            if finished:
+                self.__finish__(task, frame)
+                return
+            if task.yielded or task.waitingOn is not None:
+                break
+        task.frame = frame
+        task.yielded = False
+        if task.waitingOn is None:
+            self.runQueue.append(task)
+        else:
+            task.waitingOn.joiners.append(task)
+
+    def __runNext__(self):
+        self.current = self.runQueue.popleft()
+        # Set per quantum, as several async drivers of one interpreter can take turns on one event loop
+        previous = self.interpreter.scheduler
+        self.interpreter.scheduler = self
+        try:
+            self.__runQuantum__(self.current)
+        finally:
+            self.interpreter.scheduler = previous
+
+    def __result__(self, main: Task) -> Value:
+        if self.interpreter.lazyEvaluation:
+            return ForceFully(main.result)
+        return main.result
+
+    def run(self, frame: StackFrame) -> Value:
+        """Runs a frame as the main task, along with the tasks it spawns, and returns the result of the main task"""
+        main = self.spawn(frame)
+        while not main.finished:
+            if len(self.runQueue) == 0:
+                main.frame.throwError("Deadlock, all tasks are waiting on other tasks.")
+            self.__runNext__()
+        return self.__result__(main)
+
+
+class AsyncScheduler(Scheduler):
+    """
+    Scheduler that runs as a coroutine on an asyncio event loop. A task performing an async effect waits on the
+    awaitable of its handler, the other tasks keep running, and the event loop gets a turn after every quantum.
+    """
+
+    def __init__(self, interpreter: Interpreter, quantum, demacroed=False):
+        super().__init__(interpreter, quantum, demacroed)
+        self.awaiting = {}
+        """Futures of the awaited effects, to the task that finishes with their result"""
+
+    def awaitExternal(self, callingFrame: StackFrame, awaitable) -> Task:
+        task = self.__newTask__(None)
+        self.awaiting[asyncio.ensure_future(awaitable)] = task
+        self.current.waitingOn = task
+        return task
+
+    def __completeAwaited__(self):
+        for future in [x for x in self.awaiting if x.done()]:
+            task = self.awaiting.pop(future)
+            if future.exception() is not None:
+                task.joiners[0].frame.throwError(f"Async effect failed: {future.exception()!r}")
+            self.__finish__(task, future.result())
+
+    async def runAsync(self, frame: StackFrame) -> Value:
+        """Like run, but waits on the event loop while all tasks wait on awaited effects"""
+        main = self.spawn(frame)
+        try:
+            while not main.finished:
+                self.__completeAwaited__()
+                if len(self.runQueue) == 0:
+                    if len(self.awaiting) == 0:
+                        main.frame.throwError("Deadlock, all tasks are waiting on other tasks.")
+                    await asyncio.wait(list(self.awaiting), return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                self.__runNext__()
+                await asyncio.sleep(0)
+        finally:
+            for future in self.awaiting:
+                future.cancel()
+        return self.__result__(main)
+
+
+def EvalScheduled(currentFrame: StackFrame, demacroed=False) -> Value:
+    """Evaluates a piece of interpreter representational code as the main task of a new scheduler"""
+    interpreter = currentFrame.interpreter
+    return Scheduler(interpreter, interpreter.runtimeConfig["schedulerQuantum"], demacroed).run(currentFrame)
+
+
+async def EvalAsync(currentFrame: StackFrame, demacroed=False) -> Value:
+    """Evaluates a piece of interpreter representational code as the main task of a new async driver"""
+    interpreter = currentFrame.interpreter
+    quantum = interpreter.runtimeConfig.get("schedulerQuantum") or defaultQuantum
+    return await AsyncScheduler(interpreter, quantum, demacroed).runAsync(currentFrame)
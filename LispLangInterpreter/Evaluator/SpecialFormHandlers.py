@@ -1,10 +1,14 @@
-from ..Config.langConfig import SpecialForms
-from ..DataStructures.Classes import StackFrame, dereference, sExpression, StackReturnValue, UserLambda, List, HandleReturnValue, HandleBranchPoint, UserHandlerFrame
+from ..Config import langConfig
+from ..Config.langConfig import SpecialForms, specialFormConfig
+from ..DataStructures.Classes import StackFrame, dereference, UserLambda, List, HandleReturnValue, HandleBranchPoint, UserHandlerFrame, Thunk, \
+    ListInProgress
 from ..DataStructures.Kind import Kind
-from ..DataStructures.HandlerStateRegistry import HandlerStateSingleton
+from ..DataStructures.StateCell import StateCell
 from ..DataStructures.SupportFunctions import isIndirectionValue
-from .SupportFunctions import MustBeKind, SpecialFormSlicer, QuoteCode, MustBeString
+from .SupportFunctions import MustBeKind, SpecialFormSlicer, QuoteCode, MustBeString, mayPerformEffects, \
+    callsUserLambda
 from ..ImportHandlerSystem.CompileStatus import CompileStatus
+from .Specializer import LambdaProfile, specializesHotLambdas
 
 
 def handleSpecialFormImport(currentFrame: StackFrame):
@@ -24,7 +28,7 @@ def handleSpecialFormImport(currentFrame: StackFrame):
     value = currentFrame.currentScope.currentFile.find(currentFrame, pathItems)
     if value is None:
         currentFrame.throwError("Could not find " + ".".join(pathItems))
-    return currentFrame.withExecutionState(sExpression(tail)).addScopedRegularValue(saveAs.value, value)
+    return currentFrame.withExecutionState(tail).addScopedRegularValue(saveAs.value, value)
 
 
 def handleSpecialFormCond(currentFrame: StackFrame):
@@ -39,7 +43,7 @@ def handleSpecialFormCond(currentFrame: StackFrame):
         path = truePath
     else:
         path = falsePath
-    return currentFrame.withExecutionState(sExpression([path] + tail))
+    return currentFrame.withExecutionState(tail.prepend([path]))
 
 
 def handleSpecialFormLambda(currentFrame: StackFrame):
@@ -49,8 +53,14 @@ def handleSpecialFormLambda(currentFrame: StackFrame):
     [MustBeKind(currentFrame, x, lambdaerr, Kind.Reference) for x in args.value]
     MustBeKind(currentFrame, body, "Body of a lambda must be an s expression or a single name",
                Kind.sExpression, Kind.Reference)
+    profile = None
+    if specializesHotLambdas(currentFrame.interpreter) and body.kind == Kind.sExpression:
+        # Kept on the body, which is the same code every time this special form is evaluated
+        if body.lambdaProfile is None:
+            body.lambdaProfile = LambdaProfile()
+        profile = body.lambdaProfile
     return currentFrame.withExecutionState(
-        sExpression([UserLambda([z.value for z in args.value], body, currentFrame.currentScope)] + rest)
+        rest.prepend([UserLambda([z.value for z in args.value], body, currentFrame.currentScope, profile=profile)])
     )
 
 
@@ -61,42 +71,55 @@ def handleSpecialFormLet(currentFrame: StackFrame):
         return currentFrame.SubEvaluate(2)
     return currentFrame\
         .addScopedRegularValue(name.value, value)\
-        .withExecutionState(sExpression(tail))
+        .withExecutionState(tail)
 
 
 def handleSpecialFormList(currentFrame):
     """
-    Evaluate the items in snd into their fully evaluated form.
+    Evaluate the items in snd into their fully evaluated form, from left to right.
+    While an element is evaluated in a child frame, snd is replaced by a ListInProgress that remembers where to
+    continue, so every element is only visited once.
     :param currentFrame:
     :return:
     """
     [[listAtom, snd], tail] = SpecialFormSlicer(currentFrame, SpecialForms.list)
-    MustBeKind(currentFrame, snd, "Item after list must be a list", Kind.sExpression)
-
-    #Walk over the snd, save the first instance of a subexpression into new stack expression
-    # and replace with a stack return value in the list, the following expressions as is
-    newStackExpression = None
-    listMapped = []
-    for i in snd.value:
+    if snd.kind == Kind.ListInProgress:
+        #A child returned the value of the element before nextIndex
+        elements = snd.value
+        index = snd.nextIndex
+        evaluated = (currentFrame.getChildReturnValue(), snd.evaluated)
+    else:
+        MustBeKind(currentFrame, snd, "Item after list must be a list", Kind.sExpression)
+        elements = snd.value
+        index = 0
+        evaluated = None
+        if currentFrame.interpreter.lazyEvaluation:
+            # Elements that call user lambdas are evaluated when they are needed, which allows infinite lists.
+            # Other elements, such as strings and nested lists, are evaluated right away, so that special forms and
+            # system functions get the lists they expect.
+            elements = [
+                Thunk(i, currentFrame.currentScope, currentFrame.closestHandlerFrame, currentFrame.interpreter)
+                if callsUserLambda(currentFrame, i) and not mayPerformEffects(currentFrame, i) else i
+                for i in elements]
+
+    while index < len(elements):
+        i = elements[index]
+        index += 1
         if i.kind == Kind.sExpression:
-            if newStackExpression is None:
-                listMapped.append(StackReturnValue())
-                newStackExpression = i
-            else:
-                listMapped.append(i)
+            inProgress = ListInProgress(elements, index, evaluated)
+            return currentFrame.withExecutionState(tail.prepend([listAtom, inProgress])).createChild(i)
+        if isIndirectionValue(i):
+            for value in dereference(currentFrame, i):
+                evaluated = (value, evaluated)
         else:
-            if isIndirectionValue(i):
-                valueToAppend = dereference(currentFrame.withExecutionState(i))
-            else:
-                valueToAppend = [i]
-            listMapped += valueToAppend
-
-    # if a subexpression was found and replaced, make it into a new stackframe, with parent being the updates list
-    if newStackExpression is not None:
-        currentFrame = currentFrame.withExecutionState(sExpression([listAtom, sExpression(listMapped)] + tail))
-        newStack = currentFrame.createChild(newStackExpression)
-        return newStack
-    #No subexpression found, all subitems are evaluated
+            evaluated = (i, evaluated)
+
+    #All elements are evaluated
+    listMapped = []
+    while evaluated is not None:
+        listMapped.append(evaluated[0])
+        evaluated = evaluated[1]
+    listMapped.reverse()
     return currentFrame.withExecutionState(List(listMapped))
 
 
@@ -130,20 +153,19 @@ def handleSpecialFormHandle(currentFrame: StackFrame) -> StackFrame:
 
     verifyHandlerQuotekeyValuePairs(currentFrame, handlerQuotekeyValuePairs)
 
-    #register the handler ID
-    handlerID = HandlerStateSingleton.registerHandlerFrame(stateSeed)
+    #the state of this handle, shared by its frames
+    stateCell = StateCell(stateSeed)
 
     #Create the special stack return value inprogressvalue
-    inProgressValue = HandleReturnValue(handlerID)
+    inProgressValue = HandleReturnValue(stateCell)
     #current frame with handle invocation replaced with the stack return value
     newParentFrame = currentFrame\
-        .withExecutionState(sExpression([inProgressValue] + tail))
+        .withExecutionState(tail.prepend([inProgressValue]))
 
     #Should NOT contain the handlers, and only the branch point. Handles a possible branch moment.
-    branchFrame = newParentFrame.createChild(HandleBranchPoint(handlerID))
+    branchFrame = newParentFrame.createChild(HandleBranchPoint(stateCell))
 
-    newHandler = UserHandlerFrame(handlerID, branchFrame)
-    newHandler.parent = currentFrame.closestHandlerFrame
+    newHandler = UserHandlerFrame(stateCell, branchFrame, currentFrame.closestHandlerFrame)
 
     for i in handlerQuotekeyValuePairs.value:
         newHandler = newHandler.addHandler(currentFrame, i.value[0].value, i.value[1])
@@ -159,46 +181,71 @@ def handleSpecialFormHandle(currentFrame: StackFrame) -> StackFrame:
 def handleSpecialFormIgnore(currentFrame: StackFrame) -> StackFrame:
     [[ignoreWord, codeToPerform], tail] = SpecialFormSlicer(currentFrame, SpecialForms.ignore)
     if currentFrame.isFullyEvaluated(1):
-        return currentFrame.withExecutionState(sExpression(tail))
+        return currentFrame.withExecutionState(tail)
     return currentFrame.SubEvaluate(1)
 
 
-def ExecuteSpecialForm(currentFrame: StackFrame) -> StackFrame:
-    name = currentFrame.executionState.value[0].value
-    if name == SpecialForms.Lambda.value.keyword:
-        return handleSpecialFormLambda(currentFrame)
+def defineMacro(currentFrame: StackFrame, formConfig: SpecialForms, pure: bool) -> StackFrame:
+    #calling scope is the scope the macro is called from, which is needed to subevaluate elements in the macro
+    #As of yet, the calling scope is unable to be used, but it is a good idea to keep it for future use, such as with a "subeval" function that takes a custom scope
+    [[_, macroname, callingScope_alias, input_ast_alias, macroFuncBody], rest] = SpecialFormSlicer(currentFrame, formConfig)
+    #current scope is the scope the macro is defined in, only those values are available to the macro
+    macroLambda = UserLambda([callingScope_alias.value, input_ast_alias.value], macroFuncBody, currentFrame.currentScope)
+    if pure:
+        macroLambda.expansionCache = {}
+    return currentFrame.addScopedMacroValue(macroname.value, macroLambda).withExecutionState(rest)
 
-    if name == SpecialForms.macro.value.keyword:
-        #calling scope is the scope the macro is called from, which is needed to subevaluate elements in the macro
-        #As of yet, the calling scope is unable to be used, but it is a good idea to keep it for future use, such as with a "subeval" function that takes a custom scope
-        [[_, macroname, callingScope_alias, input_ast_alias, macroFuncBody], rest] = SpecialFormSlicer(currentFrame, SpecialForms.macro)
-        #current scope is the scope the macro is defined in, only those values are available to the macro
-        macroLambda = UserLambda([callingScope_alias.value, input_ast_alias.value], macroFuncBody, currentFrame.currentScope)
-        return currentFrame.addScopedMacroValue(macroname.value, macroLambda).withExecutionState(sExpression(rest))
 
-    if name == SpecialForms.let.value.keyword:
-        return handleSpecialFormLet(currentFrame)
+def handleSpecialFormMacro(currentFrame: StackFrame) -> StackFrame:
+    return defineMacro(currentFrame, SpecialForms.macro, False)
 
-    if name == SpecialForms.quote.value.keyword:
-        # quotes item directly after it
-        [[_, snd], tail] = SpecialFormSlicer(currentFrame, SpecialForms.quote)
-        newSnd = QuoteCode(currentFrame, snd)
-        return currentFrame.withExecutionState(sExpression([newSnd] + tail))
 
-    if name == SpecialForms.list.value.keyword:
-        return handleSpecialFormList(currentFrame)
+def handleSpecialFormPureMacro(currentFrame: StackFrame) -> StackFrame:
+    """
+    Defines a macro whose expansion depends only on its input ast, so it does not use the calling scope or effects.
+    Each piece of code is only expanded once, later evaluations of the same code reuse the expansion.
+    """
+    return defineMacro(currentFrame, SpecialForms.pureMacro, True)
+
+
+def handleSpecialFormQuote(currentFrame: StackFrame) -> StackFrame:
+    # quotes item directly after it
+    [[_, snd], tail] = SpecialFormSlicer(currentFrame, SpecialForms.quote)
+    newSnd = QuoteCode(currentFrame, snd)
+    return currentFrame.withExecutionState(tail.prepend([newSnd]))
 
-    if name == SpecialForms.cond.value.keyword:
-        return handleSpecialFormCond(currentFrame)
 
-    if name == SpecialForms.handle.value.keyword:
-        return handleSpecialFormHandle(currentFrame)
+specialFormHandlers = {
+    SpecialForms.Lambda.value.keyword: handleSpecialFormLambda,
+    SpecialForms.macro.value.keyword: handleSpecialFormMacro,
+    SpecialForms.pureMacro.value.keyword: handleSpecialFormPureMacro,
+    SpecialForms.let.value.keyword: handleSpecialFormLet,
+    SpecialForms.quote.value.keyword: handleSpecialFormQuote,
+    SpecialForms.list.value.keyword: handleSpecialFormList,
+    SpecialForms.cond.value.keyword: handleSpecialFormCond,
+    SpecialForms.handle.value.keyword: handleSpecialFormHandle,
+    SpecialForms.ignore.value.keyword: handleSpecialFormIgnore,
+    SpecialForms.import__.value.keyword: handleSpecialFormImport,
+}
+"""Special form keyword to the function that executes it"""
 
-    if name == SpecialForms.ignore.value.keyword:
-        return handleSpecialFormIgnore(currentFrame)
 
-    if name == SpecialForms.import__.value.keyword:
-        return handleSpecialFormImport(currentFrame)
+def registerSpecialForm(formConfig: specialFormConfig, handler):
+    """
+    Adds a natively implemented special form to the language
+    :param formConfig: Keyword and minimum length of the special form, for use with SpecialFormSlicer
+    :param handler: Function taking the current frame, with the special form at the head of its s expression,
+    and returning the next frame
+    """
+    if formConfig.keyword in specialFormHandlers:
+        raise Exception(f"Special form '{formConfig.keyword}' is already registered")
+    specialFormHandlers[formConfig.keyword] = handler
+    langConfig.specialFormKeywords = langConfig.specialFormKeywords | {formConfig.keyword}
 
-    currentFrame.throwError("Unknown special form (engine bug)")
 
+def ExecuteSpecialForm(currentFrame: StackFrame) -> StackFrame:
+    name = currentFrame.executionState.item(0).value
+    handler = specialFormHandlers.get(name)
+    if handler is None:
+        currentFrame.throwError("Unknown special form (engine bug)")
+    return handler(currentFrame)
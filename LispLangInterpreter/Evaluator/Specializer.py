@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from ..Config import langConfig
+from ..Config.Interpreter import Interpreter
+from ..DataStructures.Classes import UserLambda, Value, Scope, VarType
+from ..DataStructures.IErrorThrowable import ErrorCatcher
+from ..DataStructures.Kind import Kind
+
+"""
+Tiered execution of user lambdas.
+All lambdas created by the same lambda special form share a profile that counts their invocations. Once a lambda is
+called often enough, its body is specialized for the values it captured: references to them are replaced by the
+values themselves, and calls to pure system functions on literals are folded. The specialized body is only used while
+the captured values it depends on are still the same, otherwise the lambda falls back to its generic body.
+"""
+
+
+def specializesHotLambdas(interpreter: Interpreter) -> bool:
+    return interpreter.runtimeConfig.get("specializeHotLambdas", False)
+
+
+def usesMacros(scope: Scope, item: Value) -> bool:
+    """Whether code uses a macro from the scope, or defines one, in which case its code may be rewritten at runtime"""
+    if item.kind == Kind.sExpression:
+        for i in item.value:
+            if usesMacros(scope, i):
+                return True
+        return False
+    if item.kind == Kind.Reference:
+        return scope.hasScopedMacroValue(item.value) or item.value in [
+            langConfig.SpecialForms.macro.value.keyword, langConfig.SpecialForms.pureMacro.value.keyword]
+    return False
+
+
+class LambdaProfile:
+    """Invocation count and specialized body shared by all lambdas created by one lambda special form"""
+
+    def __init__(self):
+        self.calls = 0
+        self.deoptimizations = 0
+        self.specializedBody = None
+        self.guards = {}
+        """Names of captured values to the value the specialized body assumes they have"""
+
+    def __guardsHold__(self, scope: Scope) -> bool:
+        for name, value in self.guards.items():
+            if scope.scopedValues.get(name) is not value:
+                return False
+        return True
+
+    def __deoptimize__(self):
+        self.specializedBody = None
+        self.guards = {}
+        self.calls = 0
+        self.deoptimizations += 1
+
+    def __specialize__(self, function: UserLambda):
+        # Imported here because of circular imports, the optimizer evaluates code through the evaluator
+        from .Optimizer import OptimizationContext, optimizeItem
+        scope = function.boundScope
+        if function.body.kind != Kind.sExpression or usesMacros(scope, function.body):
+            # Never worth trying again
+            self.deoptimizations = langConfig.maxDeoptimizations
+            return
+        captured = {name: scope.scopedValues[name] for name, varType in scope.scopedNames.items()
+                    if varType == VarType.Regular and name not in function.bindingNames}
+        context = OptimizationContext(ErrorCatcher(), scope, captured, topLevel=False, inlinesValues=True)
+        self.specializedBody = optimizeItem(context, function.body)
+        self.guards = {name: captured[name] for name in context.used}
+
+    def bodyFor(self, function: UserLambda) -> Value:
+        """The body to run for an invocation of the lambda"""
+        if self.specializedBody is not None:
+            if self.__guardsHold__(function.boundScope):
+                return self.specializedBody
+            self.__deoptimize__()
+            return function.body
+        self.calls += 1
+        if self.calls >= langConfig.hotLambdaThreshold and self.deoptimizations < langConfig.maxDeoptimizations:
+            self.__specialize__(function)
+            if self.specializedBody is not None:
+                return self.specializedBody
+        return function.body
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from ..Config.langConfig import SpecialForms
-from ..DataStructures.Classes import sExpression, Reference, StackFrame, Value, List, QuotedName
+from ..Config.langConfig import SpecialForms, specialFormConfig
+from ..DataStructures.Classes import sExpression, Reference, StackFrame, Value, List, QuotedName, \
+    UnfinishedHandlerInvocation, UserLambda, Scope, VarType
 from ..DataStructures.IErrorThrowable import IErrorThrowable
 from ..DataStructures.Kind import Kind
 
@@ -52,12 +53,69 @@ def QuoteCode(frame: StackFrame, expression):
     return expression
 
 
-def SpecialFormSlicer(frame: StackFrame, formConfig: SpecialForms):
-    length = formConfig.value.length
-    if len(frame.executionState.value) < length:
-        frame.throwError("Special form " + frame.executionState.value[0].value + " must have at least "
-                         + str(length) + " items arguments, only has " + str(len(frame.executionState.value)))
-    return [frame.executionState.value[:length], frame.executionState.value[length:]]
+def SpecialFormSlicer(frame: StackFrame, formConfig: SpecialForms | specialFormConfig):
+    """
+    Splits the special form at the start of the frames s expression from the code after it
+    :param formConfig: The built in special form, or the config of a registered special form
+    :return: A list of the items of the special form, and an s expression of the rest of the code
+    """
+    if isinstance(formConfig, SpecialForms):
+        formConfig = formConfig.value
+    length = formConfig.length
+    expression = frame.executionState
+    if expression.length() < length:
+        frame.throwError("Special form " + expression.item(0).value + " must have at least "
+                         + str(length) + " items arguments, only has " + str(expression.length()))
+    return [expression.take(length), expression.drop(length)]
+
+
+def mayPerformEffects(frame: StackFrame, code: Value) -> bool:
+    """
+    Whether evaluating code in the scope of the frame may perform effects. That is the case when it refers to a
+    handler invocation, to a user lambda whose body may perform effects, or to a macro, which may expand to anything.
+    Lazy evaluation evaluates such code eagerly, so the effects happen in the expected order and are never dropped.
+    """
+    return codeMayPerformEffects(frame.currentScope, code, ())
+
+
+def codeMayPerformEffects(scope: Scope, code: Value, unknownNames) -> bool:
+    """
+    :param unknownNames: Names that aren't bound by the scope yet, such as the arguments of a lambda, whose values are
+    checked where they are passed
+    """
+    if code.kind == Kind.sExpression:
+        return any(codeMayPerformEffects(scope, x, unknownNames) for x in code.take(code.length()))
+    if code.kind == Kind.Reference:
+        if code.value in unknownNames or code.value not in scope.scopedNames:
+            return False
+        if scope.scopedNames[code.value] == VarType.Macro:
+            return True
+        return valueMayPerformEffects(scope.scopedValues[code.value])
+    # Values in the code, such as those inlined by the optimizer
+    return valueMayPerformEffects(code)
+
+
+def valueMayPerformEffects(value: Value) -> bool:
+    if isinstance(value, UnfinishedHandlerInvocation):
+        return True
+    if not isinstance(value, UserLambda):
+        return False
+    if value.mayPerformEffects is None:
+        # Assumed not to while its body is checked, for lambdas that refer to themselves through their scope
+        value.mayPerformEffects = False
+        value.mayPerformEffects = codeMayPerformEffects(value.boundScope, value.body,
+                                                        value.bindingNames[value.bindIndex:])
+    return value.mayPerformEffects
+
+
+def callsUserLambda(frame: StackFrame, code: Value) -> bool:
+    """Whether code is a call to a user lambda in the scope of the frame"""
+    if code.kind != Kind.sExpression or code.length() == 0:
+        return False
+    head = code.item(0)
+    if head.kind != Kind.Reference or not frame.hasScopedRegularValue(head.value):
+        return False
+    return isinstance(frame.currentScope.scopedValues.get(head.value), UserLambda)
 
 
 def makeDictFromReturn(callingStack: IErrorThrowable, result):
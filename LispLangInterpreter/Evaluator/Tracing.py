@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from ..DataStructures.Classes import StackFrame, Value, Lambda, UserLambda, UnfinishedHandlerInvocation
+from ..DataStructures.Kind import Kind
+from ..DataStructures.SupportFunctions import isIndirectionValue
+
+"""
+Tracing of evaluations.
+A tracer installed on an interpreter, by setting its tracer, is told about every step the evaluator takes, and about
+the calls, returns, effects and macro expansions those steps perform. The evaluator only uses its traced loop when a
+tracer is installed, so untraced evaluations don't pay for it.
+Events are found by looking at the frame before each step, so a tracer sees them before they happen.
+"""
+
+
+class Tracer:
+    """Receives the events of the evaluations of an interpreter, subclasses override the hooks they need"""
+
+    def onStep(self, frame: StackFrame):
+        """Before every step of the evaluator"""
+        pass
+
+    def onCall(self, frame: StackFrame, function: Lambda, arguments: [Value]):
+        """Before a user lambda or system function is called with all its arguments"""
+        pass
+
+    def onReturn(self, frame: StackFrame, value: Value):
+        """Before a frame returns a value to its parent, or as the result of the evaluation if it has none"""
+        pass
+
+    def onEffect(self, frame: StackFrame, name: str, arguments: [Value]):
+        """Before an effect is performed, which the closest handler of it handles"""
+        pass
+
+    def onMacroExpand(self, frame: StackFrame, name: str, macro: UserLambda):
+        """Before a macro at the head of an s expression is expanded"""
+        pass
+
+
+class StepCounter(Tracer):
+    """Counts the evaluator steps"""
+
+    def __init__(self):
+        self.steps = 0
+
+    def onStep(self, frame: StackFrame):
+        self.steps += 1
+
+
+class DebugPrinter(Tracer):
+    """Prints the step number and the stack trace before every step"""
+
+    def __init__(self):
+        self.steps = 0
+
+    def onStep(self, frame: StackFrame):
+        self.steps += 1
+        print(str(self.steps) + "----\n")
+        frame.__stackTrace__()
+
+
+def isReadyArgument(frame: StackFrame, function: Lambda, argument: Value) -> bool:
+    if argument.kind == Kind.sExpression:
+        return False
+    if argument.kind == Kind.Thunk:
+        # Lazy evaluation passes thunks to user lambdas as they are
+        return frame.interpreter.lazyEvaluation and isinstance(function, UserLambda)
+    return not isIndirectionValue(argument)
+
+
+def traceStep(tracer: Tracer, frame: StackFrame):
+    """Tells the tracer about the step the evaluator is about to take from a frame, and what that step does"""
+    tracer.onStep(frame)
+    state = frame.executionState
+    if state.kind != Kind.sExpression:
+        if state.kind in [Kind.HandleBranchPoint, Kind.HandleResumePoint] or isIndirectionValue(state):
+            return
+        tracer.onReturn(frame, state)
+        return
+    length = state.length()
+    if length < 2:
+        return
+    head = state.item(0)
+    if head.kind == Kind.Reference:
+        if not frame.hasScopedRegularValue(head.value) and frame.hasScopedMacroValue(head.value):
+            tracer.onMacroExpand(frame, head.value, frame.retrieveScopedMacroValue(head.value))
+        return
+    # A macro used as an argument is first looked up as a macro reference, which the next step expands, as items
+    # are evaluated from left to right
+    macroReference = next((x for x in state.take(length) if x.kind == Kind.MacroReference), None)
+    if macroReference is not None:
+        tracer.onMacroExpand(frame, macroReference.value, frame.retrieveScopedMacroValue(macroReference.value))
+        return
+    if head.kind != Kind.Lambda or not 0 < head.argumentsNeeded() <= length - 1:
+        return
+    # Like EvalLambda, the call happens in the step in which all arguments it needs are evaluated
+    arguments = state.take(head.argumentsNeeded() + 1)[1:]
+    if not all(isReadyArgument(frame, head, x) for x in arguments):
+        return
+    if isinstance(head, UnfinishedHandlerInvocation):
+        tracer.onEffect(frame, head.name, head.args + arguments)
+    else:
+        tracer.onCall(frame, head, arguments)
@@ -2,33 +2,87 @@ import json
 import os
 
 from LispLangInterpreter.Config import Singletons
+from LispLangInterpreter.Config.Interpreter import Interpreter
 from LispLangInterpreter.DataStructures.Classes import StackFrame
 from LispLangInterpreter.DataStructures.IErrorThrowable import ErrorCatcher
+from LispLangInterpreter.Evaluator.Checkpoint import loadCheckpoint
+from LispLangInterpreter.Evaluator.EvaluatorCode import Eval
 from LispLangInterpreter.ImportHandlerSystem.Handler import SystemHandlerImporter
 from LispLangInterpreter.ImportHandlerSystem.PackageResolver import mapLibrary, makeAbs
+from LispLangInterpreter.ImportHandlerSystem.Snapshot import loadSnapshot, saveSnapshot
 from LispLangInterpreter.ImportHandlerSystem.placeholderConfigs import libraryFallbackWord, exampleConfig
 
 
-def reloadConfig():
-    """If is none added to allow mocking during unit tests"""
-    if Singletons.runtimeConfig is None:
-        Singletons.runtimeConfig = getConfig()
+def reloadConfig(interpreter: Interpreter = None):
+    """Sets up an interpreter from its config, or the default interpreter if none is given"""
+    interpreter = interpreter or Singletons.interpreter
+    # If is none added to allow mocking during unit tests
+    if interpreter.runtimeConfig is None:
+        interpreter.runtimeConfig = getConfig()
 
-    Singletons.currentFileSystem = mapLibrary(Singletons.runtimeConfig)
-    Singletons.MacroHandlerFrame = SystemHandlerImporter(Singletons.runtimeConfig["handledMacroEffects"])
-    Singletons.MacroHandlerFrame = SystemHandlerImporter(Singletons.runtimeConfig["handledRuntimeEffects"])
+    config = interpreter.runtimeConfig
+    interpreter.currentFileSystem = mapLibrary(config, interpreter)
+    interpreter.MacroHandlerFrame = SystemHandlerImporter(config["handledMacroEffects"], interpreter.modules)
+    interpreter.RuntimeHandlerFrame = SystemHandlerImporter(config["handledRuntimeEffects"], interpreter.modules)
+    strategy = config.get("evaluationStrategy", "eager")
+    if strategy not in ["eager", "lazy"]:
+        raise Exception(f"Unknown evaluation strategy '{strategy}', must be 'eager' or 'lazy'")
+    interpreter.lazyEvaluation = strategy == "lazy"
+    interpreter.tailResumptiveHandlers = config.get("tailResumptiveHandlers", True)
+    return interpreter
 
 
-def start():
-    reloadConfig()
+def start(interpreter: Interpreter = None):
+    return runMainFile(reloadConfig(interpreter))
+
+
+def startFromSnapshot(snapshotPath: str, interpreter: Interpreter = None):
+    """
+    Like start, but starts from the warmed up interpreter in the snapshot if it is up to date. Otherwise, it starts
+    like usual and writes a new snapshot after running the main file.
+    """
+    interpreter = interpreter or Singletons.interpreter
+    if interpreter.runtimeConfig is None:
+        interpreter.runtimeConfig = getConfig()
+    loaded = loadSnapshot(snapshotPath, interpreter)
+    if loaded is not None:
+        return runMainFile(loaded)
+    result = start(interpreter)
+    saveSnapshot(interpreter, snapshotPath)
+    return result
+
+
+def runMainFile(interpreter: Interpreter):
     errorHandler = ErrorCatcher()
-    startFile = Singletons.currentFileSystem.find(errorHandler, [Singletons.runtimeConfig["mainFile"]])
+    startFile = interpreter.currentFileSystem.find(errorHandler, [interpreter.runtimeConfig["mainFile"]])
     startFile.execute(errorHandler) #no error would be thrown in this initial state so no stackframe is neccecary
     return startFile.data #data is the return value
 
 
-def executeLeaf(leaf):
-    reloadConfig()
+def resume(checkpointPath: str):
+    """Continues a program from a checkpoint it wrote, and returns the value of its main file"""
+    frame, demacroed = loadCheckpoint(checkpointPath)
+    return Eval(frame, demacroed)
+
+
+async def startAsync(interpreter: Interpreter = None):
+    """Like start, but runs the main file with the async driver, so it can perform async effects"""
+    interpreter = reloadConfig(interpreter)
+    errorHandler = ErrorCatcher()
+    startFile = interpreter.currentFileSystem.find(errorHandler, [interpreter.runtimeConfig["mainFile"]])
+    await startFile.executeAsync(errorHandler)
+    return startFile.data
+
+
+def compileAll(interpreter: Interpreter = None):
+    """Ahead of time compiles every lisp file in the configured libraries to the compiled cache"""
+    interpreter = reloadConfig(interpreter)
+    errorHandler = ErrorCatcher()
+    interpreter.currentFileSystem.compile(errorHandler)
+
+
+def executeLeaf(leaf, interpreter: Interpreter = None):
+    reloadConfig(interpreter)
     errorhandler = ErrorCatcher()
     leaf.execute(errorhandler)  # no error would be thrown in this initial state so no stackframe is neccecary
     return leaf.data  # data is the return value
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import os
+from ast import literal_eval
+from os.path import dirname, join
+from typing import TYPE_CHECKING
+
+from ..Config.Interpreter import Interpreter
+from ..Config.langConfig import compiledCacheFolder
+from ..DataStructures.Classes import Value, StackFrame, NotSerializableError
+from ..DataStructures.IErrorThrowable import IErrorThrowable
+from ..Evaluator.MacroExpansion import DemacroTop
+from ..Evaluator.Optimizer import OptimizeTop, optimizes
+from ..Evaluator.SupportFunctions import toAST
+from ..Parser.ParserCode import parseAll
+from ..Parser.ParserCombinator import SOF_value, EOF_value
+if TYPE_CHECKING:
+    from .LibraryClasses import Leaf
+
+"""
+Ahead of time compilation of lisp files.
+Compiling a lisp file parses it once and writes the resulting AST as a python module into a cache folder next to
+the source, similar to __pycache__. When a leaf is executed and a cached module exists for the current source, the
+module is imported instead of parsing the file again, which also lets python cache the bytecode of the AST itself.
+When macros are expanded ahead of time, the compiled module also contains the demacroed AST, and the optimized AST if
+optimization is enabled. These depend on the libraries the macros and the optimizer use, so the module records the
+source hashes of the files loaded while expanding, and they are not used once any of those files changed.
+The compiled module only holds ASTs, the evaluator still runs them. Lisp code is not translated to python functions,
+so compiling saves the parsing, macro expansion and optimization at startup, but not the cost of the calls.
+The source hash and dependencies are written on their own lines before the ASTs, so a stale module is detected
+without running it.
+"""
+
+compiledModuleHeader = "# Generated by the LispLangInterpreter ahead of time compiler from '{source}', do not edit.\n" \
+                       "from LispLangInterpreter.DataStructures.Classes import sExpression, Reference, List, " \
+                       "QuotedName, Char, Boolean, Number, Unit\n\n"
+
+
+def hashSource(text: str) -> str:
+    return hashlib.sha256(text.encode("utf8")).hexdigest()
+
+
+def readSourceHash(absPath: str) -> str:
+    return hashSource(open(absPath, "r", encoding="utf8").read())
+
+
+def compiledPath(leaf: Leaf) -> str:
+    return join(dirname(leaf.absPath), compiledCacheFolder, leaf.name + ".py")
+
+
+def parseSource(callingStack: IErrorThrowable, leaf: Leaf, text: str) -> Value:
+    parsed = parseAll.parse([SOF_value] + list(text) + [EOF_value])
+    if len(parsed.remaining) != 0:
+        callingStack.throwError("Could not parse lisp file " + leaf.absPath)
+    return toAST(parsed.content)
+
+
+def expandsMacrosAheadOfTime(interpreter: Interpreter) -> bool:
+    return interpreter.runtimeConfig.get("expandMacrosAheadOfTime", False)
+
+
+def expandMacros(leaf: Leaf, ast: Value) -> Value:
+    interpreter = leaf.getInterpreter()
+    return DemacroTop(StackFrame(ast, leaf, interpreter).withHandlerFrame(interpreter.MacroHandlerFrame))
+
+
+def optimize(leaf: Leaf, demacroedAst: Value) -> Value:
+    interpreter = leaf.getInterpreter()
+    return OptimizeTop(StackFrame(demacroedAst, leaf, interpreter).withHandlerFrame(interpreter.MacroHandlerFrame))
+
+
+def demacroedAttribute(interpreter: Interpreter) -> str:
+    """Name of the AST in the compiled module that the config of the interpreter runs"""
+    return "optimizedAst" if optimizes(interpreter) else "demacroedAst"
+
+
+def compileLeaf(callingStack: IErrorThrowable, leaf: Leaf):
+    """Parses a lisp leaf and writes its AST as a python module to the compiled cache folder"""
+    text = open(leaf.absPath, "r").read()
+    ast = parseSource(callingStack, leaf, text)
+    demacroed = {}
+    dependencies = {}
+    interpreter = leaf.getInterpreter()
+    if expandsMacrosAheadOfTime(interpreter):
+        # Records the files the macros and the optimizer load
+        interpreter.loadingLibraries.append(dependencies)
+        try:
+            expanded = expandMacros(leaf, ast)
+            optimized = optimize(leaf, expanded) if optimizes(interpreter) else None
+        finally:
+            interpreter.loadingLibraries.pop()
+        try:
+            # Macros may splice in runtime values such as lambdas, which can't be written to the cache
+            demacroed["demacroedAst"] = expanded.serializePython()
+            if optimized is not None:
+                demacroed["optimizedAst"] = optimized.serializePython()
+        except NotSerializableError:
+            demacroed = {}
+    target = compiledPath(leaf)
+    os.makedirs(dirname(target), exist_ok=True)
+    f = open(target, encoding="utf8", mode="w")
+    f.write(compiledModuleHeader.format(source=leaf.absPath))
+    f.write("sourceHash = " + repr(hashSource(text)) + "\n")
+    f.write("dependencies = " + repr(dependencies) + "\n")
+    f.write("ast = " + ast.serializePython() + "\n")
+    for name, serialized in demacroed.items():
+        f.write(name + " = " + serialized + "\n")
+    f.close()
+
+
+def readCompiledHeader(target: str) -> dict:
+    """Reads the values written before the ASTs of a compiled module, without running the module"""
+    header = {}
+    with open(target, "r", encoding="utf8") as f:
+        for line in f:
+            name, separator, value = line.partition(" = ")
+            if name == "ast":
+                break
+            if separator and name in ["sourceHash", "dependencies"]:
+                header[name] = literal_eval(value)
+    return header
+
+
+def loadCompiled(leaf: Leaf, text: str, attribute="ast") -> Value | None:
+    """
+    Retrieves the cached AST of a lisp leaf
+    :param leaf: The leaf to load
+    :param text: The current source of the leaf, used to check whether the cache is stale
+    :param attribute: Which AST to load, "ast", "demacroedAst" or "optimizedAst"
+    :return: The AST, or None if there is no up to date compiled module
+    """
+    target = compiledPath(leaf)
+    if not os.path.isfile(target):
+        return None
+    header = readCompiledHeader(target)
+    if header.get("sourceHash") != hashSource(text):
+        return None
+    # Modules compiled before dependencies were recorded have none, their expansions can't be checked
+    if attribute != "ast" and not dependenciesAreCurrent(header.get("dependencies")):
+        return None
+    spec = importlib.util.spec_from_file_location("lispcache_" + leaf.name, target)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, attribute, None)
+
+
+def dependenciesAreCurrent(dependencies: dict | None) -> bool:
+    """Whether the files the macros of a compiled module loaded while expanding are unchanged"""
+    if dependencies is None:
+        return False
+    try:
+        return all(readSourceHash(path) == sourceHash for path, sourceHash in dependencies.items())
+    except OSError:
+        return False
+
+
+def loadAST(callingStack: IErrorThrowable, leaf: Leaf) -> Value:
+    """Gets the AST of a lisp leaf, from the compiled cache if it is up to date, otherwise by parsing the source"""
+    text = open(leaf.absPath, "r").read()
+    cached = loadCompiled(leaf, text)
+    if cached is not None:
+        return cached
+    return parseSource(callingStack, leaf, text)
+
+
+def loadDemacroedAST(callingStack: IErrorThrowable, leaf: Leaf) -> Value:
+    """
+    Gets the AST of a lisp leaf with its macros expanded, and optimized if that is enabled, from the compiled cache if
+    possible
+    """
+    interpreter = leaf.getInterpreter()
+    text = open(leaf.absPath, "r").read()
+    cached = loadCompiled(leaf, text, demacroedAttribute(interpreter))
+    if cached is not None:
+        return cached
+    demacroed = expandMacros(leaf, loadAST(callingStack, leaf))
+    if optimizes(interpreter):
+        return optimize(leaf, demacroed)
+    return demacroed
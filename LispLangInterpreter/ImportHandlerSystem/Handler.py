@@ -1,6 +1,5 @@
 import importlib
 
-from .Importer import modules
 from ..DataStructures.Classes import SystemFunction, SystemHandlerFrame
 
 
@@ -9,10 +8,11 @@ def validatePathForm(path):
         raise Exception(f"Path for the to import package must be absolute, found {path} instead")
 
 
-def SystemHandlerImporter(config) -> SystemHandlerFrame:
+def SystemHandlerImporter(config, modules: dict) -> SystemHandlerFrame:
     """
     Creates a system handler frame from a specified config.
     :param config:
+    :param modules: Python modules imported so far by module path, which newly imported modules are added to
     :return:
     """
     frame = SystemHandlerFrame()
@@ -1,8 +1,6 @@
 import importlib
 from ..DataStructures.Classes import *
 
-modules = {}
-
 def validatePathForm(path):
     if path[0] == ".":
         raise Exception(f"Path for the to import package must be absolute, found {path} instead")
@@ -17,6 +15,7 @@ def SystemDataImporter(importData: PythonImportData, callingFrame: StackFrame):
     """
     #TODO make this into an effect handler with a macro, remove python import data and use list forms instead
     validatePathForm(importData.libraryPath)
+    modules = callingFrame.interpreter.modules
     if importData.libraryPath in modules.keys():
         #Already imported
         pass
@@ -8,14 +8,17 @@ from os.path import basename
 from typing import List
 
 from LispLangInterpreter.Config import langConfig
-from LispLangInterpreter.Config.Singletons import RuntimeHandlerFrame
+from LispLangInterpreter.Config.Interpreter import Interpreter
 from LispLangInterpreter.DataStructures.Classes import StackFrame, Value
 from LispLangInterpreter.DataStructures.IErrorThrowable import IErrorThrowable
 from LispLangInterpreter.Evaluator.EvaluatorCode import Eval
-from LispLangInterpreter.Evaluator.SupportFunctions import toAST, makeDictFromReturn
+from LispLangInterpreter.Evaluator.Scheduler import EvalScheduled, EvalAsync, schedulesTasks
+from LispLangInterpreter.Evaluator.SupportFunctions import makeDictFromReturn
+from LispLangInterpreter.ImportHandlerSystem.AOTCompiler import loadAST, compileLeaf, loadDemacroedAST, \
+    expandsMacrosAheadOfTime
 from LispLangInterpreter.ImportHandlerSystem.CompileStatus import CompileStatus
-from LispLangInterpreter.Parser.ParserCode import parseAll
-from LispLangInterpreter.Parser.ParserCombinator import SOF_value, EOF_value
+from LispLangInterpreter.ImportHandlerSystem.ModuleRegistry import sharedLibraries, sharesLibraries, LoadedLibrary, \
+    readSourceHash
 
 
 class Searchable:
@@ -57,12 +60,30 @@ class Searchable:
     def execute(self, callingStack: IErrorThrowable):
         raise NotImplementedError("Abstract")
 
+    def compile(self, callingStack: IErrorThrowable):
+        """Ahead of time compiles all lisp code in this searchable to the compiled cache"""
+        raise NotImplementedError("Abstract")
+
+    def getInterpreter(self) -> Interpreter:
+        """The interpreter that mapped the library this searchable is in"""
+        return self.parent.getInterpreter()
+
 
 class Leaf(Searchable):
     def __init__(self, absPath, isLisp):
         super().__init__(absPath)
         self.isLisp = isLisp
         self.data = None
+        self.libraryDict = None
+        """Exported names to values, for lisp files loaded as a library"""
+        self.dependencies = {}
+        """Path to source hash of this file and every file it imported while loading, once it is loaded"""
+
+    def __getstate__(self):
+        # Python modules can't be pickled, a python file is loaded again when it is imported
+        if self.isLisp or self.compileStatus != CompileStatus.Compiled:
+            return self.__dict__
+        return dict(self.__dict__, data=None, compileStatus=CompileStatus.Uncompiled)
 
     def _findStart(self, callingStack: IErrorThrowable, startName: str) -> Searchable | None:
         if self.name == startName:
@@ -80,9 +101,9 @@ class Leaf(Searchable):
 
     def _getValue(self, callingStack: IErrorThrowable, name: str) -> Value | None:
         if self.compileStatus != CompileStatus.Compiled:
-            self.execute(callingStack)
-            if self.isLisp:
-                self.libraryDict = makeDictFromReturn(callingStack, self.data)
+            self.__load__(callingStack)
+        else:
+            self.__recordDependencies__()
         if self.isLisp:
             if name not in self.libraryDict.keys():
                 return None
@@ -90,6 +111,47 @@ class Leaf(Searchable):
         else:
             return getattr(self.data, name, None)
 
+    def __load__(self, callingStack: IErrorThrowable):
+        """
+        Executes this file as a library, or takes its values from the shared registry if another interpreter with the
+        same config already loaded it
+        """
+        interpreter = self.getInterpreter()
+        if self.compileStatus == CompileStatus.Compiling:
+            # A circular dependency, which execute reports
+            self.__execute__(callingStack)
+            return
+        sourceHash = readSourceHash(self.absPath)
+        shares = sharesLibraries(interpreter)
+        key = sharedLibraries.key(self, sourceHash) if shares else None
+        loaded = sharedLibraries.lookup(key) if shares else None
+        if loaded is None:
+            dependencies = {self.absPath: sourceHash}
+            interpreter.loadingLibraries.append(dependencies)
+            try:
+                self.__execute__(callingStack)
+            finally:
+                interpreter.loadingLibraries.pop()
+            loaded = LoadedLibrary(self.data, self.libraryDict, dependencies)
+            if shares:
+                sharedLibraries.register(key, loaded)
+        else:
+            self.data = loaded.data
+            self.libraryDict = loaded.libraryDict
+            self.compileStatus = CompileStatus.Compiled
+        self.dependencies = loaded.dependencies
+        self.__recordDependencies__()
+
+    def __recordDependencies__(self):
+        """Adds the dependencies of this file to those of the file being loaded or compiled that imports it"""
+        interpreter = self.getInterpreter()
+        if interpreter.loadingLibraries:
+            interpreter.loadingLibraries[-1].update(self.dependencies)
+
+    def __execute__(self, callingStack: IErrorThrowable):
+        self.execute(callingStack)
+        if self.isLisp:
+            self.libraryDict = makeDictFromReturn(callingStack, self.data)
 
     def execute(self, callingStack: IErrorThrowable):
         """Compiles an uncompiled leaf. Throws an error when trying to compile an already compiled file or a circular dependency"""
@@ -101,13 +163,8 @@ class Leaf(Searchable):
         else:
             self.compileStatus = CompileStatus.Compiling
             if self.isLisp:
-                text = open(self.absPath, "r").read()
-                parsed = parseAll.parse([SOF_value] + list(text) + [EOF_value])
-                if len(parsed.remaining) != 0:
-                    callingStack.throwError("Could not parse lisp file " + self.absPath)
-                ast = toAST(parsed.content)
-                # demacroedCode = DemacroTop(StackFrame(ast, self).withHandlerFrame(MacroHandlerFrame))
-                self.data = Eval(StackFrame(ast, self).withHandlerFrame(RuntimeHandlerFrame))
+                evaluate = EvalScheduled if schedulesTasks(self.getInterpreter()) else Eval
+                self.data = evaluate(*self.__startFrame__(callingStack))
             else:
                 sys.path.append(self.parent.absPath)
                 spec = importlib.util.spec_from_file_location("testname" + str(random.Random().random()), self.absPath)
@@ -116,6 +173,29 @@ class Leaf(Searchable):
                 sys.path.remove(self.parent.absPath)
             self.compileStatus = CompileStatus.Compiled
 
+    async def executeAsync(self, callingStack: IErrorThrowable):
+        """
+        Like execute, but runs a lisp file with the async driver, so it can perform async effects.
+        Files it imports are executed like usual.
+        """
+        if not self.isLisp or self.compileStatus != CompileStatus.Uncompiled:
+            self.execute(callingStack)
+            return
+        self.compileStatus = CompileStatus.Compiling
+        self.data = await EvalAsync(*self.__startFrame__(callingStack))
+        self.compileStatus = CompileStatus.Compiled
+
+    def __startFrame__(self, callingStack: IErrorThrowable) -> (StackFrame, bool):
+        """The frame that evaluates this lisp file, and whether its code is demacroed"""
+        interpreter = self.getInterpreter()
+        demacroed = expandsMacrosAheadOfTime(interpreter)
+        ast = loadDemacroedAST(callingStack, self) if demacroed else loadAST(callingStack, self)
+        return StackFrame(ast, self, interpreter).withHandlerFrame(interpreter.RuntimeHandlerFrame), demacroed
+
+    def compile(self, callingStack: IErrorThrowable):
+        if self.isLisp:
+            compileLeaf(callingStack, self)
+
 
 class Container(Searchable):
     def __init__(self, absPath, children: List[Searchable]):
@@ -135,6 +215,10 @@ class Container(Searchable):
             i.parent = self
         return self
 
+    def compile(self, callingStack: IErrorThrowable):
+        for i in self.children.values():
+            i.compile(callingStack)
+
     def _findStart(self, callingStack: IErrorThrowable, startName: str) -> Searchable | None:
         if self.name == startName:
             return self
@@ -189,8 +273,12 @@ class PythonPackage(Package):
 
 
 class Library(Container):
-    def __init__(self, absPath, children: List[Searchable]):
+    def __init__(self, absPath, children: List[Searchable], interpreter: Interpreter):
         super().__init__(absPath, children)
+        self.interpreter = interpreter
+
+    def getInterpreter(self) -> Interpreter:
+        return self.interpreter
 
     def _findStart(self, callingStack: IErrorThrowable, startName: str) -> Searchable | None:
         if startName in self.children.keys():
@@ -205,8 +293,9 @@ class Library(Container):
 
 
 class LibraryWithFallback(Library):
-    def __init__(self, absPath, children: List[Searchable], fallback: Library | LibraryWithFallback):
-        super().__init__(absPath, children)
+    def __init__(self, absPath, children: List[Searchable], fallback: Library | LibraryWithFallback,
+                 interpreter: Interpreter):
+        super().__init__(absPath, children, interpreter)
         self.fallback = fallback
 
     def _findStart(self, callingStack: IErrorThrowable, startName: str) -> Searchable | None:
@@ -221,6 +310,10 @@ class LibraryWithFallback(Library):
             return self.fallback._findInside(callingStack, pathElements)
         return primary
 
+    def compile(self, callingStack: IErrorThrowable):
+        super().compile(callingStack)
+        self.fallback.compile(callingStack)
+
 
 def splitPathFully(path):
     splitted = []
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+from ..Config import langConfig
+from ..Config.Interpreter import Interpreter
+from ..DataStructures.Classes import Value, UserLambda, SystemFunction, UnfinishedHandlerInvocation
+from ..DataStructures.Kind import Kind
+from .AOTCompiler import readSourceHash
+if TYPE_CHECKING:
+    from .LibraryClasses import Leaf, Searchable
+
+"""
+Libraries shared by the interpreters of a process.
+Loading a library executes its file, which is most of the startup time of a program. Once an interpreter loaded a
+library, other interpreters with the same config take its values from the registry instead of executing it again, so
+starting another interpreter, for example one per request or per thread, only runs its main file.
+Only libraries whose values can't change are shared. A library that exports something mutable, such as a ref cell, is
+loaded by every interpreter itself, so each has its own state.
+Entries are keyed by the path and source hash of the file and by the config of the interpreter, and remember the
+hashes of the files the library imported while loading, so a library is loaded again when it or one of its
+dependencies changes.
+"""
+
+dataKinds = [Kind.Number, Kind.Char, Kind.Boolean, Kind.Unit, Kind.QuotedName]
+"""Kinds of values that are plain data, which are immutable"""
+
+
+def sharesLibraries(interpreter: Interpreter) -> bool:
+    return interpreter.runtimeConfig.get("shareLibraries", True)
+
+
+def libraryRoots(library: Searchable) -> [str]:
+    """Folders of a library and its fallbacks, which decide what the imports of a file resolve to"""
+    roots = []
+    while library is not None:
+        roots.append(library.absPath)
+        library = getattr(library, "fallback", None)
+    return roots
+
+
+def configKey(interpreter: Interpreter) -> str:
+    """The parts of the config of an interpreter that change what a library evaluates to"""
+    config = {k: v for k, v in interpreter.runtimeConfig.items() if k != "mainFile"}
+    return json.dumps([config, libraryRoots(interpreter.currentFileSystem)], sort_keys=True, default=str)
+
+
+def importsAtRuntime(code: Value) -> bool:
+    if code.kind == Kind.sExpression:
+        return any(importsAtRuntime(x) for x in code.take(code.length()))
+    return code.kind == Kind.Reference and code.value == langConfig.SpecialForms.import__.value.keyword
+
+
+def isImmutable(value: Value, seen: set) -> bool:
+    """
+    Whether a value and everything it refers to can't change, so it can be used by several interpreters at once
+    :param seen: Ids of the values checked so far, lambdas may refer to themselves through their scope
+    """
+    if value.kind in dataKinds or id(value) in seen:
+        return True
+    seen.add(id(value))
+    if value.kind == Kind.List:
+        return all(isImmutable(x, seen) for x in value.value)
+    if value.kind == Kind.Scope:
+        return all(isImmutable(x, seen) for x in value.scopedValues.values())
+    if isinstance(value, UserLambda):
+        # Profiles of hot lambdas change as they are called, and imports in the body would resolve in the libraries
+        # of the interpreter that loaded it
+        return value.profile is None and not importsAtRuntime(value.body) and isImmutable(value.boundScope, seen)
+    if isinstance(value, SystemFunction):
+        return all(isImmutable(x, seen) for x in value.boundArguments)
+    return isinstance(value, UnfinishedHandlerInvocation)
+
+
+class LoadedLibrary:
+    """The values of a loaded library file"""
+
+    def __init__(self, data, libraryDict: dict | None, dependencies: dict):
+        self.data = data
+        """The value a lisp file returned, or the module of a python file"""
+        self.libraryDict = libraryDict
+        self.dependencies = dependencies
+        """Path to source hash of the file and every file it imported while loading"""
+
+    def isCurrent(self) -> bool:
+        return all(readSourceHash(path) == sourceHash for path, sourceHash in self.dependencies.items())
+
+    def isShareable(self) -> bool:
+        if self.libraryDict is None:
+            # A python module, which python itself also shares between everything that imports it
+            return True
+        seen = set()
+        return all(isImmutable(x, seen) for x in self.libraryDict.values())
+
+
+class ModuleRegistry:
+    def __init__(self):
+        self.libraries = {}
+        """Key of a library file to its LoadedLibrary"""
+
+    def key(self, leaf: Leaf, sourceHash: str) -> tuple:
+        return leaf.absPath, sourceHash, configKey(leaf.getInterpreter())
+
+    def lookup(self, key: tuple) -> LoadedLibrary | None:
+        library = self.libraries.get(key)
+        if library is None or not library.isCurrent():
+            return None
+        return library
+
+    def register(self, key: tuple, library: LoadedLibrary):
+        # Interpreters loading the same library at the same time each store an equivalent one, the last one is kept
+        if library.isShareable():
+            self.libraries[key] = library
+
+    def clear(self):
+        self.libraries = {}
+
+
+sharedLibraries = ModuleRegistry()
+"""The registry of the process"""
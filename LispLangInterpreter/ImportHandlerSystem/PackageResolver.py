@@ -5,7 +5,8 @@ from typing import List
 
 from .LibraryClasses import Searchable, Leaf, Folder, LispPackage, PythonPackage, Library, LibraryWithFallback
 from .placeholderConfigs import libraryFallbackWord
-from ..Config.langConfig import extension, lispPackageFile
+from ..Config.Interpreter import Interpreter
+from ..Config.langConfig import extension, lispPackageFile, compiledCacheFolder
 from os import listdir as __listdir
 from os.path import isfile, join, basename
 
@@ -24,7 +25,7 @@ Relative import functionally is thus unnecessary. Sibling packages act as if the
 
 def listdir(folder):
     items = __listdir(folder)
-    return [x for x in items if x != "__pycache__"]
+    return [x for x in items if x not in ["__pycache__", compiledCacheFolder]]
 
 
 def getFoldersIn(folder: str):
@@ -90,7 +91,7 @@ def makeAbs(path):
     return os.path.join(os.path.abspath(os.getcwd()), path)
 
 
-def mapLibrary(libraryConfig) -> Library | LibraryWithFallback:
+def mapLibrary(libraryConfig, interpreter: Interpreter) -> Library | LibraryWithFallback:
     if "path" in libraryConfig.keys():
         primaryPath = makeAbs(libraryConfig["path"])
     elif "abspath" in libraryConfig.keys():
@@ -99,7 +100,7 @@ def mapLibrary(libraryConfig) -> Library | LibraryWithFallback:
         raise Exception("No primary folder found")
     mappedChildren = genericMapLispFolder(primaryPath)
     if libraryFallbackWord not in libraryConfig.keys():
-        return Library(primaryPath, mappedChildren).fixChildren()
+        return Library(primaryPath, mappedChildren, interpreter).fixChildren()
     else:
-        fallback = mapLibrary(libraryConfig[libraryFallbackWord])
-        return LibraryWithFallback(primaryPath, mappedChildren, fallback)
+        fallback = mapLibrary(libraryConfig[libraryFallbackWord], interpreter)
+        return LibraryWithFallback(primaryPath, mappedChildren, fallback, interpreter)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import importlib
+import io
+import json
+import os
+import pickle
+
+from ..Config.Interpreter import Interpreter
+from .CompileStatus import CompileStatus
+from .LibraryClasses import Searchable, Leaf, Container, LoadedLibrary
+from .ModuleRegistry import readSourceHash
+from .PackageResolver import listdir
+
+"""
+Snapshots of warmed up interpreters.
+Starting an interpreter maps the library folders, imports the python modules of the system handlers, and parses and
+evaluates every library the main file imports. A snapshot is a pickled interpreter after it ran the main file once,
+so a later start with the same config only reads the snapshot and runs the main file.
+Libraries that export mutable values are left out, as their state changed while the main file ran, they are loaded
+again when they are imported. Python library files can't be pickled either, they are loaded again when imported.
+The snapshot records the source hash of every file and the contents of every folder of the libraries, and is not used
+when any of them changed.
+"""
+
+snapshotVersion = 1
+
+
+def searchablesIn(searchable: Searchable):
+    yield searchable
+    if isinstance(searchable, Container):
+        for i in searchable.children.values():
+            yield from searchablesIn(i)
+    fallback = getattr(searchable, "fallback", None)
+    if fallback is not None:
+        yield from searchablesIn(fallback)
+
+
+def snapshotConfig(interpreter: Interpreter) -> str:
+    """The config the snapshot is made for, any main file can be run from it"""
+    config = {k: v for k, v in interpreter.runtimeConfig.items() if k != "mainFile"}
+    return json.dumps([config, os.getcwd()], sort_keys=True, default=str)
+
+
+def snapshotHeader(interpreter: Interpreter) -> dict:
+    searchables = list(searchablesIn(interpreter.currentFileSystem))
+    return {
+        "version": snapshotVersion,
+        "config": snapshotConfig(interpreter),
+        "modules": list(interpreter.modules.keys()),
+        "sources": {x.absPath: readSourceHash(x.absPath) for x in searchables if isinstance(x, Leaf)},
+        "folders": {x.absPath: sorted(listdir(x.absPath)) for x in searchables if isinstance(x, Container)},
+    }
+
+
+def isCurrent(header: dict, interpreter: Interpreter) -> bool:
+    """Whether the snapshot with this header is made for the config of the interpreter and its files didn't change"""
+    if header["version"] != snapshotVersion or header["config"] != snapshotConfig(interpreter):
+        return False
+    try:
+        return all(readSourceHash(path) == sourceHash for path, sourceHash in header["sources"].items()) and \
+            all(sorted(listdir(path)) == entries for path, entries in header["folders"].items())
+    except OSError:
+        return False
+
+
+def forget(leaf: Leaf):
+    leaf.compileStatus = CompileStatus.Uncompiled
+    leaf.data = None
+    leaf.libraryDict = None
+
+
+def saveSnapshot(interpreter: Interpreter, path: str):
+    """Writes a snapshot of an interpreter that ran its main file, the interpreter can't be used afterwards"""
+    for searchable in searchablesIn(interpreter.currentFileSystem):
+        if not isinstance(searchable, Leaf) or searchable.compileStatus != CompileStatus.Compiled:
+            continue
+        if not searchable.isLisp or searchable.libraryDict is None or \
+                not LoadedLibrary(searchable.data, searchable.libraryDict, {}).isShareable():
+            # Python modules, the main file, and libraries whose state may have changed
+            forget(searchable)
+    header = snapshotHeader(interpreter)
+    with open(path, "wb") as f:
+        pickle.dump(header, f)
+        pickle.dump(interpreter, f)
+
+
+def loadSnapshot(path: str, interpreter: Interpreter) -> Interpreter | None:
+    """
+    Loads a snapshot made with the config of the given interpreter
+    :param interpreter: Interpreter with the config to run, which is not changed
+    :return: The interpreter of the snapshot, with the config of the given interpreter, or None if there is no
+    snapshot or it is out of date
+    """
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as f:
+        snapshot = io.BytesIO(f.read())
+    header = pickle.load(snapshot)
+    if not isCurrent(header, interpreter):
+        return None
+    # The system handlers are pickled by the file that defines them, which is found through the imported module
+    for module in header["modules"]:
+        importlib.import_module(module)
+    loaded: Interpreter = pickle.load(snapshot)
+    loaded.runtimeConfig = interpreter.runtimeConfig
+    return loaded
@@ -0,0 +1,14 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "ref"]] [quote ref]
+__import [list ["StandardLibrary" "get"]] [quote get]
+__import [list ["StandardLibrary" "set"]] [quote set]
+
+//Mutable, so every interpreter loads its own copy of this library
+let count [ref 0]
+
+let increment [lambda [n] [set count [sum [get count] n]]]
+
+list [
+    [list ["count" count]]
+    [list ["increment" increment]]
+]
@@ -0,0 +1,7 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+
+let f [lambda [x] [sum x 1]]
+
+list [
+    [list ["f" f]]
+]
@@ -0,0 +1 @@
+12
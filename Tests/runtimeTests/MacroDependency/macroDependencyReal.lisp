@@ -0,0 +1,8 @@
+__import [list ["MacroHelpers" "f"]] [quote f]
+
+//Expanded to the value f returns when the macros are expanded
+macro answer outerScope ast [
+    list [[f 2]]
+]
+
+answer
@@ -1,12 +1,25 @@
+import asyncio
+import contextlib
+import io
 import os
+import shutil
+import tempfile
+import threading
+try:
+    import resource
+except ImportError:
+    # Not available on windows
+    resource = None
 
 from termcolor import cprint
 
-from LispLangInterpreter.Config import Singletons
+from LispLangInterpreter.Config.Interpreter import Interpreter
 from LispLangInterpreter.DataStructures.Classes import RuntimeEvaluationError, StackFrame
 from LispLangInterpreter.Evaluator.EvaluatorCode import Eval
 from LispLangInterpreter.Evaluator.SupportFunctions import toAST
-from LispLangInterpreter.Evaluator.runFile import executeLeaf, start
+from LispLangInterpreter.Evaluator.Tracing import Tracer, StepCounter
+from LispLangInterpreter.Evaluator.runFile import executeLeaf, start, startAsync, startFromSnapshot, resume, compileAll
+from LispLangInterpreter.ImportHandlerSystem.Snapshot import loadSnapshot
 from LispLangInterpreter.ImportHandlerSystem.LibraryClasses import Leaf
 from Tests.ParseTests.TestRunner import tokenizeParse
 
@@ -26,15 +39,254 @@ def runtimeTest(catchErrors, config, folder, inputfile, expectedfile, testName):
             print("")
 
 
-def runtimeTestInternal(config, folder, inputfile, expectedfile, testName):
-    config["path"] = folder
-    config["mainFile"] = inputfile
-    Singletons.runtimeConfig = config
-    ranCode = start()
-    config["mainFile"] = expectedfile
-    Singletons.runtimeConfig = config
-    Singletons.debug = False
-    evaluatedExpected = start()
+def runtimeErrorTest(config, folder, inputfile, testName, expectedError):
+    """Runtime test that passes if running the input file throws an error with the expected text in its message"""
+    interpreter = Interpreter(dict(config, path=folder, mainFile=inputfile))
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            start(interpreter)
+    except RuntimeEvaluationError:
+        if expectedError in output.getvalue():
+            cprint(testName + " passed", "green")
+        else:
+            cprint(testName + " failed, the error didn't mention '" + expectedError + "':", "red")
+            print(output.getvalue())
+        return
+    cprint(testName + " failed, no error was thrown", "red")
+    print("")
+
+
+def asyncRuntimeTest(config, folder, inputfile, expectedfile, testName):
+    """Runtime test that runs the input file with the async driver, the expected file is run like usual"""
+    try:
+        runtimeTestInternal(config, folder, inputfile, expectedfile, testName, runAsync=True)
+    except RuntimeEvaluationError:
+        cprint("Runtime error while executing Tests '" + testName + "'", "red")
+        print("")
+
+
+def concurrentRuntimeTest(folder, tests, testName):
+    """
+    Runs runtime tests at the same time, each in its own thread with its own interpreters
+    :param tests: Config, input file, expected file and name of each test
+    """
+    threads = [threading.Thread(target=runtimeTest, args=(True, config, folder, inputfile, expectedfile,
+                                                          name + ", " + testName))
+               for config, inputfile, expectedfile, name in tests]
+    for i in threads:
+        i.start()
+    for i in threads:
+        i.join()
+
+
+def snapshotRuntimeTest(config, folder, inputfile, expectedfile, testName):
+    """Runtime test that runs the input file twice with a snapshot, first making the snapshot, then starting from it"""
+    snapshotPath = os.path.join(tempfile.mkdtemp(), "test.snapshot")
+    try:
+        runtimeTestInternal(config, folder, inputfile, expectedfile, testName + ", making snapshot",
+                            snapshotPath=snapshotPath)
+        if loadSnapshot(snapshotPath, Interpreter(dict(config, path=folder, mainFile=inputfile))) is None:
+            cprint(testName + " failed, the snapshot it made can't be loaded", "red")
+            print("")
+            return
+        runtimeTestInternal(config, folder, inputfile, expectedfile, testName + ", from snapshot",
+                            snapshotPath=snapshotPath)
+    except RuntimeEvaluationError:
+        cprint("Runtime error while executing Tests '" + testName + "'", "red")
+        print("")
+    finally:
+        if os.path.isfile(snapshotPath):
+            os.remove(snapshotPath)
+        os.rmdir(os.path.dirname(snapshotPath))
+
+
+def checkpointRuntimeTest(config, folder, inputfile, expectedfile, testName, checkpointEvery):
+    """Runtime test that writes checkpoints while running the input file, then resumes it from the last checkpoint"""
+    checkpointPath = os.path.join(tempfile.mkdtemp(), "test.checkpoint")
+    config = dict(config, checkpointEvery=checkpointEvery, checkpointPath=checkpointPath)
+    try:
+        runtimeTestInternal(config, folder, inputfile, expectedfile, testName + ", writing checkpoints")
+        if not os.path.isfile(checkpointPath):
+            cprint(testName + " failed, no checkpoint was written", "red")
+            print("")
+            return
+        runtimeTestInternal(config, folder, inputfile, expectedfile, testName + ", resumed",
+                            resumeFrom=checkpointPath)
+    except RuntimeEvaluationError:
+        cprint("Runtime error while executing Tests '" + testName + "'", "red")
+        print("")
+    finally:
+        if os.path.isfile(checkpointPath):
+            os.remove(checkpointPath)
+        os.rmdir(os.path.dirname(checkpointPath))
+
+
+def compiledDependencyRuntimeTest(config, folder, inputfile, expectedfile, testName, dependency, changedDependency):
+    """
+    Runtime test that compiles a copy of the folder with macros expanded ahead of time, then replaces a file the
+    macros use with another file before running the input file, which must use the changed file
+    """
+    copy = os.path.join(tempfile.mkdtemp(), "compiled")
+    shutil.copytree(folder, copy)
+    config = dict(config, expandMacrosAheadOfTime=True)
+    try:
+        compileAll(Interpreter(dict(config, path=copy, mainFile=inputfile)))
+        shutil.copyfile(os.path.join(copy, changedDependency), os.path.join(copy, dependency))
+        runtimeTestInternal(config, copy, inputfile, expectedfile, testName)
+    except RuntimeEvaluationError:
+        cprint("Runtime error while executing Tests '" + testName + "'", "red")
+        print("")
+    finally:
+        shutil.rmtree(os.path.dirname(copy))
+
+
+class EventCounter(Tracer):
+    """Counts the events of every kind"""
+
+    def __init__(self):
+        self.counts = {"step": 0, "call": 0, "return": 0, "effect": 0, "macroExpand": 0}
+
+    def onStep(self, frame):
+        self.counts["step"] += 1
+
+    def onCall(self, frame, function, arguments):
+        self.counts["call"] += 1
+
+    def onReturn(self, frame, value):
+        self.counts["return"] += 1
+
+    def onEffect(self, frame, name, arguments):
+        self.counts["effect"] += 1
+
+    def onMacroExpand(self, frame, name, macro):
+        self.counts["macroExpand"] += 1
+
+
+def tracedRuntimeTest(config, folder, inputfile, expectedfile, testName, expectedEvents):
+    """
+    Runtime test that runs the input file with a tracer, which must not change the result
+    :param expectedEvents: Kinds of events that must have been traced at least once
+    """
+    tracer = EventCounter()
+    try:
+        runtimeTestInternal(config, folder, inputfile, expectedfile, testName + ", traced", tracer=tracer)
+    except RuntimeEvaluationError:
+        cprint("Runtime error while executing Tests '" + testName + "'", "red")
+        print("")
+        return
+    missing = [x for x in expectedEvents if tracer.counts[x] == 0]
+    if len(missing) == 0:
+        cprint(testName + " traced all expected events", "green")
+    else:
+        cprint(testName + " failed, no " + ", ".join(missing) + " events were traced, counts: " + str(tracer.counts),
+               "red")
+        print("")
+
+
+def stepLimitRuntimeTest(config, folder, inputfile, expectedfile, testName, maxSteps, compileFirst=False):
+    """
+    Runtime test that also fails if running the input file takes more than maxSteps evaluator steps
+    :param compileFirst: Whether a copy of the folder is compiled ahead of time first, so the steps spent expanding
+    and optimizing the code are not counted
+    """
+    tracer = StepCounter()
+    copy = None
+    try:
+        if compileFirst:
+            copy = os.path.join(tempfile.mkdtemp(), "compiled")
+            shutil.copytree(folder, copy)
+            compileAll(Interpreter(dict(config, path=copy, mainFile=inputfile)))
+            folder = copy
+        runtimeTestInternal(config, folder, inputfile, expectedfile, testName, tracer=tracer)
+    except RuntimeEvaluationError:
+        cprint("Runtime error while executing Tests '" + testName + "'", "red")
+        print("")
+        return
+    finally:
+        if copy is not None:
+            shutil.rmtree(os.path.dirname(copy))
+    if tracer.steps <= maxSteps:
+        cprint(testName + " passed within " + str(maxSteps) + " steps", "green")
+    else:
+        cprint(testName + " failed, took " + str(tracer.steps) + " steps, limit is " + str(maxSteps), "red")
+        print("")
+
+
+class CallCounter(Tracer):
+    """Counts the calls of the functions with one name"""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+
+    def onCall(self, frame, function, arguments):
+        if function.dereferencedName == self.name:
+            self.calls += 1
+
+
+def callLimitRuntimeTest(config, folder, inputfile, expectedfile, testName, functionName, maxCalls):
+    """Runtime test that also fails if the input file calls functions with the name more than maxCalls times"""
+    tracer = CallCounter(functionName)
+    try:
+        runtimeTestInternal(config, folder, inputfile, expectedfile, testName, tracer=tracer)
+    except RuntimeEvaluationError:
+        cprint("Runtime error while executing Tests '" + testName + "'", "red")
+        print("")
+        return
+    if tracer.calls <= maxCalls:
+        cprint(testName + " passed with at most " + str(maxCalls) + " calls of " + functionName, "green")
+    else:
+        cprint(testName + " failed, " + functionName + " was called " + str(tracer.calls) + " times, limit is " +
+               str(maxCalls), "red")
+        print("")
+
+
+class FrameDepthTracer(Tracer):
+    """Keeps the deepest chain of parent frames seen before any step, counting up to the limit plus one"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.maxDepth = 0
+
+    def onStep(self, frame):
+        depth = 0
+        while frame is not None and depth <= self.limit:
+            depth += 1
+            frame = frame.parent
+        self.maxDepth = max(self.maxDepth, depth)
+
+
+def boundedDepthRuntimeTest(config, folder, inputfile, expectedfile, testName, maxDepth):
+    """Runtime test that also fails if a frame of the input file and its parents are ever more than maxDepth frames"""
+    tracer = FrameDepthTracer(maxDepth)
+    try:
+        runtimeTestInternal(config, folder, inputfile, expectedfile, testName, tracer=tracer)
+    except RuntimeEvaluationError:
+        cprint("Runtime error while executing Tests '" + testName + "'", "red")
+        print("")
+        return
+    if tracer.maxDepth <= maxDepth:
+        cprint(testName + " passed within a depth of " + str(maxDepth) + " frames", "green")
+    else:
+        cprint(testName + " failed, frames were more than " + str(maxDepth) + " deep", "red")
+        print("")
+
+
+def runtimeTestInternal(config, folder, inputfile, expectedfile, testName, runAsync=False, snapshotPath=None,
+                        resumeFrom=None, tracer=None):
+    interpreter = Interpreter(dict(config, path=folder, mainFile=inputfile))
+    interpreter.tracer = tracer
+    if resumeFrom is not None:
+        ranCode = resume(resumeFrom)
+    elif runAsync:
+        ranCode = asyncio.run(startAsync(interpreter))
+    elif snapshotPath is not None:
+        ranCode = startFromSnapshot(snapshotPath, interpreter)
+    else:
+        ranCode = start(interpreter)
+    # Checkpoints of the expected file would replace those of the input file
+    evaluatedExpected = start(Interpreter(dict(config, path=folder, mainFile=expectedfile, checkpointEvery=None)))
 
     realSer = ranCode.serializeLLQ()
     expSer = evaluatedExpected.serializeLLQ()
@@ -46,3 +298,23 @@ def runtimeTestInternal(config, folder, inputfile, expectedfile, testName):
         cprint("Expected:" + expSer, "red")
         cprint("Actual  :" + realSer, "red")
         print("")
+
+
+def constantMemoryRuntimeTest(config, folder, inputfile, expectedfile, testName, memoryLimit):
+    """
+    Runtime test that also fails if running it grows the peak memory of the process by more than the memory limit.
+    :param memoryLimit: Limit in kilobytes
+    """
+    if resource is None:
+        runtimeTest(False, config, folder, inputfile, expectedfile, testName)
+        cprint(testName + " memory check skipped, peak memory can't be measured on this platform", "yellow")
+        return
+    peakBefore = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    runtimeTest(False, config, folder, inputfile, expectedfile, testName)
+    growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - peakBefore
+    if growth <= memoryLimit:
+        cprint(testName + " passed in constant memory", "green")
+    else:
+        cprint(testName + " failed, peak memory grew by " + str(growth) + "kb, limit is " + str(memoryLimit) + "kb",
+               "red")
+        print("")
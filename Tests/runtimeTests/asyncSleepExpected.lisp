@@ -0,0 +1 @@
+list [1 2 [list [0 2 1]]]
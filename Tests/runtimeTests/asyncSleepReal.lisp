@@ -0,0 +1,21 @@
+__import [list ["StandardLibrary" "concat"]] [quote concat]
+__import [list ["StandardLibrary" "ref"]] [quote ref]
+__import [list ["StandardLibrary" "get"]] [quote get]
+__import [list ["StandardLibrary" "set"]] [quote set]
+__import [list ["StandardLibrary" "spawn"]] [quote spawn]
+__import [list ["StandardLibrary" "join"]] [quote join]
+__import [list ["StandardLibrary" "sleep"]] [quote sleep]
+
+let log [ref [list [0]]]
+
+let sleeper [lambda [id seconds] [
+    ignore [sleep seconds]
+    ignore [set log [concat [get log] [list [id]]]]
+    id
+    ]
+]
+
+let slow [spawn [lambda [start] [sleeper 1 0.2]]]
+let fast [spawn [lambda [start] [sleeper 2 0.01]]]
+
+list [[join slow] [join fast] [get log]]
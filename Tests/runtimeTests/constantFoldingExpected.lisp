@@ -0,0 +1 @@
+list [3 "hello" 7 6 11]
\ No newline at end of file
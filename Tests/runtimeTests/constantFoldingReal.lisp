@@ -0,0 +1,10 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+__import [list ["StandardLibrary" "concat"]] [quote concat]
+
+let three [sum 1 2]
+let greeting [concat "hel" "lo"]
+let shadowed [lambda [three] [sum three 1]]
+let pick [lambda [x] [cond [equals three 3] [sum x three] [sum x "not a number"]]]
+
+list [three greeting [pick 4] [cond false 1 [sum three three]] [shadowed 10]]
@@ -0,0 +1 @@
+200010000
@@ -0,0 +1,9 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+
+let triangle [lambda [self n] [
+    cond [equals n 0] 0 [sum n [self self [sum n -1]]]
+    ]
+]
+
+triangle triangle 20000
@@ -0,0 +1 @@
+list [1 [list [[quote caller] unit]]]
@@ -0,0 +1,25 @@
+__import [list ["StandardLibrary" "handlerInvocationDefinition"]] [quote handlerInvocationDefinition]
+__import [list ["StandardLibrary" "head"]] [quote head]
+__import [list ["StandardLibrary" "tail"]] [quote tail]
+__import [list ["StandardLibrary" "stop"]] [quote stop]
+let yield [handlerInvocationDefinition [quote yield] 1]
+let abort [handlerInvocationDefinition [quote abort] 1]
+
+let body [lambda [n] [
+    ignore [yield n]
+    abort n
+    ]
+]
+
+let captureHandler [lambda [state value continuation] [stop [list [value continuation]] state]]
+let abortHandler [lambda [state value] [stop [quote captureSite] state]]
+let callerAbort [lambda [state value] [stop [quote caller] state]]
+
+let captured [handle
+    [handle [body 1] [list [[list [[quote yield] captureHandler]]]] unit]
+    [list [[list [[quote abort] abortHandler]]]] unit]
+let yielded [head [head captured]]
+let continuation [head [tail yielded]]
+
+let resumed [handle [continuation unit] [list [[list [[quote abort] callerAbort]]]] unit]
+list [[head yielded] resumed]
@@ -0,0 +1 @@
+list [10 11 1]
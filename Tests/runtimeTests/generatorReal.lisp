@@ -0,0 +1,21 @@
+__import [list ["StandardLibrary" "handlerInvocationDefinition"]] [quote handlerInvocationDefinition]
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "head"]] [quote head]
+__import [list ["StandardLibrary" "tail"]] [quote tail]
+__import [list ["StandardLibrary" "stop"]] [quote stop]
+let yield [handlerInvocationDefinition [quote yield] 1]
+
+let numbers [lambda [n] [
+    ignore [yield n]
+    ignore [yield [sum n 1]]
+    0
+    ]
+]
+
+let captureHandler [lambda [state value continuation] [stop [list [value continuation]] [sum state 1]]]
+
+let first [handle [numbers 10] [list [[list [[quote yield] captureHandler]]]] 0]
+let yielded [head first]
+let second [[head [tail yielded]] unit]
+
+list [[head yielded] [head second] [head [tail first]]]
@@ -0,0 +1 @@
+list [[list ["stopped" [list [0 1 2 3]]]] [list [2 [list [0 1 2]]]]]
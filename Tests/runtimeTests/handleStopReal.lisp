@@ -0,0 +1,29 @@
+__import [list ["StandardLibrary" "handlerInvocationDefinition"]] [quote handlerInvocationDefinition]
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+__import [list ["StandardLibrary" "concat"]] [quote concat]
+__import [list ["StandardLibrary" "tail"]] [quote tail]
+__import [list ["StandardLibrary" "continue"]] [quote continue]
+__import [list ["StandardLibrary" "stop"]] [quote stop]
+let yield [handlerInvocationDefinition [quote yield] 1]
+
+let countTo [lambda [self n limit] [
+    ignore [yield n]
+    cond [equals n limit]
+        n
+        [self self [sum n 1] limit]
+    ]
+]
+
+let yieldHandler [lambda [state value] [
+    let state [concat state [list [value]]]
+    cond [equals value 3]
+        [stop "stopped" state]
+        [continue unit state]
+    ]
+]
+
+list [
+    [handle [countTo countTo 0 10] [list [[list [[quote yield] yieldHandler]]]] [tail [list [0]]]]
+    [handle [countTo countTo 0 2] [list [[list [[quote yield] yieldHandler]]]] [tail [list [0]]]]
+]
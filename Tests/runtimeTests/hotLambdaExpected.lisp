@@ -0,0 +1 @@
+list [100 200]
\ No newline at end of file
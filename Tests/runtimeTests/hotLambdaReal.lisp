@@ -0,0 +1,14 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+
+let adder [lambda [k] [lambda [x] [sum x k]]]
+let repeat [lambda [self f n acc] [
+    cond [equals n 0]
+        acc
+        [self self f [sum n -1] [f acc]]
+    ]
+]
+
+let first [repeat repeat [adder 1] 100 0]
+let second [repeat repeat [adder 2] 100 0]
+list [first second]
@@ -0,0 +1 @@
+list [1 "effect"]
\ No newline at end of file
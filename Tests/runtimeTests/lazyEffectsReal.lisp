@@ -0,0 +1,16 @@
+__import [list ["StandardLibrary" "handlerInvocationDefinition"]] [quote handlerInvocationDefinition]
+__import [list ["StandardLibrary" "concat"]] [quote concat]
+__import [list ["StandardLibrary" "continue"]] [quote continue]
+let print [handlerInvocationDefinition [quote print] 1]
+
+//Performs its effect through a user lambda, so the argument must stay eager even though it is never used
+let log [lambda [x] [print x]]
+let first [lambda [a b] a]
+
+let printHandler [lambda [state toPrint] [
+    let state [concat state toPrint]
+    continue unit state
+    ]
+]
+
+handle [first 1 [log "effect"]] [list [[list [[quote print] printHandler]]]] ""
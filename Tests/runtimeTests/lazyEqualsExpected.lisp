@@ -0,0 +1 @@
+list [true true false]
@@ -0,0 +1,6 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+
+let pair [lambda [a b] [list [a b]]]
+
+list [[equals [pair 1 [sum 1 1]] [list [1 2]]] [equals [list [1 2]] [pair 1 [sum 1 1]]] [equals [pair 1 2] [pair 1 3]]]
@@ -0,0 +1 @@
+list [[list [10 11 12 13 14]] 1]
\ No newline at end of file
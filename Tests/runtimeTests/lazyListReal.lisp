@@ -0,0 +1,18 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+__import [list ["StandardLibrary" "head"]] [quote head]
+__import [list ["StandardLibrary" "tail"]] [quote tail]
+__import [list ["StandardLibrary" "concat"]] [quote concat]
+
+let numbersFrom [lambda [self n] [list [n [self self [sum n 1]]]]]
+
+let take [lambda [self count numbers] [
+    cond [equals count 0]
+        [tail [list [count]]]
+        [concat [list [[head numbers]]] [self self [sum count -1] [head [tail numbers]]]]
+    ]
+]
+
+let first [lambda [a b] a]
+
+list [[take take 5 [numbersFrom numbersFrom 10]] [first 1 [take take -1 [numbersFrom numbersFrom 0]]]]
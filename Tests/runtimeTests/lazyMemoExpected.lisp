@@ -0,0 +1 @@
+1200
\ No newline at end of file
@@ -0,0 +1,5 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+let count [lambda [self n] [cond [equals n 0] 0 [sum 1 [self self [sum n -1]]]]]
+//Uses the argument four times, which must evaluate it only once
+[lambda [x] [sum [sum x x] [sum x x]]] [count count 300]
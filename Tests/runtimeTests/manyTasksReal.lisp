@@ -0,0 +1,11 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+__import [list ["StandardLibrary" "spawn"]] [quote spawn]
+__import [list ["StandardLibrary" "join"]] [quote join]
+
+let loop [lambda [self n] [
+    cond [equals n 100000] n [self self [join [spawn [lambda [start] [sum n 1]]]]]
+    ]
+]
+
+loop loop 0
@@ -0,0 +1 @@
+list [[list [[list [2 0 3 1]] [list [1 3 0 2]]]] unit]
@@ -0,0 +1 @@
+list [5050 5050 "unchanged"]
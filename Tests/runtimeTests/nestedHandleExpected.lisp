@@ -0,0 +1 @@
+list [[list [12 22]] 111]
@@ -0,0 +1,18 @@
+__import [list ["StandardLibrary" "handlerInvocationDefinition"]] [quote handlerInvocationDefinition]
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "continue"]] [quote continue]
+let inner [handlerInvocationDefinition [quote inner] 1]
+let outer [handlerInvocationDefinition [quote outer] 1]
+
+let work [lambda [x] [
+    ignore [inner x]
+    ignore [outer [sum x 1]]
+    inner [sum x 2]
+    ]
+]
+
+let countHandler [lambda [state value] [continue value [sum state value]]]
+
+handle [
+    handle [work 10] [list [[list [[quote inner] countHandler]]]] 0
+] [list [[list [[quote outer] countHandler]] [list [[quote inner] countHandler]]]] 100
@@ -0,0 +1 @@
+list [3 4 5]
@@ -0,0 +1,6 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "pmap"]] [quote pmap]
+
+let addAll [lambda [k items] [pmap [lambda [x] [sum x k]] items]]
+
+addAll [sum 1 1] [list [1 2 3]]
@@ -0,0 +1,4 @@
+__import [list ["StandardLibrary" "pmap"]] [quote pmap]
+__import [list ["StandardLibrary" "get"]] [quote get]
+
+pmap [lambda [n] [get n]] [list [1 2 3]]
@@ -0,0 +1 @@
+list [1001 1003 1006 1010 1015 1021 1028 1036 1045 1055]
@@ -0,0 +1,8 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+__import [list ["StandardLibrary" "pmap"]] [quote pmap]
+
+let triangle [lambda [self n] [cond [equals n 0] 0 [sum n [self self [sum n -1]]]]]
+let offset 1000
+
+pmap [lambda [n] [sum offset [triangle triangle n]]] [list [1 2 3 4 5 6 7 8 9 10]]
@@ -0,0 +1 @@
+list [2 3 15 4]
\ No newline at end of file
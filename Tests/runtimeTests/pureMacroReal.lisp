@@ -0,0 +1,14 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "tail"]] [quote tail]
+__import [list ["StandardLibrary" "head"]] [quote head]
+__import [list ["StandardLibrary" "concat"]] [quote concat]
+
+puremacro flip outerScope ast [
+    let front [tail ast]
+    let end [head ast]
+    concat front [list [end]]
+]
+
+let increment [lambda [x] [flip 1 sum x]]
+
+list [[increment 1] [increment 2] [flip 10 sum 5] [increment 3]]
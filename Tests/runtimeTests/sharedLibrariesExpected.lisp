@@ -0,0 +1 @@
+list [7 3]
\ No newline at end of file
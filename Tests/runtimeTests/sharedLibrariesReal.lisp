@@ -0,0 +1,9 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "get"]] [quote get]
+__import [list ["Counter" "count"]] [quote count]
+__import [list ["Counter" "increment"]] [quote increment]
+
+ignore [increment 5]
+ignore [increment 2]
+
+list [[get count] [sum 1 2]]
@@ -0,0 +1 @@
+100000
@@ -0,0 +1,9 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+
+let loop [lambda [self n] [
+    cond [equals n 100000] n [self self [sum n 1]]
+    ]
+]
+
+loop loop 0
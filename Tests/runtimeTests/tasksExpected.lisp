@@ -0,0 +1 @@
+list [101 102 [list [0 1 2 1 2 1 2]]]
@@ -0,0 +1,27 @@
+__import [list ["StandardLibrary" "sum"]] [quote sum]
+__import [list ["StandardLibrary" "equals"]] [quote equals]
+__import [list ["StandardLibrary" "concat"]] [quote concat]
+__import [list ["StandardLibrary" "ref"]] [quote ref]
+__import [list ["StandardLibrary" "get"]] [quote get]
+__import [list ["StandardLibrary" "set"]] [quote set]
+__import [list ["StandardLibrary" "spawn"]] [quote spawn]
+__import [list ["StandardLibrary" "join"]] [quote join]
+__import [list ["StandardLibrary" "yield"]] [quote yield]
+
+let log [ref [list [0]]]
+
+let worker [lambda [self id n] [
+    cond [equals n 0]
+        [sum id 100]
+        [
+            ignore [set log [concat [get log] [list [id]]]]
+            ignore [yield unit]
+            self self id [sum n -1]
+        ]
+    ]
+]
+
+let first [spawn [lambda [start] [worker worker 1 3]]]
+let second [spawn [lambda [start] [worker worker 2 3]]]
+
+list [[join first] [join second] [get log]]
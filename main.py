@@ -1,10 +1,32 @@
-from LispLangInterpreter.Evaluator.runFile import start
-
-if __name__ == '__main__':
-    # main("", "eval", "testcode.lisp")
-    #main(*sys.argv)
-    data = start()
-    print(data.serializeLLQ())
-    pass
+import argparse
 
+from LispLangInterpreter.Config import Singletons
+from LispLangInterpreter.Evaluator.Tracing import DebugPrinter
+from LispLangInterpreter.Evaluator.runFile import start, compileAll, startFromSnapshot, resume
 
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--compile", action="store_true",
+                        help="Ahead of time compile all configured lisp libraries instead of running the main file")
+    parser.add_argument("--snapshot", nargs="?", const="interpreter.snapshot",
+                        help="Start from a snapshot of the interpreter with its libraries loaded, which is made when "
+                             "it doesn't exist or any library file changed")
+    parser.add_argument("--resume", metavar="CHECKPOINT",
+                        help="Continue a program from a checkpoint it wrote, set checkpointEvery in the config to "
+                             "write checkpoints")
+    parser.add_argument("--debug", action="store_true",
+                        help="Print the stack before every step of the evaluator")
+    arguments = parser.parse_args()
+    if arguments.debug:
+        Singletons.interpreter.tracer = DebugPrinter()
+    if arguments.compile:
+        compileAll()
+    elif arguments.resume:
+        data = resume(arguments.resume)
+        print(data.serializeLLQ())
+    elif arguments.snapshot:
+        data = startFromSnapshot(arguments.snapshot)
+        print(data.serializeLLQ())
+    else:
+        data = start()
+        print(data.serializeLLQ())
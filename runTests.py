@@ -1,6 +1,7 @@
 from functools import partial
 import json
 import os
+import sys
 
 from LispLangInterpreter.Evaluator.runFile import getConfig
 print("Current Working Directory:", os.getcwd())
@@ -11,7 +12,10 @@ from LispLangInterpreter.Parser.ParserCombinator import ParseError
 from Tests.ParseTests.TestRunner import parseTest, parseErrorTest
 #
 from Tests.ParseTests import test1Expected, EOFCommentExpected
-from Tests.runtimeTests.TestRunner import runtimeTest
+from Tests.runtimeTests.TestRunner import runtimeTest, constantMemoryRuntimeTest, asyncRuntimeTest, \
+    concurrentRuntimeTest, snapshotRuntimeTest, checkpointRuntimeTest, tracedRuntimeTest, \
+    stepLimitRuntimeTest, boundedDepthRuntimeTest, callLimitRuntimeTest, runtimeErrorTest, \
+    compiledDependencyRuntimeTest
 import os
 
 testConfig = json.loads(open("Tests/testconfig.json", encoding="utf8").read())
@@ -34,6 +38,113 @@ runtimeTest(False, testConfig, "Tests/runtimeTests", "sumtest1real", "sumtest1ex
 runtimeTest(False, testConfig, "Tests/runtimeTests", "sumtest2real", "sumtest2expected", "Sum test 2")
 runtimeTest(False, testConfig, "Tests/runtimeTests", "listEvaluationReal", "listEvaluationExpected", "List evaluation test")
 runtimeTest(False, testConfig, "Tests/runtimeTests", "handleTest1Real", "handleTest1Expected", "Handle test")
+runtimeTest(False, testConfig, "Tests/runtimeTests", "nativeStateReal", "nativeStateExpected", "Native state effect test")
+runtimeTest(False, testConfig, "Tests/runtimeTests", "handleStopReal", "handleStopExpected", "Handle stop test")
+runtimeTest(False, testConfig, "Tests/runtimeTests", "multiShotReal", "multiShotExpected", "Multi-shot continuation test")
+runtimeTest(False, testConfig, "Tests/runtimeTests", "generatorReal", "generatorExpected", "Generator test")
+runtimeTest(False, testConfig, "Tests/runtimeTests", "delimitedContinuationReal", "delimitedContinuationExpected", "Continuation resumed in another handle test")
+runtimeTest(False, testConfig, "Tests/runtimeTests", "nestedHandleReal", "nestedHandleExpected", "Nested handle test")
+runtimeTest(False, testConfig, "Tests/runtimeTests", "parallelMapReal", "parallelMapExpected", "Parallel map test")
+runtimeTest(False, dict(testConfig, pmapWorkers=2, pmapChunkSize=3), "Tests/runtimeTests", "parallelMapReal", "parallelMapExpected", "Parallel map test, chunks of 3 on 2 workers")
+runtimeTest(False, testConfig, "Tests/runtimeTests", "parallelMapCapturedReal", "parallelMapCapturedExpected", "Parallel map of a lambda with a captured argument test")
+runtimeErrorTest(testConfig, "Tests/runtimeTests", "parallelMapEffectReal", "Parallel map of an effectful lambda test", "may perform effects")
 
 runtimeTest(False, testConfig, "Tests/runtimeTests", "macroIdentityReal", "macroIdentityExpected", "Identity macro test")
-runtimeTest(False, testConfig, "Tests/runtimeTests", "macroASTShuffleReal", "macroASTShuffleExpected", "Identity ast shuffle test")
\ No newline at end of file
+runtimeTest(False, testConfig, "Tests/runtimeTests", "macroASTShuffleReal", "macroASTShuffleExpected", "Identity ast shuffle test")
+# The macro body is the only code calling tail, and runs once for each of the two places it is used in
+callLimitRuntimeTest(testConfig, "Tests/runtimeTests", "pureMacroReal", "pureMacroExpected", "Pure macro expansion cache test",
+                     "tail", 2)
+runtimeTest(False, testConfig, "Tests/runtimeTests", "constantFoldingReal", "constantFoldingExpected", "Constant folding test")
+runtimeTest(False, testConfig, "Tests/runtimeTests", "hotLambdaReal", "hotLambdaExpected", "Hot lambda test")
+
+aotExpansionConfig = dict(testConfig, expandMacrosAheadOfTime=True)
+runtimeTest(False, aotExpansionConfig, "Tests/runtimeTests", "handleTest1Real", "handleTest1Expected", "Handle test, macros expanded ahead of time")
+runtimeTest(False, aotExpansionConfig, "Tests/runtimeTests", "macroIdentityReal", "macroIdentityExpected", "Identity macro test, macros expanded ahead of time")
+runtimeTest(False, aotExpansionConfig, "Tests/runtimeTests", "macroASTShuffleReal", "macroASTShuffleExpected", "Identity ast shuffle test, macros expanded ahead of time")
+runtimeTest(False, aotExpansionConfig, "Tests/runtimeTests", "pureMacroReal", "pureMacroExpected", "Pure macro test, macros expanded ahead of time")
+compiledDependencyRuntimeTest(testConfig, "Tests/runtimeTests/MacroDependency", "macroDependencyReal", "macroDependencyExpected",
+                              "Changed macro dependency test", "MacroHelpers/package.lisp", "MacroHelpers/changed.lisp")
+
+optimizedConfig = dict(testConfig, expandMacrosAheadOfTime=True, optimize=True)
+runtimeTest(False, optimizedConfig, "Tests/runtimeTests", "sumtest1real", "sumtest1expected", "Sum test 1, optimized")
+runtimeTest(False, optimizedConfig, "Tests/runtimeTests", "sumtest2real", "sumtest2expected", "Sum test 2, optimized")
+runtimeTest(False, optimizedConfig, "Tests/runtimeTests", "listEvaluationReal", "listEvaluationExpected", "List evaluation test, optimized")
+runtimeTest(False, optimizedConfig, "Tests/runtimeTests", "handleTest1Real", "handleTest1Expected", "Handle test, optimized")
+runtimeTest(False, optimizedConfig, "Tests/runtimeTests", "nativeStateReal", "nativeStateExpected", "Native state effect test, optimized")
+runtimeTest(False, optimizedConfig, "Tests/runtimeTests", "parallelMapReal", "parallelMapExpected", "Parallel map test, optimized")
+runtimeTest(False, optimizedConfig, "Tests/runtimeTests", "macroIdentityReal", "macroIdentityExpected", "Identity macro test, optimized")
+runtimeTest(False, optimizedConfig, "Tests/runtimeTests", "macroASTShuffleReal", "macroASTShuffleExpected", "Identity ast shuffle test, optimized")
+runtimeTest(False, optimizedConfig, "Tests/runtimeTests", "pureMacroReal", "pureMacroExpected", "Pure macro test, optimized")
+runtimeTest(False, optimizedConfig, "Tests/runtimeTests", "constantFoldingReal", "constantFoldingExpected", "Constant folding test, optimized")
+stepLimitRuntimeTest(optimizedConfig, "Tests/runtimeTests", "constantFoldingReal", "constantFoldingExpected", "Constant folding step test, optimized", 100, compileFirst=True)
+
+specializingConfig = dict(testConfig, specializeHotLambdas=True)
+runtimeTest(False, specializingConfig, "Tests/runtimeTests", "hotLambdaReal", "hotLambdaExpected", "Hot lambda specialization test")
+runtimeTest(False, specializingConfig, "Tests/runtimeTests", "handleTest1Real", "handleTest1Expected", "Handle test, specializing hot lambdas")
+runtimeTest(False, specializingConfig, "Tests/runtimeTests", "macroIdentityReal", "macroIdentityExpected", "Identity macro test, specializing hot lambdas")
+
+capturingHandlersConfig = dict(testConfig, tailResumptiveHandlers=False)
+runtimeTest(False, capturingHandlersConfig, "Tests/runtimeTests", "handleTest1Real", "handleTest1Expected", "Handle test, capturing continuations")
+runtimeTest(False, capturingHandlersConfig, "Tests/runtimeTests", "handleStopReal", "handleStopExpected", "Handle stop test, capturing continuations")
+runtimeTest(False, capturingHandlersConfig, "Tests/runtimeTests", "multiShotReal", "multiShotExpected", "Multi-shot continuation test, capturing continuations")
+runtimeTest(False, capturingHandlersConfig, "Tests/runtimeTests", "generatorReal", "generatorExpected", "Generator test, capturing continuations")
+runtimeTest(False, capturingHandlersConfig, "Tests/runtimeTests", "delimitedContinuationReal", "delimitedContinuationExpected", "Continuation resumed in another handle test, capturing continuations")
+runtimeTest(False, capturingHandlersConfig, "Tests/runtimeTests", "nestedHandleReal", "nestedHandleExpected", "Nested handle test, capturing continuations")
+
+schedulerConfig = dict(testConfig, schedulerQuantum=50)
+runtimeTest(False, schedulerConfig, "Tests/runtimeTests", "tasksReal", "tasksExpected", "Task scheduling test")
+runtimeTest(False, schedulerConfig, "Tests/runtimeTests", "handleTest1Real", "handleTest1Expected", "Handle test, scheduled")
+runtimeTest(False, dict(schedulerConfig, schedulerQuantum=1), "Tests/runtimeTests", "tasksReal", "tasksExpected", "Task scheduling test, preempting every step")
+asyncRuntimeTest(testConfig, "Tests/runtimeTests", "asyncSleepReal", "asyncSleepExpected", "Async sleep effect test")
+asyncRuntimeTest(testConfig, "Tests/runtimeTests", "tasksReal", "tasksExpected", "Task scheduling test, async driver")
+
+lazyConfig = dict(testConfig, evaluationStrategy="lazy")
+runtimeTest(False, lazyConfig, "Tests/runtimeTests", "lazyListReal", "lazyListExpected", "Infinite lazy list test")
+runtimeTest(False, lazyConfig, "Tests/runtimeTests", "sumtest2real", "sumtest2expected", "Sum test 2, lazy")
+runtimeTest(False, lazyConfig, "Tests/runtimeTests", "listEvaluationReal", "listEvaluationExpected", "List evaluation test, lazy")
+runtimeTest(False, lazyConfig, "Tests/runtimeTests", "handleTest1Real", "handleTest1Expected", "Handle test, lazy")
+runtimeTest(False, lazyConfig, "Tests/runtimeTests", "hotLambdaReal", "hotLambdaExpected", "Hot lambda test, lazy")
+runtimeTest(False, testConfig, "Tests/runtimeTests", "lazyEffectsReal", "lazyEffectsExpected", "Effect in an unused argument test")
+runtimeTest(False, lazyConfig, "Tests/runtimeTests", "lazyEffectsReal", "lazyEffectsExpected", "Effect in an unused argument test, lazy")
+runtimeTest(False, lazyConfig, "Tests/runtimeTests", "lazyEqualsReal", "lazyEqualsExpected", "Equals on lists of unevaluated arguments test, lazy")
+runtimeTest(False, lazyConfig, "Tests/runtimeTests", "parallelMapCapturedReal", "parallelMapCapturedExpected", "Parallel map of a lambda with a captured argument test, lazy")
+stepLimitRuntimeTest(lazyConfig, "Tests/runtimeTests", "lazyMemoReal", "lazyMemoExpected", "Lazy argument evaluated once test", 10_000)
+
+runtimeTest(False, testConfig, "Tests/runtimeTests", "sharedLibrariesReal", "sharedLibrariesExpected", "Shared libraries test")
+runtimeTest(False, testConfig, "Tests/runtimeTests", "sharedLibrariesReal", "sharedLibrariesExpected", "Shared libraries test, loaded before")
+runtimeTest(False, dict(testConfig, shareLibraries=False), "Tests/runtimeTests", "sharedLibrariesReal", "sharedLibrariesExpected", "Shared libraries test, not sharing")
+snapshotRuntimeTest(testConfig, "Tests/runtimeTests", "handleTest1Real", "handleTest1Expected", "Handle test")
+snapshotRuntimeTest(testConfig, "Tests/runtimeTests", "sharedLibrariesReal", "sharedLibrariesExpected", "Shared libraries test")
+snapshotRuntimeTest(optimizedConfig, "Tests/runtimeTests", "pureMacroReal", "pureMacroExpected", "Pure macro test, optimized")
+
+checkpointRuntimeTest(testConfig, "Tests/runtimeTests", "nativeStateReal", "nativeStateExpected", "Native state effect test", 100)
+checkpointRuntimeTest(capturingHandlersConfig, "Tests/runtimeTests", "generatorReal", "generatorExpected", "Generator test, capturing continuations", 50)
+checkpointRuntimeTest(lazyConfig, "Tests/runtimeTests", "lazyListReal", "lazyListExpected", "Infinite lazy list test", 50)
+checkpointRuntimeTest(optimizedConfig, "Tests/runtimeTests", "pureMacroReal", "pureMacroExpected", "Pure macro test, optimized", 5)
+checkpointRuntimeTest(testConfig, "Tests/runtimeTests", "deepRecursionReal", "deepRecursionExpected", "Deep recursion test", 50_000)
+
+tracedRuntimeTest(testConfig, "Tests/runtimeTests", "handleTest1Real", "handleTest1Expected", "Handle test", ["step", "call", "return", "effect"])
+tracedRuntimeTest(testConfig, "Tests/runtimeTests", "macroIdentityReal", "macroIdentityExpected", "Identity macro test", ["step", "macroExpand"])
+tracedRuntimeTest(lazyConfig, "Tests/runtimeTests", "lazyListReal", "lazyListExpected", "Infinite lazy list test", ["step", "call", "return"])
+tracedRuntimeTest(schedulerConfig, "Tests/runtimeTests", "tasksReal", "tasksExpected", "Task scheduling test", ["step", "call", "effect"])
+
+concurrentRuntimeTest("Tests/runtimeTests", [
+    (testConfig, "sumtest2real", "sumtest2expected", "Sum test 2"),
+    (testConfig, "handleTest1Real", "handleTest1Expected", "Handle test"),
+    (testConfig, "nativeStateReal", "nativeStateExpected", "Native state effect test"),
+    (lazyConfig, "lazyListReal", "lazyListExpected", "Infinite lazy list test"),
+    (schedulerConfig, "tasksReal", "tasksExpected", "Task scheduling test"),
+    (optimizedConfig, "macroIdentityReal", "macroIdentityExpected", "Identity macro test, optimized"),
+    (testConfig, "sharedLibrariesReal", "sharedLibrariesExpected", "Shared libraries test"),
+    (testConfig, "sharedLibrariesReal", "sharedLibrariesExpected", "Shared libraries test, second copy"),
+], "concurrent interpreters")
+
+boundedDepthRuntimeTest(testConfig, "Tests/runtimeTests", "tailRecursionShortReal", "tailRecursionShortExpected",
+                        "Hundred thousand iteration tail recursion test", 10)
+
+# Long running tests, run with: python runTests.py --long
+if "--long" in sys.argv:
+    constantMemoryRuntimeTest(testConfig, "Tests/runtimeTests", "tailRecursionReal", "tailRecursionExpected",
+                              "Million iteration tail recursion test", 50_000)
+    constantMemoryRuntimeTest(schedulerConfig, "Tests/runtimeTests", "manyTasksReal", "manyTasksExpected",
+                              "Hundred thousand task test", 20_000)